@@ -1,2 +1,3 @@
 pip install -r requirements.txt
-python manage.py collectstatic --no-input --clear
\ No newline at end of file
+python manage.py collectstatic --no-input --clear
+python manage.py spectacular --format openapi-json --file staticfiles/openapi-schema.json
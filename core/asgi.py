@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Under ASGI each request's ORM calls run in a thread of their own; persistent
+# connections would pile up there and never be reused, so one per request
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -20,17 +20,30 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from drf_spectacular.views import SpectacularSwaggerView, SpectacularRedocView
 from drf_spectacular.utils import extend_schema
+from gestion.api.schema import CachedSpectacularAPIView
 
 # Decorate built-in views to provide explicit OpenAPI tags
 # Use Spanish tag names to match existing tags in the project
-SpectacularSchemaView = extend_schema(tags=["OpenAPI"])(SpectacularAPIView)
+# The schema is generated once (or loaded from SPECTACULAR_SCHEMA_FILE) and served with ETag/Cache-Control
+SpectacularSchemaView = extend_schema(tags=["OpenAPI"])(CachedSpectacularAPIView)
 # Token endpoints must be public (no security requirement in OpenAPI) so the UI
 # does not show a lock icon next to them. We override the generated security with
 # an empty list for these operations only.
 TokenObtainPairViewTagged = extend_schema(tags=["Autenticación"], auth=[])(TokenObtainPairView)
 TokenRefreshViewTagged = extend_schema(tags=["Autenticación"], auth=[])(TokenRefreshView)
+
+
+# Token endpoints use their own (stricter) throttle bucket, see THROTTLE_BUCKETS
+class ThrottledTokenObtainPairView(TokenObtainPairViewTagged):
+    throttle_scope = "token"
+
+
+class ThrottledTokenRefreshView(TokenRefreshViewTagged):
+    throttle_scope = "token"
+
+
 from django.views.generic import RedirectView
 
 urlpatterns = [
@@ -38,8 +51,8 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("gestion/", include("gestion.urls")),
     # API endpoints (DRF + JWT)
-    path("api/token/", TokenObtainPairViewTagged.as_view(), name="token_obtain_pair"),
-    path("api/token/refresh/", TokenRefreshViewTagged.as_view(), name="token_refresh"),
+    path("api/token/", ThrottledTokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("api/token/refresh/", ThrottledTokenRefreshView.as_view(), name="token_refresh"),
     path("api/", include("gestion.api.urls")),
     # Schema / docs (drf-spectacular)
     path("api/schema/", SpectacularSchemaView.as_view(), name="schema"),
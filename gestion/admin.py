@@ -1,17 +1,29 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.utils.decorators import method_decorator
 from . import models
+from .querycount import query_budget
+from .replicas import replica_view
+from .reporting import reporting_view
+from .search import search_users
 
 class CustomUserAdmin(UserAdmin):
     list_display = ("nombre_completo", "rol", "grupo", "is_active", "exento_pago")
     list_filter = ("rol", "is_active", "exento_pago")
     search_fields = ("username", "first_name", "last_name")
+    # grupo es nullable, así que el changelist no lo une por su cuenta
+    list_select_related = ("grupo",)
     fieldsets = (
         *UserAdmin.fieldsets,
         ("Información adicional", {"fields": ("rol", "grupo", "inactivo_desde", "uuid", "exento_pago")} ),
     )
     readonly_fields = getattr(UserAdmin, 'readonly_fields', ()) + ('uuid',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Índice FTS en lugar de varios LIKE '%...%' sobre la tabla completa
+        return search_users(queryset, search_term), False
+
 admin.site.register(models.Usuario, CustomUserAdmin)
 
 @admin.register(models.Asistencia)
@@ -26,6 +38,10 @@ class AsistenciaAdmin(admin.ModelAdmin):
         ("Información adicional", {"fields": ("nota",)}),
     )
 
+    def get_queryset(self, request):
+        # __str__ usa el alumno (acción de borrado, historial, etc.)
+        return super().get_queryset(request).select_related("alumno")
+
 
 @admin.register(models.Pago)
 class PagoAdmin(admin.ModelAdmin):
@@ -40,6 +56,10 @@ class PagoAdmin(admin.ModelAdmin):
     )
     change_list_template = "admin/pagos_change_list.html"
 
+    def get_queryset(self, request):
+        # Pago.__str__ llama a alumno.get_full_name()
+        return super().get_queryset(request).select_related("alumno")
+
     def get_urls(self):
         from django.urls import path
         urls = super().get_urls()
@@ -48,6 +68,9 @@ class PagoAdmin(admin.ModelAdmin):
         ]
         return my_urls + urls
 
+    @query_budget(3)
+    @reporting_view
+    @method_decorator(replica_view)
     def download_monthly_report(self, request):
         """Admin view: download CSV of pagos filtered by month and year from GET params."""
         import csv
@@ -76,7 +99,8 @@ class PagoAdmin(admin.ModelAdmin):
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         writer = csv.writer(response)
         writer.writerow(['alumno_username', 'alumno_nombre', 'fecha_pago', 'numero_referencia', 'tipo_transaccion', 'banco_emisor'])
-        for p in qs:
+        # iterator: cursor del servidor en Postgres, sin cachear todo el mes en memoria
+        for p in qs.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
             writer.writerow([
                 p.alumno.username,
                 (p.alumno.get_full_name() or f"{p.alumno.first_name} {p.alumno.last_name}"),
@@ -97,4 +121,126 @@ class GrupoAdmin(admin.ModelAdmin):
     fieldsets = (
         (None, {"fields": ("nombre", "descripcion")}),
     )
-    
\ No newline at end of file
+    
+
+class ExcepcionHorarioInline(admin.TabularInline):
+    model = models.ExcepcionHorario
+    extra = 1
+
+
+@admin.register(models.HorarioEntrenamiento)
+class HorarioEntrenamientoAdmin(admin.ModelAdmin):
+    list_display = ("grupo", "dias_semana", "fecha_inicio", "fecha_fin")
+    list_filter = ("grupo",)
+    ordering = ("grupo", "fecha_inicio")
+    inlines = [ExcepcionHorarioInline]
+    actions = ["materializar_sesiones"]
+
+    @admin.action(description="Crear y activar las sesiones de los horarios seleccionados")
+    def materializar_sesiones(self, request, queryset):
+        creadas = activadas = 0
+        for horario in queryset:
+            c, a = horario.materializar()
+            creadas += c
+            activadas += a
+        self.message_user(request, f"Sesiones creadas: {creadas}. Sesiones activadas: {activadas}.")
+
+
+@admin.register(models.RegistroAuditoria)
+class RegistroAuditoriaAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "actor", "accion", "modelo", "objeto_id")
+    list_filter = ("accion", "modelo")
+    search_fields = ("actor__username",)
+    date_hierarchy = "fecha"
+    list_select_related = ("actor",)
+    list_per_page = 50
+    # Avoid the extra COUNT(*) over the whole table on every page
+    show_full_result_count = False
+    readonly_fields = ("fecha", "actor", "accion", "modelo", "objeto_id", "cambios")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(models.ResumenTemporada)
+class ResumenTemporadaAdmin(admin.ModelAdmin):
+    list_display = ("alumno", "temporada", "total_sesiones", "asistencias", "pagos")
+    list_filter = ("temporada",)
+    search_fields = ("alumno__username", "alumno__first_name", "alumno__last_name")
+    list_select_related = ("alumno",)
+    list_per_page = 20
+
+
+@admin.register(models.ArchivoTemporada)
+class ArchivoTemporadaAdmin(admin.ModelAdmin):
+    list_display = ("temporada", "archivo", "asistencias", "pagos", "creado_en", "restaurado_en")
+    readonly_fields = ("temporada", "archivo", "sha256", "asistencias", "pagos", "creado_en", "restaurado_en")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(models.PerfilRequest)
+class PerfilRequestAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "metodo", "url", "vista", "estado", "duracion_ms", "consultas", "usuario")
+    list_filter = ("vista", "estado")
+    search_fields = ("url", "vista")
+    date_hierarchy = "fecha"
+    list_select_related = ("usuario",)
+    list_per_page = 50
+    readonly_fields = ("fecha", "usuario", "metodo", "url", "vista", "estado", "duracion_ms", "consultas", "descarga", "funciones")
+    exclude = ("archivo", "resumen")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Funciones más costosas (tiempo acumulado)")
+    def funciones(self, obj):
+        from django.utils.html import format_html
+        return format_html('<pre style="font-size: 12px; overflow-x: auto;">{}</pre>', obj.resumen)
+
+    @admin.display(description="Perfil completo")
+    def descarga(self, obj):
+        from django.urls import reverse
+        from django.utils.html import format_html
+        url = reverse("admin:gestion_perfilrequest_download", args=[obj.pk])
+        return format_html('<a href="{}">{}</a> (python -m pstats / snakeviz)', url, obj.archivo)
+
+    def get_urls(self):
+        from django.urls import path
+        urls = super().get_urls()
+        my_urls = [
+            path('<int:pk>/descargar/', self.admin_site.admin_view(self.download_profile), name='gestion_perfilrequest_download'),
+        ]
+        return my_urls + urls
+
+    def download_profile(self, request, pk):
+        from django.core.exceptions import PermissionDenied
+        from django.http import FileResponse, Http404
+        from .profiling import profiles_dir
+
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        perfil = models.PerfilRequest.objects.filter(pk=pk).first()
+        path = profiles_dir() / perfil.archivo if perfil else None
+        if path is None or not path.is_file():
+            raise Http404("Perfil no encontrado")
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=perfil.archivo)
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, models.PerfilRequest.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        from .profiling import profiles_dir
+        for archivo in queryset.values_list("archivo", flat=True):
+            (profiles_dir() / archivo).unlink(missing_ok=True)
+        queryset.delete()
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from gestion.checks import cache_is_shared
+
+
+# Campos de Usuario que afectan a la autenticación/permisos. Si alguno cambia
+# en Usuario.save o en un update() de Usuario se invalida el usuario cacheado.
+AUTH_RELEVANT_FIELDS = ("is_active", "rol", "password", "is_staff", "is_superuser")
+
+DATABASE_CACHE = "django.core.cache.backends.db.DatabaseCache"
+
+
+def _version_key(user_id):
+    return f"gestion:jwt-user-version:{user_id}"
+
+
+def _user_key(user_id, version):
+    return f"gestion:jwt-user:{user_id}:{version}"
+
+
+def _users():
+    """Per-process cache of authenticated users: a hit costs no round trip."""
+    return caches["jwt_users"]
+
+
+def _versions():
+    """Where the per-user versions live.
+
+    The default cache when every worker shares it and reading it does not hit the
+    database (memcached, Redis): an invalidation reaches all workers at once. With
+    a per-process or a database cache (CACHE_TABLE) they stay in this process, and
+    a change made on another worker is seen once the cached user expires
+    (JWT_USER_CACHE_TIMEOUT); reading them from the cache table would cost as much
+    as reading the user.
+    """
+    if cache_is_shared() and settings.CACHES["default"]["BACKEND"] != DATABASE_CACHE:
+        return cache
+    return _users()
+
+
+def get_user_cache_version(user_id):
+    return _versions().get(_version_key(user_id), 0)
+
+
+def invalidate_user_cache(user_id):
+    """Bump the per-user version so cached entries for this user are ignored.
+
+    The previous entry is also deleted: a request that read the user from the
+    database before the change and writes it back afterwards will only ever
+    write under the old (now unused) version.
+    """
+    version = get_user_cache_version(user_id)
+    _users().delete(_user_key(user_id, version))
+    _versions().set(_version_key(user_id), version + 1, None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves ``request.user`` from a per-process cache.
+
+    The user is stored under a key built from its id and a per-user version
+    that is bumped by ``Usuario.save`` and ``Usuario.objects.update()`` whenever
+    ``AUTH_RELEVANT_FIELDS`` change, so authenticated reads skip the ``Usuario``
+    lookup. See ``_versions`` for how far an invalidation reaches.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = _user_key(user_id, get_user_cache_version(user_id))
+        user = _users().get(key)
+        if user is None:
+            # super() raises for missing/inactive users, so only valid users are cached
+            user = super().get_user(validated_token)
+            _users().set(key, user, getattr(settings, "JWT_USER_CACHE_TIMEOUT", 60))
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Expose CachedJWTAuthentication as the same bearer scheme in the OpenAPI schema."""
+
+    target_class = "gestion.api.authentication.CachedJWTAuthentication"
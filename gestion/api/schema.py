@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils import translation
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.response import Response
+
+
+# (version, language) -> (schema, content hash). Generated once per process.
+_schemas = {}
+
+
+def _load_precomputed_schema():
+    """Return the schema written at build time (build_files.sh), if any.
+
+    Ignored with DEBUG so local serializer changes show up after a reload.
+    """
+    path = getattr(settings, "SPECTACULAR_SCHEMA_FILE", None)
+    if settings.DEBUG or not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def schema_hash(schema):
+    payload = json.dumps(schema, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def clear_schema_cache():
+    _schemas.clear()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """SpectacularAPIView that generates the schema once and serves it with ETag/Cache-Control."""
+
+    def _get_schema_response(self, request):
+        version = self.api_version or request.version or self._get_version_parameter(request)
+        key = (version, translation.get_language())
+        entry = _schemas.get(key)
+        if entry is None:
+            schema = None
+            if version is None and not request.GET.get("lang"):
+                schema = _load_precomputed_schema()
+            if schema is None:
+                generator = self.generator_class(urlconf=self.urlconf, api_version=version, patterns=self.patterns)
+                schema = generator.get_schema(request=request, public=self.serve_public)
+            entry = _schemas[key] = (schema, schema_hash(schema))
+        schema, digest = entry
+
+        etag = f'"{digest}-{request.accepted_renderer.format}"'
+        if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+            response = HttpResponseNotModified()
+        else:
+            response = Response(
+                data=schema,
+                headers={"Content-Disposition": f'inline; filename="{self._get_filename(request, version)}"'},
+            )
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=getattr(settings, "SPECTACULAR_SCHEMA_MAX_AGE", 86400))
+        patch_vary_headers(response, ["Accept"])
+        return response
@@ -1,5 +1,6 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from gestion.models import Usuario, Grupo, Asistencia, SessionDay, Pago
+from gestion.models import Usuario, Grupo, Asistencia, SessionDay, Pago, HorarioEntrenamiento, ExcepcionHorario
 
 
 class GrupoSerializer(serializers.ModelSerializer):
@@ -49,6 +50,46 @@ class SessionDaySerializer(serializers.ModelSerializer):
         fields = ["id", "grupo", "fecha", "active"]
 
 
+class ExcepcionHorarioSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExcepcionHorario
+        fields = ["fecha", "motivo"]
+
+
+class HorarioEntrenamientoSerializer(serializers.ModelSerializer):
+    excepciones = ExcepcionHorarioSerializer(many=True, required=False)
+
+    class Meta:
+        model = HorarioEntrenamiento
+        fields = ["id", "grupo", "dias_semana", "fecha_inicio", "fecha_fin", "excepciones"]
+
+    def validate(self, attrs):
+        instance = HorarioEntrenamiento(**{k: v for k, v in attrs.items() if k != "excepciones"})
+        if self.instance is not None:
+            for field in ("grupo", "dias_semana", "fecha_inicio", "fecha_fin"):
+                if field not in attrs:
+                    setattr(instance, field, getattr(self.instance, field))
+        try:
+            instance.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+        return attrs
+
+    def create(self, validated_data):
+        excepciones = validated_data.pop("excepciones", [])
+        horario = super().create(validated_data)
+        ExcepcionHorario.objects.bulk_create([ExcepcionHorario(horario=horario, **e) for e in excepciones])
+        return horario
+
+    def update(self, instance, validated_data):
+        excepciones = validated_data.pop("excepciones", None)
+        horario = super().update(instance, validated_data)
+        if excepciones is not None:
+            horario.excepciones.all().delete()
+            ExcepcionHorario.objects.bulk_create([ExcepcionHorario(horario=horario, **e) for e in excepciones])
+        return horario
+
+
 class PagoSerializer(serializers.ModelSerializer):
     captura_comprobante = serializers.ImageField(required=False, allow_null=True)
 
@@ -63,3 +104,18 @@ class PagoSerializer(serializers.ModelSerializer):
             "tipo_transaccion",
             "captura_comprobante",
         ]
+
+
+class RosterStudentSerializer(serializers.ModelSerializer):
+    asistencia = AsistenciaSerializer(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Usuario
+        fields = ["id", "username", "first_name", "last_name", "inactivo_desde", "asistencia"]
+
+
+class RosterSerializer(serializers.Serializer):
+    grupo = serializers.IntegerField()
+    fecha = serializers.DateField()
+    session_active = serializers.BooleanField()
+    estudiantes = RosterStudentSerializer(many=True)
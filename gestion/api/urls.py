@@ -5,6 +5,7 @@ from .views import (
     AsistenciaViewSet,
     SessionDayViewSet,
     PagoViewSet,
+    HorarioEntrenamientoViewSet,
     UserStatsView,
 )
 
@@ -14,6 +15,7 @@ router.register(r"grupos", GrupoViewSet, basename="grupo")
 router.register(r"asistencias", AsistenciaViewSet, basename="asistencia")
 router.register(r"session-days", SessionDayViewSet, basename="sessionday")
 router.register(r"pagos", PagoViewSet, basename="pago")
+router.register(r"horarios", HorarioEntrenamientoViewSet, basename="horario")
 
 urlpatterns = router.urls
 
@@ -1,21 +1,29 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from gestion.models import Usuario, Grupo, Asistencia, SessionDay, Pago
+from gestion.models import Usuario, Grupo, Asistencia, SessionDay, Pago, HorarioEntrenamiento
 from .serializers import (
     UsuarioSerializer,
     GrupoSerializer,
     AsistenciaSerializer,
     SessionDaySerializer,
     PagoSerializer,
+    RosterSerializer,
+    HorarioEntrenamientoSerializer,
 )
-from drf_spectacular.utils import extend_schema
+from gestion.replicas import ReplicaReadMixin
+from gestion.roster import eligible_students, is_session_active
+from gestion.search import search_users
+from datetime import datetime, date
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from rest_framework.views import APIView
 
 
 @extend_schema(tags=["Usuarios"])
-class UserStatsView(APIView):
+class UserStatsView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    # Máximo de consultas por request en cualquier acción (gestion.querycount)
+    query_budget = 4
 
     def get(self, request):
         total_users = Usuario.objects.count()
@@ -30,10 +38,22 @@ class UserStatsView(APIView):
 
 
 @extend_schema(tags=["Usuarios"])
-class UsuarioViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=[OpenApiParameter("q", str, description="Buscar por nombre, apellido o usuario (prefijos).")])
+)
+class UsuarioViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Usuario.objects.all().order_by("id")
     serializer_class = UsuarioSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # El borrado recorre las relaciones en cascada (una consulta por tabla relacionada)
+    query_budget = 12
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        q = self.request.query_params.get("q")
+        if q and self.action == "list":
+            qs = search_users(qs, q)
+        return qs
 
     def get_permissions(self):
         # Creation of users is allowed only to staff
@@ -43,17 +63,44 @@ class UsuarioViewSet(viewsets.ModelViewSet):
 
 
 @extend_schema(tags=["Grupos"])
-class GrupoViewSet(viewsets.ReadOnlyModelViewSet):
+class GrupoViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Grupo.objects.all().order_by("nombre")
     serializer_class = GrupoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 6
+
+    @extend_schema(
+        parameters=[OpenApiParameter("fecha", str, description="Fecha de la sesión (YYYY-MM-DD). Por defecto hoy.")],
+        responses=RosterSerializer,
+    )
+    @action(detail=True, methods=["get"])
+    def roster(self, request, pk=None):
+        """Alumnos elegibles del grupo para una fecha, con su asistencia y el estado de la sesión."""
+        grupo = self.get_object()
+        fecha = request.query_params.get("fecha")
+        if fecha:
+            try:
+                fecha = datetime.strptime(fecha, "%Y-%m-%d").date()
+            except ValueError:
+                return Response({"detail": "Fecha inválida, use YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            fecha = date.today()
+
+        data = {
+            "grupo": grupo.pk,
+            "fecha": fecha,
+            "session_active": is_session_active(grupo, fecha),
+            "estudiantes": eligible_students(grupo, fecha),
+        }
+        return Response(RosterSerializer(data).data)
 
 
 @extend_schema(tags=["Asistencias"])
-class AsistenciaViewSet(viewsets.ModelViewSet):
+class AsistenciaViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Asistencia.objects.all().order_by("-fecha")
     serializer_class = AsistenciaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 8
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -68,10 +115,11 @@ class AsistenciaViewSet(viewsets.ModelViewSet):
 
 
 @extend_schema(tags=["SessionDays"])
-class SessionDayViewSet(viewsets.ModelViewSet):
+class SessionDayViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = SessionDay.objects.all().order_by("-fecha")
     serializer_class = SessionDaySerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 8
 
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAdminUser])
     def activate(self, request, pk=None):
@@ -88,8 +136,29 @@ class SessionDayViewSet(viewsets.ModelViewSet):
         return Response(self.get_serializer(sd).data)
 
 
+@extend_schema(tags=["SessionDays"])
+class HorarioEntrenamientoViewSet(viewsets.ModelViewSet):
+    queryset = HorarioEntrenamiento.objects.all().prefetch_related("excepciones").order_by("grupo", "fecha_inicio")
+    serializer_class = HorarioEntrenamientoSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 10
+
+    def get_permissions(self):
+        # Only staff can change schedules; any authenticated user can read them
+        if self.action not in ("list", "retrieve"):
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+
+    @action(detail=True, methods=["post"], permission_classes=[permissions.IsAdminUser])
+    def materializar(self, request, pk=None):
+        """Crea y activa en bloque los SessionDay del horario."""
+        creadas, activadas = self.get_object().materializar()
+        return Response({"creadas": creadas, "activadas": activadas})
+
+
 @extend_schema(tags=["Pagos"])
-class PagoViewSet(viewsets.ModelViewSet):
+class PagoViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Pago.objects.all().order_by("-fecha_pago")
     serializer_class = PagoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 8
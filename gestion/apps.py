@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class GestionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestion'
+
+    def ready(self):
+        from . import audit, search, sqlite
+        from . import checks  # noqa: F401 - registra las comprobaciones de `check --deploy`
+        audit.connect_signals()
+        search.connect_signals()
+        sqlite.connect_signals()
@@ -0,0 +1,169 @@
+"""
+Archivo de temporadas cerradas.
+
+`archivar_temporada(año)` escribe las asistencias y pagos del año en un JSONL
+comprimido con gzip, guarda su SHA-256 en ArchivoTemporada, deja totales por
+alumno en ResumenTemporada y borra las filas de las tablas vivas.
+`restaurar_temporada(año)` verifica el checksum y vuelve a insertar las filas
+con bulk_create.
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from .models import Asistencia, Pago, ResumenTemporada, ArchivoTemporada
+
+ARCHIVED_MODELS = {
+    "gestion.asistencia": (Asistencia, "fecha"),
+    "gestion.pago": (Pago, "fecha_pago"),
+}
+BATCH_SIZE = 1000
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def archive_dir():
+    return Path(getattr(settings, "ARCHIVE_DIR", Path(settings.BASE_DIR) / "archivo"))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _season_qs(label, temporada):
+    model, date_field = ARCHIVED_MODELS[label]
+    return model.objects.filter(**{f"{date_field}__year": temporada})
+
+
+def _write_archive(path, temporada):
+    counts = {}
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+        for label in ARCHIVED_MODELS:
+            counts[label] = 0
+            for row in _season_qs(label, temporada).order_by("pk").values().iterator(chunk_size=BATCH_SIZE):
+                fh.write(json.dumps({"model": label, "fields": row}, cls=DjangoJSONEncoder))
+                fh.write("\n")
+                counts[label] += 1
+    os.replace(tmp, path)
+    return counts
+
+
+def _build_summaries(temporada):
+    resumenes = {}
+    asistencias = (
+        _season_qs("gestion.asistencia", temporada)
+        .values("alumno")
+        .annotate(
+            total=Count("id"),
+            presentes=Count("id", filter=Q(presente=True)),
+            primera=Min("fecha"),
+            ultima=Max("fecha"),
+        )
+    )
+    for row in asistencias:
+        resumenes[row["alumno"]] = ResumenTemporada(
+            alumno_id=row["alumno"],
+            temporada=temporada,
+            total_sesiones=row["total"],
+            asistencias=row["presentes"],
+            fecha_primera=row["primera"],
+            fecha_ultima=row["ultima"],
+        )
+    for row in _season_qs("gestion.pago", temporada).values("alumno").annotate(total=Count("id")):
+        resumen = resumenes.setdefault(row["alumno"], ResumenTemporada(alumno_id=row["alumno"], temporada=temporada))
+        resumen.pagos = row["total"]
+    return list(resumenes.values())
+
+
+def archivar_temporada(temporada):
+    """Mueve la temporada al archivo. Devuelve el ArchivoTemporada creado."""
+    if temporada >= date.today().year:
+        raise ArchiveError("Solo se pueden archivar temporadas cerradas (años anteriores al actual).")
+    existente = ArchivoTemporada.objects.filter(temporada=temporada).first()
+    if existente and not existente.restaurado_en:
+        raise ArchiveError(f"La temporada {temporada} ya está archivada en {existente.archivo}.")
+
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"temporada_{temporada}.jsonl.gz"
+
+    with transaction.atomic():
+        counts = _write_archive(path, temporada)
+        sha256 = file_sha256(path)
+        ResumenTemporada.objects.bulk_create(_build_summaries(temporada), batch_size=BATCH_SIZE)
+        for label in ARCHIVED_MODELS:
+            # _raw_delete: un único DELETE sin cargar las filas ni disparar señales
+            # (el archivo ya es el registro de lo que se movió)
+            qs = _season_qs(label, temporada)
+            qs._raw_delete(qs.db)
+        archivo, _ = ArchivoTemporada.objects.update_or_create(
+            temporada=temporada,
+            defaults={
+                "archivo": path.name,
+                "sha256": sha256,
+                "asistencias": counts["gestion.asistencia"],
+                "pagos": counts["gestion.pago"],
+                "creado_en": timezone.now(),
+                "restaurado_en": None,
+            },
+        )
+    return archivo
+
+
+def _read_archive(path):
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def restaurar_temporada(temporada):
+    """Vuelve a insertar las filas archivadas. Devuelve {modelo: filas}."""
+    try:
+        archivo = ArchivoTemporada.objects.get(temporada=temporada, restaurado_en__isnull=True)
+    except ArchivoTemporada.DoesNotExist:
+        raise ArchiveError(f"No hay un archivo pendiente de restaurar para la temporada {temporada}.")
+    path = archive_dir() / archivo.archivo
+    if not path.exists():
+        raise ArchiveError(f"No se encontró el archivo {path}.")
+    if file_sha256(path) != archivo.sha256:
+        raise ArchiveError(f"El checksum de {path} no coincide; el archivo está dañado.")
+
+    counts = {label: 0 for label in ARCHIVED_MODELS}
+    batches = {label: [] for label in ARCHIVED_MODELS}
+
+    def _flush(label):
+        model = ARCHIVED_MODELS[label][0]
+        model.objects.bulk_create(batches[label], batch_size=BATCH_SIZE, ignore_conflicts=True)
+        batches[label] = []
+
+    with transaction.atomic():
+        for record in _read_archive(path):
+            label = record["model"]
+            model = ARCHIVED_MODELS[label][0]
+            batches[label].append(model(**record["fields"]))
+            counts[label] += 1
+            if len(batches[label]) >= BATCH_SIZE:
+                _flush(label)
+        for label in ARCHIVED_MODELS:
+            _flush(label)
+        ResumenTemporada.objects.filter(temporada=temporada).delete()
+        archivo.restaurado_en = timezone.now()
+        archivo.save(update_fields=["restaurado_en"])
+    return counts
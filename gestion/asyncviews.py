@@ -0,0 +1,100 @@
+"""
+Utilidades para las vistas async.
+
+Bajo un servidor ASGI (uvicorn, daphne) una vista `async def` no ocupa un hilo
+mientras espera, y una StreamingHttpResponse con un iterador async envía el
+cuerpo desde el event loop: una exportación lenta, o un cliente lento, no bloquea
+un worker. Bajo WSGI las mismas vistas funcionan (Django las ejecuta con
+async_to_sync), pero el cuerpo debe ser un iterador normal: con uno async Django
+4.2 lo consumiría entero en memoria antes de enviarlo. `streaming_csv` elige el
+tipo de iterador según el request.
+
+Límite: la cadena de middleware es síncrona (WhiteNoiseMiddleware 6.x y los de
+gestion: timing, metrics, querycount, replicas, audit, profiling). Bajo ASGI Django
+la ejecuta en un hilo y llama a la vista async desde él, así que ese hilo queda
+ocupado hasta que la vista devuelve la respuesta. Lo que se libera es el envío del
+cuerpo en streaming, que corre en el event loop: la parte larga de una exportación.
+Volver async los middlewares de gestion no bastaría mientras WhiteNoise no lo sea.
+
+`login_required` envuelve el de Django, que en 4.2 todavía no acepta vistas async,
+y espera la vista con `profiling.profile_await` para que `?_profile=1` vea sus
+funciones.
+"""
+import csv
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required as sync_login_required
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from .profiling import profile_await
+
+# Filas de CSV por cada trozo enviado al cliente
+STREAM_ROWS = 500
+
+
+def is_asgi(request):
+    return isinstance(request, ASGIRequest)
+
+
+def login_required(view_func):
+    if not iscoroutinefunction(view_func):
+        return sync_login_required(view_func)
+
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        # request.user es perezoso y lee la sesión de la base: se resuelve fuera del event loop
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return redirect_to_login(request.get_full_path())
+        return await profile_await(view_func(request, *args, **kwargs))
+    return wrapper
+
+
+class _Echo:
+    """csv.writer sobre esto devuelve la línea en lugar de escribirla."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_chunks(header, objetos, fila):
+    writer = csv.writer(_Echo())
+    lineas = [writer.writerow(header)]
+    for obj in objetos:
+        lineas.append(writer.writerow(fila(obj)))
+        if len(lineas) >= STREAM_ROWS:
+            yield "".join(lineas)
+            lineas = []
+    if lineas:
+        yield "".join(lineas)
+
+
+async def _acsv_chunks(header, objetos, fila):
+    writer = csv.writer(_Echo())
+    lineas = [writer.writerow(header)]
+    async for obj in objetos:
+        lineas.append(writer.writerow(fila(obj)))
+        if len(lineas) >= STREAM_ROWS:
+            yield "".join(lineas)
+            lineas = []
+    if lineas:
+        yield "".join(lineas)
+
+
+def streaming_csv(request, filename, header, queryset, fila, chunk_size=None):
+    """
+    CSV en streaming: una fila `fila(obj)` por objeto de `queryset`, leído por lotes
+    de `chunk_size` (EXPORT_CHUNK_SIZE). Las consultas corren al enviar el cuerpo,
+    fuera de los decoradores de la vista: el queryset debe llevar ya su `.using()`.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    if is_asgi(request):
+        content = _acsv_chunks(header, queryset.aiterator(chunk_size=chunk_size), fila)
+    else:
+        content = _csv_chunks(header, queryset.iterator(chunk_size=chunk_size), fila)
+    response = StreamingHttpResponse(content, content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
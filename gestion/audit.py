@@ -0,0 +1,148 @@
+"""
+Registro de auditoría de Asistencia, Pago, SessionDay y Usuario.
+
+Los cambios se capturan con señales post_save/post_delete (los valores anteriores
+salen de FieldTrackerMixin) y se acumulan en un buffer por request
+(AuditMiddleware) o por bloque `audit_context()`; al cerrarse se escriben con un
+único bulk_create. Fuera de esos contextos cada cambio se escribe al confirmarse
+su transacción. `QuerySet.update()` y `bulk_create()` no disparan señales y no
+quedan registrados.
+
+Si el INSERT del registro falla, el error se propaga (el request responde 500)
+en lugar de perder las entradas en silencio.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_save
+
+_buffer = ContextVar("gestion_audit_buffer", default=None)
+# Lista de `collect_into`: las entradas van ahí en lugar de esperar al commit
+_collector = ContextVar("gestion_audit_collector", default=None)
+
+MASKED_FIELDS = {"password"}
+
+
+def _serialize(attname, value):
+    if attname in MASKED_FIELDS:
+        return "***"
+    if isinstance(value, FieldFile):
+        return value.name or None
+    return value
+
+
+def _actor_id(state):
+    if state is None:
+        return None
+    if state.get("actor") is not None:
+        return state["actor"].pk
+    user = getattr(state.get("request"), "user", None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def _enqueue(entry):
+    collector = _collector.get()
+    if collector is not None:
+        collector.append(entry)
+        return
+    state = _buffer.get()
+    # Solo se registra si la transacción confirma (en autocommit on_commit es inmediato)
+    transaction.on_commit(lambda: _add(state, entry))
+
+
+def _add(state, entry):
+    if state is None or state["closed"]:
+        # Sin buffer, o la transacción confirmó después de cerrar el contexto
+        flush([entry])
+    else:
+        state["entries"].append(entry)
+
+
+def flush(entries):
+    from .models import RegistroAuditoria
+    if not entries:
+        return
+    RegistroAuditoria.objects.bulk_create(entries)
+
+
+@contextmanager
+def collect_into(entries):
+    """
+    Acumula en `entries` las entradas generadas dentro del bloque, sin esperar al
+    commit: quien lo usa las guarda con `flush` dentro de su propia transacción.
+    """
+    token = _collector.set(entries)
+    try:
+        yield entries
+    finally:
+        _collector.reset(token)
+
+
+@contextmanager
+def audit_context(actor=None, request=None):
+    """Acumula las entradas de auditoría y las guarda con un único INSERT al salir."""
+    state = {"actor": actor, "request": request, "entries": [], "closed": False}
+    token = _buffer.set(state)
+    try:
+        yield state
+    finally:
+        _buffer.reset(token)
+        state["closed"] = True
+        flush(state["entries"])
+
+
+class AuditMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit_context(request=request):
+            return self.get_response(request)
+
+
+def _build_entry(instance, accion, cambios):
+    from .models import RegistroAuditoria
+    return RegistroAuditoria(
+        actor_id=_actor_id(_buffer.get()),
+        accion=accion,
+        modelo=instance._meta.label_lower,
+        objeto_id=instance.pk,
+        cambios=cambios,
+    )
+
+
+def _on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        accion = "CREAR"
+        cambios = {
+            attname: [None, _serialize(attname, instance.__dict__.get(attname))]
+            for attname in instance._tracked_attnames()
+        }
+    else:
+        accion = "MODIFICAR"
+        cambios = {
+            attname: [_serialize(attname, old), _serialize(attname, new)]
+            for attname, (old, new) in instance.get_changed_fields().items()
+        }
+        if not cambios:
+            return
+    _enqueue(_build_entry(instance, accion, cambios))
+
+
+def _on_delete(sender, instance, **kwargs):
+    antes = getattr(instance, "_loaded_values", {})
+    cambios = {attname: [_serialize(attname, old), None] for attname, old in antes.items()}
+    _enqueue(_build_entry(instance, "ELIMINAR", cambios))
+
+
+def connect_signals():
+    from .models import Asistencia, Pago, SessionDay, Usuario
+    for model in (Asistencia, Pago, SessionDay, Usuario):
+        post_save.connect(_on_save, sender=model, dispatch_uid=f"audit_save_{model._meta.label_lower}")
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f"audit_delete_{model._meta.label_lower}")
@@ -0,0 +1,223 @@
+"""
+Respaldo y restauración de todos los modelos de gestion en streaming.
+
+`crear_respaldo(directorio)` escribe un `<app>.<modelo>.jsonl.gz` por modelo (una
+fila de `.values()` por línea, leída con `.iterator()`) y un `manifest.json` con el
+orden de dependencias, las filas y el SHA-256 de cada archivo. Todo se lee dentro
+de una transacción, así que el respaldo es una foto consistente.
+
+Van también los grupos de auth (usuario_groups apunta a ellos) con sus permisos.
+Los permisos no se respaldan: los crea `migrate` en cada base, con otros ids, así
+que las filas que los referencian guardan su clave natural
+(`[codename, app_label, model]`) y al restaurar se traduce al id local.
+
+`restaurar_respaldo(directorio)` verifica los checksums y la migración antes de
+tocar la base y vuelve a insertar las filas con bulk_create por lotes, en orden de
+dependencias. La memoria no depende del tamaño de la base: como mucho un lote por
+modelo. A diferencia de dumpdata/loaddata no se construye el grafo de objetos ni se
+guarda fila por fila.
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+from .archive import file_sha256
+from .search import rebuild_index
+
+FORMATO = 2
+BATCH_SIZE = 2000
+MANIFEST = "manifest.json"
+
+
+class BackupError(Exception):
+    pass
+
+
+def backup_dir():
+    return Path(getattr(settings, "BACKUP_DIR", Path(settings.BASE_DIR) / "backups"))
+
+
+def backup_models():
+    """Grupos de auth y modelos de gestion (incluidas las tablas intermedias M2M) en orden de dependencias."""
+    group = apps.get_model("auth", "Group")
+    modelos = [group, group.permissions.through] + [
+        m for m in apps.get_app_config("gestion").get_models(include_auto_created=True)
+        if m._meta.managed and not m._meta.proxy
+    ]
+    pendientes = {
+        m: {f.related_model for f in m._meta.concrete_fields if f.is_relation and f.related_model in modelos and f.related_model is not m}
+        for m in modelos
+    }
+    orden = []
+    while pendientes:
+        listos = [m for m in modelos if m in pendientes and not pendientes[m] - set(orden)]
+        if not listos:
+            raise BackupError(f"Dependencias circulares entre {sorted(m._meta.label_lower for m in pendientes)}")
+        for m in listos:
+            orden.append(m)
+            del pendientes[m]
+    return orden
+
+
+def ultima_migracion():
+    applied = MigrationRecorder(connection).applied_migrations()
+    nombres = sorted(name for app, name in applied if app == "gestion")
+    return nombres[-1] if nombres else None
+
+
+def _permission_fields(model):
+    Permission = apps.get_model("auth", "Permission")
+    return [f.attname for f in model._meta.concrete_fields if f.is_relation and f.related_model is Permission]
+
+
+def _permissions():
+    """{id: clave natural} de los permisos de esta base."""
+    Permission = apps.get_model("auth", "Permission")
+    return {p.pk: list(p.natural_key()) for p in Permission.objects.select_related("content_type")}
+
+
+def _write_model(model, path, permisos):
+    filas = 0
+    campos = _permission_fields(model)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as fh:
+        for row in model._base_manager.order_by("pk").values().iterator(chunk_size=BATCH_SIZE):
+            for campo in campos:
+                row[campo] = permisos[row[campo]]
+            fh.write(json.dumps(row, cls=DjangoJSONEncoder))
+            fh.write("\n")
+            filas += 1
+    os.replace(tmp, path)
+    return filas
+
+
+def crear_respaldo(directorio, stdout=None):
+    """Escribe el respaldo en `directorio` (se crea) y devuelve el manifiesto."""
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    if (directorio / MANIFEST).exists():
+        raise BackupError(f"{directorio} ya contiene un respaldo.")
+    modelos = []
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            # Una sola foto para todas las tablas (en SQLite la da la propia transacción)
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        permisos = _permissions()
+        for model in backup_models():
+            label = model._meta.label_lower
+            archivo = f"{label}.jsonl.gz"
+            filas = _write_model(model, directorio / archivo, permisos)
+            modelos.append({"modelo": label, "archivo": archivo, "filas": filas, "sha256": file_sha256(directorio / archivo)})
+            if stdout is not None:
+                stdout.write(f"{label:40} {filas:9d} filas")
+        manifest = {
+            "formato": FORMATO,
+            "creado": datetime.now().isoformat(timespec="seconds"),
+            "django": django.get_version(),
+            "migracion": ultima_migracion(),
+            "modelos": modelos,
+        }
+    (directorio / MANIFEST).write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    return manifest
+
+
+def leer_manifiesto(directorio):
+    path = Path(directorio) / MANIFEST
+    if not path.exists():
+        raise BackupError(f"No se encontró {path}.")
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("formato") != FORMATO:
+        raise BackupError(f"Formato de respaldo no soportado: {manifest.get('formato')}.")
+    return manifest
+
+
+def verificar_respaldo(directorio, manifest=None):
+    """Comprueba que estén todos los archivos y que coincidan sus checksums."""
+    directorio = Path(directorio)
+    manifest = manifest or leer_manifiesto(directorio)
+    for entrada in manifest["modelos"]:
+        path = directorio / entrada["archivo"]
+        if not path.exists():
+            raise BackupError(f"Falta {path}.")
+        if file_sha256(path) != entrada["sha256"]:
+            raise BackupError(f"El checksum de {path} no coincide; el archivo está dañado.")
+    return manifest
+
+
+def _read_rows(path):
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def restaurar_respaldo(directorio, reemplazar=False, stdout=None):
+    """Restaura el respaldo de `directorio`. Devuelve {modelo: filas}."""
+    directorio = Path(directorio)
+    manifest = verificar_respaldo(directorio)
+    if manifest["migracion"] != ultima_migracion():
+        raise BackupError(
+            f"El respaldo es de la migración {manifest['migracion']} y la base está en {ultima_migracion()}; "
+            "migra la base a esa versión antes de restaurar."
+        )
+    por_label = {m._meta.label_lower: m for m in backup_models()}
+    desconocidos = [e["modelo"] for e in manifest["modelos"] if e["modelo"] not in por_label]
+    if desconocidos:
+        raise BackupError(f"Modelos desconocidos en el respaldo: {', '.join(desconocidos)}.")
+    modelos = [por_label[e["modelo"]] for e in manifest["modelos"]]
+
+    counts = {}
+    with transaction.atomic():
+        if reemplazar:
+            # Al revés del orden de dependencias; DELETE directos, sin cargar filas ni señales
+            for model in reversed(list(por_label.values())):
+                qs = model._base_manager.all()
+                qs._raw_delete(qs.db)
+        else:
+            ocupados = [m._meta.label_lower for m in modelos if m._base_manager.exists()]
+            if ocupados:
+                raise BackupError(f"La base ya tiene datos en {', '.join(ocupados)}; usa --reemplazar.")
+
+        permisos = {tuple(clave): pk for pk, clave in _permissions().items()}
+        for entrada, model in zip(manifest["modelos"], modelos):
+            lote, filas = [], 0
+            campos = _permission_fields(model)
+            for row in _read_rows(directorio / entrada["archivo"]):
+                for campo in campos:
+                    clave = tuple(row[campo])
+                    if clave not in permisos:
+                        raise BackupError(f"El permiso {'.'.join(clave)} no existe en esta base; ejecuta migrate antes de restaurar.")
+                    row[campo] = permisos[clave]
+                lote.append(model(**row))
+                if len(lote) >= BATCH_SIZE:
+                    model._base_manager.bulk_create(lote, batch_size=BATCH_SIZE)
+                    filas += len(lote)
+                    lote = []
+            model._base_manager.bulk_create(lote, batch_size=BATCH_SIZE)
+            filas += len(lote)
+            if filas != entrada["filas"]:
+                raise BackupError(f"{entrada['archivo']}: {filas} filas, el manifiesto dice {entrada['filas']}.")
+            counts[entrada["modelo"]] = filas
+            if stdout is not None:
+                stdout.write(f"{entrada['modelo']:40} {filas:9d} filas")
+
+        # Las claves primarias vienen del respaldo: las secuencias deben seguir desde el máximo
+        sql = connection.ops.sequence_reset_sql(no_style(), modelos)
+        if sql:
+            with connection.cursor() as cursor:
+                for statement in sql:
+                    cursor.execute(statement)
+    # bulk_create no dispara las señales del índice de búsqueda
+    rebuild_index()
+    return counts
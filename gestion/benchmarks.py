@@ -0,0 +1,335 @@
+"""
+Benchmarks de las vistas, exportaciones y endpoints de la API más usados.
+
+Cada caso se pide con el cliente de pruebas de Django contra una base sembrada con
+`gestion.synthetic` y se mide el tiempo de pared (varias repeticiones), el número de
+consultas SQL y el pico de memoria de Python (tracemalloc, en una pasada aparte para
+no distorsionar los tiempos). `compare()` contrasta dos resultados guardados.
+
+`sqlite_concurrency()` mide aparte lecturas y escrituras concurrentes sobre un archivo
+SQLite con y sin los PRAGMA de producción, y con las escrituras agrupadas
+(`manage.py benchmark_sqlite`).
+"""
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+import django
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Grupo, SessionDay, Usuario
+from .sqlite import apply_pragmas
+from .synthetic import ConfigClub, generar_club
+from .writequeue import WriteCoalescer
+
+
+@dataclass
+class Caso:
+    nombre: str
+    url: str
+    # Los endpoints de la API se piden como JSON
+    api: bool = False
+
+
+def dataset_config(grupos=6, atletas_por_grupo=30, temporadas=2, semilla=1):
+    # Hasta el 31/12 del año actual: las exportaciones semanales usan el año en curso
+    # y así el tamaño no depende del día en que se corra
+    hoy = date(date.today().year, 12, 31)
+    return ConfigClub(grupos=grupos, atletas_por_grupo=atletas_por_grupo, temporadas=temporadas, semilla=semilla, hoy=hoy)
+
+
+def preparar_datos(config):
+    counts = generar_club(config)
+    admin = Usuario.objects.create_superuser(username="bench_admin", password="bench", email="bench@example.com", rol="ADMINISTRADOR")
+    return admin, counts
+
+
+def casos():
+    """Casos con URLs sobre el primer grupo generado y una sesión activa a mitad de año."""
+    grupo = Grupo.objects.order_by("pk").first()
+    year = date.today().year
+    sesion = SessionDay.objects.filter(grupo=grupo, active=True, fecha__gte=date(year, 6, 1)).order_by("fecha").first()
+    fecha = sesion.fecha.strftime("%Y-%m-%d")
+    semana = str(sesion.fecha.isocalendar()[1])
+    mes = sesion.fecha - timedelta(days=sesion.fecha.day - 1)
+    api = "/api/{}/"
+    return [
+        Caso("index", reverse("portal_index")),
+        Caso("daily_attendance", reverse("asistencia_diaria", kwargs={"grupo": grupo.pk, "fecha": fecha})),
+        Caso("download_summary_csv", reverse("download_asistencias", kwargs={"grupo": grupo.pk})),
+        Caso("download_weekly_csv", reverse("download_asistencias_semana", kwargs={"grupo": grupo.pk, "semana": semana})),
+        Caso("download_weekly_xlsx", reverse("download_asistencias_semana", kwargs={"grupo": grupo.pk, "semana": semana}) + "?format=xlsx"),
+        Caso("download_daily_csv", reverse("download_asistencias_diaria", kwargs={"grupo": grupo.pk, "fecha": fecha})),
+        Caso("download_daily_xlsx", reverse("download_asistencias_diaria", kwargs={"grupo": grupo.pk, "fecha": fecha}) + "?format=xlsx"),
+        Caso("admin_pagos_monthly_report", reverse("admin:pagos_download_monthly_report") + f"?month={mes.month}&year={mes.year}"),
+        Caso("atletas", reverse("atletas_list")),
+        *(Caso(f"api_{name.replace('-', '_')}_list", api.format(name), api=True)
+          for name in ("users", "grupos", "asistencias", "session-days", "pagos", "horarios")),
+    ]
+
+
+@contextmanager
+def aliases_como_espejo():
+    """
+    Los demás alias (la copia de reportes, la réplica) leen la base "default" mientras
+    dura, como en la suite de pruebas. Con la base de pruebas sembrada, las
+    exportaciones leerían si no la copia real, o la renovarían con los datos sintéticos.
+    """
+    nombres = {alias: connections[alias].settings_dict["NAME"] for alias in connections if alias != DEFAULT_DB_ALIAS}
+    for alias in nombres:
+        connections[alias].close()
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        for alias, nombre in nombres.items():
+            connections[alias].close()
+            connections[alias].settings_dict["NAME"] = nombre
+
+
+def _request(client, caso):
+    # Los límites de peticiones (gestion.throttling) viven en la caché: se vacía en cada pedido
+    cache.clear()
+    response = client.get(caso.url, HTTP_ACCEPT="application/json" if caso.api else "*/*")
+    if response.status_code != 200:
+        raise RuntimeError(f"{caso.nombre}: {caso.url} devolvió {response.status_code}")
+    # Consumir el cuerpo completo (las respuestas en streaming se generan al iterar)
+    return len(b"".join(response) if response.streaming else response.content)
+
+
+def medir(client, caso, repeticiones=5):
+    _request(client, caso)  # calentamiento: plantillas, URL resolver, caché de schema...
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        tamaño = _request(client, caso)
+        tiempos.append(time.perf_counter() - inicio)
+    with CaptureQueriesContext(connection) as ctx:
+        _request(client, caso)
+    # captured_queries lee connection.queries, que el siguiente request vacía
+    consultas = len(ctx.captured_queries)
+    tracemalloc.start()
+    try:
+        _request(client, caso)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "url": caso.url,
+        "wall_ms": {
+            "min": round(min(tiempos) * 1000, 3),
+            "median": round(statistics.median(tiempos) * 1000, 3),
+            "mean": round(statistics.fmean(tiempos) * 1000, 3),
+            "max": round(max(tiempos) * 1000, 3),
+        },
+        "queries": consultas,
+        "peak_kib": round(pico / 1024, 1),
+        "bytes": tamaño,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(usuario, repeticiones=5, solo=None, config=None, counts=None, stdout=None):
+    client = Client()
+    client.force_login(usuario)
+    resultados = {}
+    for caso in casos():
+        if solo and caso.nombre not in solo:
+            continue
+        resultados[caso.nombre] = r = medir(client, caso, repeticiones)
+        if stdout is not None:
+            stdout.write(f"{caso.nombre:32} {r['wall_ms']['median']:9.1f} ms  {r['queries']:5d} consultas  {r['peak_kib']:9.1f} KiB")
+    return {
+        "meta": {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "db": connection.vendor,
+            "repeticiones": repeticiones,
+            "dataset": {
+                "grupos": config.grupos, "atletas_por_grupo": config.atletas_por_grupo,
+                "temporadas": config.temporadas, "semilla": config.semilla, "filas": counts,
+            } if config else None,
+        },
+        "results": resultados,
+    }
+
+
+def compare(anterior, actual, tolerancia=0.2):
+    """
+    Devuelve (líneas, regresiones). Es regresión que la mediana empeore más que
+    `tolerancia` (proporción) o que aumente el número de consultas.
+    """
+    lineas, regresiones = [], []
+    for nombre, r in actual["results"].items():
+        previo = anterior["results"].get(nombre)
+        if previo is None:
+            lineas.append(f"{nombre:32} (nuevo)")
+            continue
+        antes, ahora = previo["wall_ms"]["median"], r["wall_ms"]["median"]
+        delta = (ahora - antes) / antes if antes else 0.0
+        lineas.append(
+            f"{nombre:32} {antes:9.1f} -> {ahora:9.1f} ms ({delta:+.0%})  "
+            f"consultas {previo['queries']} -> {r['queries']}"
+        )
+        if delta > tolerancia:
+            regresiones.append(f"{nombre}: mediana {antes:.1f} -> {ahora:.1f} ms ({delta:+.0%})")
+        if r["queries"] > previo["queries"]:
+            regresiones.append(f"{nombre}: consultas {previo['queries']} -> {r['queries']}")
+    return lineas, regresiones
+
+
+def load(path):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def sembrar_sqlite(path, filas=100_000, alumnos=400):
+    """Archivo SQLite con una tabla de asistencias del tamaño indicado (sin PRAGMA)."""
+    rng = random.Random(1)
+    inicio = date(date.today().year - 2, 1, 1)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE asistencia (id INTEGER PRIMARY KEY, alumno_id INTEGER, fecha TEXT, presente INTEGER, nota TEXT)")
+        conn.execute("CREATE INDEX asistencia_fecha ON asistencia (fecha, alumno_id)")
+        conn.executemany(
+            "INSERT INTO asistencia (alumno_id, fecha, presente) VALUES (?, ?, ?)",
+            ((rng.randrange(alumnos), (inicio + timedelta(days=rng.randrange(730))).isoformat(), rng.random() < 0.8)
+             for _ in range(filas)),
+        )
+    conn.close()
+
+
+def _lector(path, pragmas, hasta, desde, resultado):
+    conn = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(conn, pragmas)
+    n = 0
+    # Lo que hace una exportación: agregar por alumno un rango de fechas
+    while time.monotonic() < hasta:
+        conn.execute(
+            "SELECT alumno_id, SUM(presente), COUNT(*) FROM asistencia WHERE fecha >= ? GROUP BY alumno_id", (desde,)
+        ).fetchall()
+        n += 1
+    conn.close()
+    resultado.append(("lecturas", n, []))
+
+
+class _Sqlite3Atomic:
+    """transaction.atomic mínimo sobre la conexión sqlite3 del hilo (anidado = savepoint)."""
+
+    def __init__(self, local):
+        self.local = local
+
+    def __enter__(self):
+        self.depth = self.local.depth = getattr(self.local, "depth", 0) + 1
+        self.local.conn.execute("BEGIN" if self.depth == 1 else f"SAVEPOINT s{self.depth}")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.local.depth -= 1
+        conn = self.local.conn
+        if self.depth == 1:
+            conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        else:
+            if exc_type:
+                conn.execute(f"ROLLBACK TO s{self.depth}")
+            conn.execute(f"RELEASE s{self.depth}")
+        return False
+
+
+def _escritor(path, pragmas, hasta, semilla, resultado, coalescer=None, local=None):
+    rng = random.Random(semilla)
+    # Django no cambia el timeout por defecto de sqlite3 (5 s)
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    apply_pragmas(conn, pragmas)
+    if local is not None:
+        local.conn = conn
+    n, errores, latencias = 0, 0, []
+    hoy = date.today().isoformat()
+
+    def escribir(alumno_id, asistencia_id):
+        # Con coalescer corre en el hilo líder, sobre su conexión
+        c = local.conn if local is not None else conn
+        c.execute("INSERT INTO asistencia (alumno_id, fecha, presente) VALUES (?, ?, 1)", (alumno_id, hoy))
+        c.execute("UPDATE asistencia SET nota = ? WHERE id = ?", ("ok", asistencia_id))
+
+    # Lo que hace un entrenador: marcar una asistencia y corregir otra, en una transacción
+    while time.monotonic() < hasta:
+        inicio = time.perf_counter()
+        args = (rng.randrange(400), rng.randrange(1, 1000))
+        try:
+            if coalescer is not None:
+                coalescer.submit(escribir, *args)
+            else:
+                conn.execute("BEGIN")
+                escribir(*args)
+                conn.execute("COMMIT")
+            n += 1
+            latencias.append(time.perf_counter() - inicio)
+        except sqlite3.OperationalError:
+            errores += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+    conn.close()
+    resultado.append(("escrituras", n, latencias, errores))
+
+
+def sqlite_concurrency(base, pragmas, lectores=4, escritores=4, segundos=5.0, agrupar_ms=None):
+    """
+    Copia `base` y la somete durante `segundos` a `lectores` hilos agregando y
+    `escritores` hilos escribiendo con los `pragmas` dados. Con `agrupar_ms`, las
+    escrituras pasan por un WriteCoalescer con esa ventana (gestion.writequeue).
+    Devuelve operaciones por segundo, errores "database is locked" y latencia de escritura.
+    """
+    coalescer = local = None
+    if agrupar_ms is not None:
+        local = threading.local()
+        coalescer = WriteCoalescer(agrupar_ms, max_batch=escritores, atomic=lambda: _Sqlite3Atomic(local))
+    path = f"{base}.{threading.get_ident()}.{time.monotonic_ns()}"
+    shutil.copyfile(base, path)
+    desde = date(date.today().year - 1, 1, 1).isoformat()
+    resultado = []
+    hasta = time.monotonic() + segundos
+    hilos = [threading.Thread(target=_lector, args=(path, pragmas, hasta, desde, resultado)) for _ in range(lectores)]
+    hilos += [
+        threading.Thread(target=_escritor, args=(path, pragmas, hasta, i, resultado, coalescer, local))
+        for i in range(escritores)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    for sufijo in ("", "-wal", "-shm", "-journal"):
+        Path(path + sufijo).unlink(missing_ok=True)
+
+    lecturas = sum(r[1] for r in resultado if r[0] == "lecturas")
+    escrituras = [r for r in resultado if r[0] == "escrituras"]
+    latencias = sorted(l for r in escrituras for l in r[2])
+    p95 = latencias[int(len(latencias) * 0.95)] if latencias else 0.0
+    return {
+        "lecturas_s": round(lecturas / segundos, 1),
+        "escrituras_s": round(sum(r[1] for r in escrituras) / segundos, 1),
+        "errores_locked": sum(r[3] for r in escrituras),
+        "escritura_p95_ms": round(p95 * 1000, 2),
+    }
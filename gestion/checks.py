@@ -0,0 +1,33 @@
+"""
+Comprobaciones de configuración (`manage.py check --deploy`).
+
+El throttling, el read-your-writes de la réplica y el interruptor de Server-Timing
+guardan su estado en la caché `default`. Con una caché por proceso (LocMemCache) cada worker ve solo lo suyo.
+"""
+from django.conf import settings
+from django.core import checks
+
+# Backends cuyo contenido no ven los demás procesos
+PER_PROCESS_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def cache_is_shared(alias="default"):
+    """True si la caché `alias` la comparten todos los workers."""
+    return settings.CACHES[alias]["BACKEND"] not in PER_PROCESS_BACKENDS
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [
+        checks.Warning(
+            "La caché default es de cada proceso: con varios workers los límites de throttling se "
+            "multiplican y los clientes de la API sin cookies no leen de la réplica.",
+            hint="Define CACHE_TABLE y ejecuta `python manage.py createcachetable`.",
+            id="gestion.W001",
+        )
+    ]
@@ -0,0 +1,185 @@
+"""
+Importación masiva de atletas desde CSV/XLSX.
+
+Los nombres de usuario de todo el lote se reservan con una sola consulta sobre los
+prefijos existentes, las claves se hashean (en un pool de procesos si
+IMPORT_HASH_WORKERS > 1) y los usuarios se insertan con bulk_create.
+"""
+import csv
+import io
+import logging
+import os
+import re
+import secrets
+import string
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Grupo, Usuario
+from .search import index_users
+
+logger = logging.getLogger(__name__)
+
+HEADER_ALIASES = {
+    "first_name": {"nombre", "nombres", "first_name"},
+    "last_name": {"apellido", "apellidos", "last_name"},
+    "grupo": {"grupo", "group"},
+}
+# Por debajo de este tamaño no compensa arrancar procesos
+POOL_THRESHOLD = 16
+
+
+class AthleteImportError(Exception):
+    pass
+
+
+def random_string(n=8):
+    chars = string.ascii_lowercase + string.digits
+    return "".join(secrets.choice(chars) for _ in range(n))
+
+
+def username_base(first_name, last_name):
+    base = unicodedata.normalize("NFKD", (first_name[:1] + last_name).lower())
+    return re.sub(r"[^a-z0-9]", "", base.encode("ascii", "ignore").decode("ascii"))
+
+
+def allocate_usernames(bases):
+    """
+    Devuelve un nombre de usuario libre por cada base (en el mismo orden), usando una
+    única consulta sobre los usuarios que empiezan por alguna de las bases.
+    """
+    bases = [b or random_string(6) for b in bases]
+    prefixes = set(bases)
+    if not prefixes:
+        return []
+    taken = set(
+        Usuario.objects.filter(reduce(or_, (Q(username__startswith=p) for p in prefixes)))
+        .values_list("username", flat=True)
+    )
+    usernames = []
+    for base in bases:
+        username = base
+        suffix = 1
+        while username in taken:
+            suffix += 1
+            username = f"{base}{suffix}"
+        taken.add(username)
+        usernames.append(username)
+    return usernames
+
+
+def _init_worker():
+    import django
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    django.setup()
+
+
+def hash_passwords(passwords):
+    """
+    Hashea las claves. Con IMPORT_HASH_WORKERS > 1, en un pool de procesos (PBKDF2 es
+    CPU puro y libera poco el GIL); si el entorno no deja crearlo (sin fork ni
+    /dev/shm, como en un despliegue serverless) se hashean aquí mismo.
+    """
+    workers = getattr(settings, "IMPORT_HASH_WORKERS", 1)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(passwords) < POOL_THRESHOLD:
+        return [make_password(p) for p in passwords]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+    except (OSError, NotImplementedError, BrokenProcessPool):
+        logger.warning("No se pudo usar el pool de procesos para hashear las claves; se hashean en el proceso", exc_info=True)
+        return [make_password(p) for p in passwords]
+
+
+def _normalize_header(header):
+    normalized = {}
+    for idx, name in enumerate(header):
+        key = (str(name or "")).strip().lower()
+        for field, aliases in HEADER_ALIASES.items():
+            if key in aliases:
+                normalized[field] = idx
+    missing = set(HEADER_ALIASES) - set(normalized)
+    if missing:
+        raise AthleteImportError(f"Faltan columnas: {', '.join(sorted(missing))}. Se esperan nombre, apellido y grupo.")
+    return normalized
+
+
+def read_rows(uploaded_file):
+    """Lee un CSV o XLSX con columnas nombre, apellido y grupo (nombre o id)."""
+    name = (getattr(uploaded_file, "name", "") or "").lower()
+    if name.endswith(".xlsx"):
+        from openpyxl import load_workbook
+        wb = load_workbook(uploaded_file, read_only=True, data_only=True)
+        rows = list(wb.active.iter_rows(values_only=True))
+    else:
+        text = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig")
+        rows = list(csv.reader(text))
+    if not rows:
+        raise AthleteImportError("El archivo está vacío.")
+    columns = _normalize_header(rows[0])
+    result = []
+    for row in rows[1:]:
+        values = {field: str(row[idx] if idx < len(row) and row[idx] is not None else "").strip() for field, idx in columns.items()}
+        if any(values.values()):
+            result.append(values)
+    return result
+
+
+def import_athletes(rows):
+    """
+    Crea los atletas de `rows` y devuelve [(usuario, clave), ...].
+    Falla sin crear nada si alguna fila está incompleta o su grupo no existe.
+    """
+    grupos = {}
+    for g in Grupo.objects.all():
+        grupos[str(g.pk)] = g
+        grupos[g.nombre.strip().lower()] = g
+
+    errors = []
+    for i, row in enumerate(rows, start=2):
+        if not row["first_name"] or not row["last_name"] or not row["grupo"]:
+            errors.append(f"Fila {i}: nombre, apellido y grupo son obligatorios.")
+        elif row["grupo"].lower() not in grupos:
+            errors.append(f"Fila {i}: grupo '{row['grupo']}' no encontrado.")
+    if errors:
+        raise AthleteImportError(" ".join(errors[:10]))
+
+    usernames = allocate_usernames([username_base(r["first_name"], r["last_name"]) for r in rows])
+    passwords = [random_string(10) for _ in rows]
+    hashes = hash_passwords(passwords)
+    usuarios = [
+        Usuario(
+            username=username,
+            password=password_hash,
+            first_name=row["first_name"],
+            last_name=row["last_name"],
+            rol="ALUMNO",
+            grupo=grupos[row["grupo"].lower()],
+            is_active=True,
+        )
+        for row, username, password_hash in zip(rows, usernames, hashes)
+    ]
+    with transaction.atomic():
+        Usuario.objects.bulk_create(usuarios, batch_size=500)
+        # bulk_create no dispara post_save: se indexan aquí
+        index_users(usuarios)
+    return list(zip(usuarios, passwords))
+
+
+def credentials_csv(created):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["Nombre", "Apellido", "Grupo", "Usuario", "Clave"])
+    for usuario, password in created:
+        writer.writerow([usuario.first_name, usuario.last_name, usuario.grupo.nombre, usuario.username, password])
+    return buf.getvalue()
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from gestion.archive import ArchiveError, archivar_temporada, restaurar_temporada
+
+
+class Command(BaseCommand):
+    help = "Mueve las asistencias y pagos de una temporada cerrada a un archivo JSONL comprimido (o la restaura)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("temporada", type=int, help="Año de la temporada, p. ej. 2024")
+        parser.add_argument("--restaurar", action="store_true", help="Restaurar la temporada desde su archivo")
+
+    def handle(self, *args, **options):
+        temporada = options["temporada"]
+        try:
+            if options["restaurar"]:
+                counts = restaurar_temporada(temporada)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Temporada {temporada} restaurada: {counts['gestion.asistencia']} asistencias, {counts['gestion.pago']} pagos"
+                ))
+            else:
+                archivo = archivar_temporada(temporada)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Temporada {temporada} archivada en {archivo.archivo} (sha256 {archivo.sha256}): "
+                    f"{archivo.asistencias} asistencias, {archivo.pagos} pagos"
+                ))
+        except ArchiveError as e:
+            raise CommandError(str(e))
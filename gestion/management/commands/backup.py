@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from gestion.backup import BackupError, backup_dir, crear_respaldo
+
+
+class Command(BaseCommand):
+    help = "Respalda todos los modelos de gestion en JSONL comprimido (un archivo por modelo) con manifiesto y checksums"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Directorio del respaldo (por defecto BACKUP_DIR/<fecha>)")
+
+    def handle(self, *args, **options):
+        directorio = options["output"] or backup_dir() / datetime.now().strftime("%Y%m%d-%H%M%S")
+        try:
+            manifest = crear_respaldo(directorio, stdout=self.stdout)
+        except BackupError as e:
+            raise CommandError(str(e))
+        total = sum(m["filas"] for m in manifest["modelos"])
+        self.stdout.write(self.style.SUCCESS(f"Respaldo en {directorio}: {len(manifest['modelos'])} modelos, {total} filas"))
@@ -0,0 +1,59 @@
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from gestion import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide tiempo, consultas y memoria de las vistas, exportaciones y endpoints principales "
+        "sobre una base de pruebas sembrada, y guarda el resultado en JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=5)
+        parser.add_argument("--solo", action="append", help="Nombre de un caso (se puede repetir)")
+        parser.add_argument("--grupos", type=int, default=6)
+        parser.add_argument("--atletas", type=int, default=30, help="Atletas por grupo")
+        parser.add_argument("--temporadas", type=int, default=2)
+        parser.add_argument("--semilla", type=int, default=1)
+        parser.add_argument("--output", help="Archivo JSON de salida (por defecto benchmarks/<fecha>.json)")
+        parser.add_argument("--compare", help="Resultado anterior contra el que comparar")
+        parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento admitido de la mediana (0.2 = 20%%)")
+
+    def handle(self, *args, **options):
+        anterior = benchmarks.load(options["compare"]) if options["compare"] else None
+        config = benchmarks.dataset_config(options["grupos"], options["atletas"], options["temporadas"], options["semilla"])
+
+        # Base de datos de pruebas aparte: nunca se siembra la base real
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with benchmarks.aliases_como_espejo():
+                inicio = time.perf_counter()
+                usuario, counts = benchmarks.preparar_datos(config)
+                self.stdout.write(f"Datos sembrados en {time.perf_counter() - inicio:.1f}s: {counts}")
+                resultado = benchmarks.run_benchmarks(
+                    usuario, options["repeticiones"], options["solo"], config, counts, stdout=self.stdout
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = Path(options["output"] or Path(settings.BASE_DIR) / "benchmarks" / f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        self.stdout.write(self.style.SUCCESS(f"Resultados en {output}"))
+
+        if anterior:
+            lineas, regresiones = benchmarks.compare(anterior, resultado, options["tolerancia"])
+            for linea in lineas:
+                self.stdout.write(linea)
+            if regresiones:
+                raise CommandError("Regresiones:\n  " + "\n  ".join(regresiones))
@@ -0,0 +1,47 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gestion import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara lecturas y escrituras concurrentes sobre un archivo SQLite temporal con los "
+        "valores por defecto y con SQLITE_PRAGMAS, con y sin agrupar escrituras (no toca la base real)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--segundos", type=float, default=5.0)
+        parser.add_argument("--lectores", type=int, default=4)
+        parser.add_argument("--escritores", type=int, default=4)
+        parser.add_argument("--filas", type=int, default=100_000)
+        parser.add_argument("--output", help="Guardar el resultado en JSON")
+
+    def handle(self, *args, **options):
+        pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+        ventana = getattr(settings, "ATTENDANCE_COALESCE_WINDOW_MS", 5)
+        # nombre: (pragmas, ventana del coalescer de escrituras o None)
+        perfiles = {
+            "por_defecto": ({}, None),
+            "por_defecto_agrupado": ({}, ventana),
+            "produccion": (pragmas, None),
+            "produccion_agrupado": (pragmas, ventana),
+        }
+        resultados = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            base = str(Path(tmp) / "base.sqlite3")
+            benchmarks.sembrar_sqlite(base, options["filas"])
+            for nombre, (pragmas, agrupar_ms) in perfiles.items():
+                resultados[nombre] = r = benchmarks.sqlite_concurrency(
+                    base, pragmas, options["lectores"], options["escritores"], options["segundos"], agrupar_ms
+                )
+                self.stdout.write(
+                    f"{nombre:22} {r['lecturas_s']:9.1f} lecturas/s  {r['escrituras_s']:9.1f} escrituras/s  "
+                    f"p95 escritura {r['escritura_p95_ms']:8.2f} ms  {r['errores_locked']} errores locked"
+                )
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps({"perfiles": perfiles, "results": resultados}, indent=2), encoding="utf-8")
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.synthetic import ConfigClub, borrar_club, generar_club
+
+
+class Command(BaseCommand):
+    help = "Genera un club sintético (grupos, atletas, sesiones, asistencias y pagos) para pruebas de carga"
+
+    def add_arguments(self, parser):
+        defaults = ConfigClub()
+        parser.add_argument("--grupos", type=int, default=defaults.grupos)
+        parser.add_argument("--atletas", type=int, default=defaults.atletas_por_grupo, help="Atletas por grupo")
+        parser.add_argument("--temporadas", type=int, default=defaults.temporadas, help="Años hasta el actual (incluido)")
+        parser.add_argument("--dias", default=",".join(map(str, defaults.dias_semana)), help="Días ISO de entrenamiento, p. ej. 1,3,5")
+        parser.add_argument("--prob-asistencia", type=float, default=defaults.prob_asistencia)
+        parser.add_argument("--prob-pago", type=float, default=defaults.prob_pago_mensual, help="Probabilidad de pago de cada mes")
+        parser.add_argument("--semilla", type=int, default=defaults.semilla)
+        parser.add_argument("--prefijo", default=defaults.prefijo, help="Prefijo de usuarios y grupos generados")
+        parser.add_argument("--limpiar", action="store_true", help="Borra antes lo generado con el mismo prefijo")
+
+    def handle(self, *args, **options):
+        try:
+            dias = tuple(sorted({int(d) for d in options["dias"].split(",") if d.strip()}))
+        except ValueError:
+            raise CommandError("--dias debe ser una lista de números del 1 al 7 separados por coma.")
+        if not dias or any(d < 1 or d > 7 for d in dias):
+            raise CommandError("--dias debe ser una lista de números del 1 al 7 separados por coma.")
+        for name in ("prob_asistencia", "prob_pago"):
+            if not 0 <= options[name] <= 1:
+                raise CommandError(f"--{name.replace('_', '-')} debe estar entre 0 y 1.")
+
+        prefijo = options["prefijo"]
+        if options["limpiar"]:
+            borrados = borrar_club(prefijo)
+            self.stdout.write(f"Eliminados {borrados} atletas con prefijo '{prefijo}'")
+
+        config = ConfigClub(
+            grupos=options["grupos"],
+            atletas_por_grupo=options["atletas"],
+            temporadas=options["temporadas"],
+            dias_semana=dias,
+            prob_asistencia=options["prob_asistencia"],
+            prob_pago_mensual=options["prob_pago"],
+            semilla=options["semilla"],
+            prefijo=prefijo,
+        )
+        inicio = time.perf_counter()
+        try:
+            counts = generar_club(config, stdout=self.stdout)
+        except Exception as e:
+            raise CommandError(f"No se pudo generar el club ({e}). ¿Ya existen datos con el prefijo '{prefijo}'? Use --limpiar.")
+        elapsed = time.perf_counter() - inicio
+        resumen = ", ".join(f"{n} {modelo}" for modelo, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Club generado en {elapsed:.1f}s: {resumen}"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from gestion.models import HorarioEntrenamiento
+
+
+class Command(BaseCommand):
+    help = "Crea y activa en bloque los SessionDay de los horarios de entrenamiento"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horario", type=int, action="append", help="ID del horario (se puede repetir)")
+        parser.add_argument("--grupo", type=int, help="Solo los horarios de este grupo")
+
+    def handle(self, *args, **options):
+        horarios = HorarioEntrenamiento.objects.select_related("grupo").prefetch_related("excepciones")
+        if options["horario"]:
+            horarios = horarios.filter(pk__in=options["horario"])
+        if options["grupo"]:
+            horarios = horarios.filter(grupo_id=options["grupo"])
+        if not horarios.exists():
+            raise CommandError("No hay horarios que coincidan.")
+
+        for horario in horarios:
+            creadas, activadas = horario.materializar()
+            self.stdout.write(f"{horario}: {creadas} creadas, {activadas} activadas")
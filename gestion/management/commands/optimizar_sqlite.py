@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from gestion import sqlite
+
+
+class Command(BaseCommand):
+    help = "Ejecuta PRAGMA optimize y un checkpoint TRUNCATE del WAL (para cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        resultado = sqlite.optimize(options["database"], checkpoint="TRUNCATE")
+        if resultado is None:
+            self.stdout.write("La base no es SQLite o es de solo lectura: nada que hacer")
+            return
+        busy, wal, copiadas = resultado
+        self.stdout.write(self.style.SUCCESS(f"PRAGMA optimize listo. Checkpoint: {copiadas}/{wal} páginas (busy={busy})"))
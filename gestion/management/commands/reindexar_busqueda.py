@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from gestion.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de usuarios (FTS5, solo SQLite)."
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            self.stdout.write("El motor de base de datos no usa el índice FTS; nada que hacer.")
+            return
+        total = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Índice reconstruido con {total} usuarios."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from gestion.backup import BackupError, restaurar_respaldo, verificar_respaldo
+
+
+class Command(BaseCommand):
+    help = "Restaura un respaldo hecho con manage.py backup"
+
+    def add_arguments(self, parser):
+        parser.add_argument("directorio", help="Directorio del respaldo (el que contiene manifest.json)")
+        parser.add_argument("--reemplazar", action="store_true", help="Borrar los datos actuales de gestion y los grupos antes de restaurar")
+        parser.add_argument("--verificar", action="store_true", help="Solo comprobar los checksums, sin restaurar")
+
+    def handle(self, *args, **options):
+        try:
+            if options["verificar"]:
+                manifest = verificar_respaldo(options["directorio"])
+                self.stdout.write(self.style.SUCCESS(f"Respaldo íntegro: {len(manifest['modelos'])} archivos"))
+                return
+            counts = restaurar_respaldo(options["directorio"], reemplazar=options["reemplazar"], stdout=self.stdout)
+        except BackupError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Respaldo restaurado: {len(counts)} modelos, {sum(counts.values())} filas"))
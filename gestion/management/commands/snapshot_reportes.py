@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.replicas import refresh_standin, replica_alias, standin_path
+from gestion.reporting import SnapshotError, snapshot_path, take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Copia la base viva a la base de reportes con la API de backup de SQLite (para cron o a demanda)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--replica", action="store_true", help="Renovar la copia local que hace de réplica de lectura")
+
+    def handle(self, *args, **options):
+        try:
+            if options["replica"]:
+                taken = refresh_standin()
+                destino = standin_path(replica_alias())
+            else:
+                taken = take_snapshot()
+                destino = snapshot_path()
+        except SnapshotError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Copia en {destino} ({datetime.fromtimestamp(taken):%d/%m/%Y %H:%M:%S})"
+        ))
@@ -0,0 +1,236 @@
+"""
+Métricas de requests en formato de texto de Prometheus.
+
+`MetricsMiddleware` cuenta los requests y mide latencia, consultas SQL y, en las
+exportaciones (respuestas con Content-Disposition: attachment), tamaño y duración,
+etiquetados por vista, método y código de estado. Todo vive en un registro en
+memoria por proceso.
+
+Con varios workers, cada proceso vuelca su registro a METRICS_DIR/<pid>.json como
+mucho cada METRICS_FLUSH_INTERVAL segundos y la vista `metrics` suma los archivos
+de todos. Sin METRICS_DIR solo se ven las métricas del proceso que responde.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from .querycount import wrap_streaming
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+# nombre: (tipo, ayuda, buckets)
+METRICS = {
+    "gestion_requests_total": ("counter", "Requests atendidos.", None),
+    "gestion_request_duration_seconds": ("histogram", "Latencia de los requests (hasta devolver la respuesta).", LATENCY_BUCKETS),
+    "gestion_request_queries": ("histogram", "Consultas SQL por request.", QUERY_BUCKETS),
+    "gestion_export_bytes": ("histogram", "Tamaño de las exportaciones.", SIZE_BUCKETS),
+    "gestion_export_duration_seconds": ("histogram", "Duración de las exportaciones, incluido generar el cuerpo.", LATENCY_BUCKETS),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            # key -> [counts por bucket (+Inf al final), suma, total]
+            self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = _key(name, labels)
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            for i, limite in enumerate(buckets):
+                if value <= limite:
+                    h[0][i] += 1
+                    break
+            else:
+                h[0][-1] += 1
+            h[1] += value
+            h[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, dict(labels), v] for (name, labels), v in self.counters.items()],
+                "histograms": [[name, dict(labels), list(h[0]), h[1], h[2]] for (name, labels), h in self.histograms.items()],
+            }
+
+
+REGISTRY = Registry()
+_last_flush = {"at": 0.0}
+
+
+def merge(snapshots):
+    counters, histograms = {}, {}
+    for snap in snapshots:
+        for name, labels, value in snap.get("counters", []):
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, total, n in snap.get("histograms", []):
+            key = _key(name, labels)
+            h = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+            h[0] = [a + b for a, b in zip(h[0], counts)]
+            h[1] += total
+            h[2] += n
+    return counters, histograms
+
+
+def _labels_text(labels, extra=()):
+    pares = [*labels, *extra]
+    if not pares:
+        return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pares) + "}"
+
+
+def render(counters, histograms):
+    lineas = []
+    for name, (tipo, ayuda, buckets) in METRICS.items():
+        lineas += [f"# HELP {name} {ayuda}", f"# TYPE {name} {tipo}"]
+        if tipo == "counter":
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lineas.append(f"{name}{_labels_text(labels)} {value}")
+            continue
+        for (n, labels), (counts, total, count) in sorted(histograms.items()):
+            if n != name:
+                continue
+            acumulado = 0
+            for limite, c in zip((*buckets, "+Inf"), counts):
+                acumulado += c
+                lineas.append(f"{name}_bucket{_labels_text(labels, [('le', limite)])} {acumulado}")
+            lineas.append(f"{name}_sum{_labels_text(labels)} {total:.6f}")
+            lineas.append(f"{name}_count{_labels_text(labels)} {count}")
+    return "\n".join(lineas) + "\n"
+
+
+def metrics_dir():
+    path = getattr(settings, "METRICS_DIR", None)
+    return Path(path) if path else None
+
+
+def flush(force=False):
+    """Vuelca el registro de este proceso a METRICS_DIR (si está configurado)."""
+    destino = metrics_dir()
+    if destino is None:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush["at"] < getattr(settings, "METRICS_FLUSH_INTERVAL", 5):
+        return
+    _last_flush["at"] = now
+    destino.mkdir(parents=True, exist_ok=True)
+    path = destino / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(REGISTRY.snapshot()), encoding="utf-8")
+    # rename es atómico: quien lee nunca ve un archivo a medio escribir
+    os.replace(tmp, path)
+
+
+def collect():
+    """Texto de Prometheus con las métricas de todos los workers."""
+    destino = metrics_dir()
+    if destino is None:
+        return render(*merge([REGISTRY.snapshot()]))
+    flush(force=True)
+    snapshots = []
+    for path in destino.glob("*.json"):
+        try:
+            snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return render(*merge(snapshots))
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        counter = _QueryCounter()
+        wrappers = [connections[alias].execute_wrapper(counter) for alias in connections]
+        for w in wrappers:
+            w.__enter__()
+        try:
+            response = self.get_response(request)
+        finally:
+            for w in reversed(wrappers):
+                w.__exit__(None, None, None)
+        duracion = time.perf_counter() - inicio
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+        labels = {"view": view, "method": request.method}
+        REGISTRY.inc("gestion_requests_total", {**labels, "status": str(response.status_code)})
+        REGISTRY.observe("gestion_request_duration_seconds", labels, duracion)
+        if getattr(response, "streaming", False):
+            # Las consultas del cuerpo (exportaciones) corren al enviarlo
+            wrap_streaming(
+                response, counter, lambda: REGISTRY.observe("gestion_request_queries", {"view": view}, counter.count)
+            )
+        else:
+            REGISTRY.observe("gestion_request_queries", {"view": view}, counter.count)
+
+        if "attachment" in response.get("Content-Disposition", ""):
+            export = {"view": view, "content_type": response.get("Content-Type", "").split(";")[0]}
+            if getattr(response, "streaming", False):
+                # Un iterador async (vistas async bajo ASGI) debe seguir siéndolo
+                medir = self._ameasure_stream if response.is_async else self._measure_stream
+                response.streaming_content = medir(response.streaming_content, export, inicio)
+            else:
+                REGISTRY.observe("gestion_export_bytes", export, len(response.content))
+                REGISTRY.observe("gestion_export_duration_seconds", export, duracion)
+        flush()
+        return response
+
+    def _measure_stream(self, content, labels, inicio):
+        size = 0
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            REGISTRY.observe("gestion_export_bytes", labels, size)
+            REGISTRY.observe("gestion_export_duration_seconds", labels, time.perf_counter() - inicio)
+
+    async def _ameasure_stream(self, content, labels, inicio):
+        size = 0
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            REGISTRY.observe("gestion_export_bytes", labels, size)
+            REGISTRY.observe("gestion_export_duration_seconds", labels, time.perf_counter() - inicio)
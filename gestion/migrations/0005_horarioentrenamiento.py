@@ -0,0 +1,44 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0004_make_banco_emisor_nullable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HorarioEntrenamiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dias_semana', models.CharField(help_text='Días ISO separados por coma (1=lunes ... 7=domingo), p. ej. 1,3,5', max_length=13, verbose_name='Días de la semana')),
+                ('fecha_inicio', models.DateField(verbose_name='Fecha de inicio')),
+                ('fecha_fin', models.DateField(verbose_name='Fecha de fin')),
+                ('grupo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='horarios', to='gestion.grupo')),
+            ],
+            options={
+                'verbose_name': 'Horario de entrenamiento',
+                'verbose_name_plural': 'Horarios de entrenamiento',
+                'ordering': ['grupo', 'fecha_inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExcepcionHorario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('motivo', models.CharField(blank=True, max_length=100, verbose_name='Motivo')),
+                ('horario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='excepciones', to='gestion.horarioentrenamiento')),
+            ],
+            options={
+                'verbose_name': 'Excepción de horario',
+                'verbose_name_plural': 'Excepciones de horario',
+                'ordering': ['fecha'],
+                'unique_together': {('horario', 'fecha')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:48
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0005_horarioentrenamiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroAuditoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('accion', models.CharField(choices=[('CREAR', 'Creación'), ('MODIFICAR', 'Modificación'), ('ELIMINAR', 'Eliminación')], max_length=10, verbose_name='Acción')),
+                ('modelo', models.CharField(max_length=50, verbose_name='Modelo')),
+                ('objeto_id', models.BigIntegerField(verbose_name='ID del objeto')),
+                ('cambios', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Cambios')),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Registro de auditoría',
+                'verbose_name_plural': 'Registros de auditoría',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['modelo', 'objeto_id'], name='auditoria_objeto_idx'), models.Index(fields=['actor', 'fecha'], name='auditoria_actor_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0006_registroauditoria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoTemporada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('temporada', models.PositiveSmallIntegerField(unique=True, verbose_name='Temporada')),
+                ('archivo', models.CharField(max_length=255, verbose_name='Archivo')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('asistencias', models.PositiveIntegerField(default=0, verbose_name='Asistencias archivadas')),
+                ('pagos', models.PositiveIntegerField(default=0, verbose_name='Pagos archivados')),
+                ('creado_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Archivado el')),
+                ('restaurado_en', models.DateTimeField(blank=True, null=True, verbose_name='Restaurado el')),
+            ],
+            options={
+                'verbose_name': 'Archivo de temporada',
+                'verbose_name_plural': 'Archivos de temporada',
+                'ordering': ['-temporada'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenTemporada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('temporada', models.PositiveSmallIntegerField(verbose_name='Temporada')),
+                ('total_sesiones', models.PositiveIntegerField(default=0, verbose_name='Total de sesiones')),
+                ('asistencias', models.PositiveIntegerField(default=0, verbose_name='Asistencias')),
+                ('fecha_primera', models.DateField(blank=True, null=True, verbose_name='Primera sesión')),
+                ('fecha_ultima', models.DateField(blank=True, null=True, verbose_name='Última sesión')),
+                ('pagos', models.PositiveIntegerField(default=0, verbose_name='Pagos')),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_temporada', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen de temporada',
+                'verbose_name_plural': 'Resúmenes de temporada',
+                'ordering': ['temporada', 'alumno'],
+                'unique_together': {('alumno', 'temporada')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+from gestion.search import FTS_TABLE, create_index
+
+
+def crear_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    create_index(schema_editor)
+    Usuario = apps.get_model("gestion", "Usuario")
+    rows = [
+        (pk, f"{first_name} {last_name} {username}")
+        for pk, first_name, last_name, username in Usuario.objects.values_list("pk", "first_name", "last_name", "username")
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, nombre) VALUES (%s, %s)", rows)
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0007_archivo_temporada'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0008_usuario_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['rol', 'first_name', 'last_name', 'id'], name='usuario_rol_nombre_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0009_usuario_rol_nombre_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asistencia',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Actualizado en'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Actualizado en'),
+            preserve_default=False,
+        ),
+    ]
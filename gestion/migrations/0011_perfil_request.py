@@ -0,0 +1,37 @@
+# Generated by Django 4.2.24 on 2026-10-19 18:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0010_actualizado_en'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('metodo', models.CharField(max_length=10, verbose_name='Método')),
+                ('url', models.CharField(max_length=500, verbose_name='URL')),
+                ('vista', models.CharField(blank=True, max_length=200, verbose_name='Vista')),
+                ('estado', models.PositiveSmallIntegerField(verbose_name='Código de estado')),
+                ('duracion_ms', models.FloatField(verbose_name='Duración (ms)')),
+                ('consultas', models.PositiveIntegerField(default=0, verbose_name='Consultas SQL')),
+                ('archivo', models.CharField(max_length=255, verbose_name='Archivo')),
+                ('resumen', models.TextField(blank=True, verbose_name='Funciones más costosas')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Perfil de request',
+                'verbose_name_plural': 'Perfiles de request',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Extensión unaccent para la búsqueda de usuarios en Postgres (no hace nada en SQLite)."""
+
+    dependencies = [
+        ('gestion', '0011_perfil_request'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+    ]
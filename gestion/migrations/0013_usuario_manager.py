@@ -0,0 +1,20 @@
+# Generated by Django 4.2.24 on 2026-10-19 19:05
+
+from django.db import migrations
+import gestion.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0012_postgres_unaccent'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='usuario',
+            managers=[
+                ('objects', gestion.models.UsuarioManager()),
+            ],
+        ),
+    ]
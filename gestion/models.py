@@ -1,10 +1,15 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.conf import settings
 from django.contrib.auth.models import Group, Permission
 
 import uuid
 
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .tracking import FieldTrackerMixin
+
 
 
 class Grupo(models.Model):
@@ -23,11 +28,35 @@ class Grupo(models.Model):
         return self.nombre
 
 
-class Usuario(AbstractUser):
+class UsuarioQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        from gestion.api.authentication import AUTH_RELEVANT_FIELDS, invalidate_user_cache
+        # update() no pasa por Usuario.save: el usuario cacheado se invalida aquí
+        if not any(f in kwargs for f in AUTH_RELEVANT_FIELDS):
+            return super().update(**kwargs)
+        ids = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        for pk in ids:
+            invalidate_user_cache(pk)
+        return rows
+
+
+class UsuarioManager(UserManager.from_queryset(UsuarioQuerySet)):
+    pass
+
+
+class Usuario(AbstractUser, FieldTrackerMixin):
     """
     Modelo de usuario extendido.
     """
 
+    # is_active maneja inactivo_desde; rol, password y los flags de staff invalidan el usuario
+    # cacheado por CachedJWTAuthentication; todos quedan en el registro de auditoría.
+    tracked_fields = (
+        "username", "first_name", "last_name", "email", "is_active", "is_staff", "is_superuser",
+        "rol", "grupo", "exento_pago", "inactivo_desde", "password",
+    )
+
     # Override inherited fields to avoid reverse accessor clashes
     groups = models.ManyToManyField(
         Group,
@@ -62,27 +91,60 @@ class Usuario(AbstractUser):
     )
     exento_pago = models.BooleanField("Exento de pago", default=False)
     inactivo_desde = models.DateField("Inactivo Desde", null=True, blank=True)
+    # Versión de las filas cacheadas (_atleta_row.html, _student_row.html)
+    actualizado_en = models.DateTimeField("Actualizado en", auto_now=True)
+
+    objects = UsuarioManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Listado de atletas paginado por keyset (ver gestion.pagination)
+            models.Index(fields=["rol", "first_name", "last_name", "id"], name="usuario_rol_nombre_idx"),
+        ]
 
     def save(self, *args, **kwargs):
-        from django.utils import timezone
-        if self.pk:
-            old = Usuario.objects.filter(pk=self.pk).first()
-            if old:
-                if old.is_active and not self.is_active and not self.inactivo_desde:
+        from gestion.api.authentication import AUTH_RELEVANT_FIELDS, invalidate_user_cache
+        # Usuarios nuevos también invalidan: un id reutilizado no debe servir un usuario cacheado viejo
+        auth_changed = self._state.adding
+        if not self._state.adding:
+            # Cambios respecto a los valores cargados, sin volver a consultar la fila
+            changed = self.get_changed_fields()
+            if "is_active" in changed:
+                if not self.is_active and not self.inactivo_desde:
                     self.inactivo_desde = timezone.now().date()
-                elif not old.is_active and self.is_active:
+                elif self.is_active:
                     self.inactivo_desde = None
+                update_fields = kwargs.get("update_fields")
+                if update_fields is not None and "inactivo_desde" not in update_fields:
+                    kwargs["update_fields"] = [*update_fields, "inactivo_desde"]
+            auth_changed = any(f in changed for f in AUTH_RELEVANT_FIELDS)
+            # auto_now only applies to fields being written
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "actualizado_en" not in update_fields:
+                kwargs["update_fields"] = [*update_fields, "actualizado_en"]
         super().save(*args, **kwargs)
+        if auth_changed:
+            invalidate_user_cache(self.pk)
+
+    def delete(self, *args, **kwargs):
+        from gestion.api.authentication import invalidate_user_cache
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        invalidate_user_cache(pk)
+        return result
 
     def nombre_completo(self):
         return f"{self.first_name} {self.last_name}"
 
 
-class Asistencia(models.Model):
+class Asistencia(FieldTrackerMixin, models.Model):
     """
     Registro de asistencia vinculado al Usuario (alumno).
     """
 
+    # actualizado_en cambia en cada save y no se audita
+    tracked_fields = ("alumno", "fecha", "presente", "nota")
+
     alumno = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="asistencias"
     )
@@ -90,6 +152,7 @@ class Asistencia(models.Model):
     presente = models.BooleanField("Asistió", default=False)
     
     nota = models.CharField("Comentario / Nota", max_length=200, blank=True)
+    actualizado_en = models.DateTimeField("Actualizado en", auto_now=True)
 
     class Meta:
         verbose_name = "Registro de Asistencia"
@@ -102,7 +165,7 @@ class Asistencia(models.Model):
         return f"{self.fecha:%d/%m/%Y} – {self.alumno}: {estado}"
 
 
-class SessionDay(models.Model):
+class SessionDay(FieldTrackerMixin, models.Model):
     """
     Representa si una sesión de entrenamiento de un grupo en una fecha está activada.
     Solo las sesiones activadas se considerarán en los reportes.
@@ -121,7 +184,106 @@ class SessionDay(models.Model):
         return f"{self.grupo} - {self.fecha:%d/%m/%Y} - {'Activa' if self.active else 'Inactiva'}"
 
 
-class Pago(models.Model):
+class HorarioEntrenamiento(models.Model):
+    """
+    Horario recurrente de un grupo: días de la semana dentro de un rango de fechas.
+    Sirve para crear y activar de una vez todos los SessionDay de una temporada.
+    """
+
+    DIAS_SEMANA = {1: "Lun", 2: "Mar", 3: "Mié", 4: "Jue", 5: "Vie", 6: "Sáb", 7: "Dom"}
+
+    grupo = models.ForeignKey(Grupo, on_delete=models.CASCADE, related_name="horarios")
+    dias_semana = models.CharField(
+        "Días de la semana",
+        max_length=13,
+        help_text="Días ISO separados por coma (1=lunes ... 7=domingo), p. ej. 1,3,5",
+    )
+    fecha_inicio = models.DateField("Fecha de inicio")
+    fecha_fin = models.DateField("Fecha de fin")
+
+    class Meta:
+        verbose_name = "Horario de entrenamiento"
+        verbose_name_plural = "Horarios de entrenamiento"
+        ordering = ["grupo", "fecha_inicio"]
+
+    def __str__(self):
+        dias = ", ".join(self.DIAS_SEMANA[d] for d in self.get_dias_semana())
+        return f"{self.grupo} - {dias} ({self.fecha_inicio:%d/%m/%Y} a {self.fecha_fin:%d/%m/%Y})"
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        try:
+            dias = self.get_dias_semana()
+        except ValueError:
+            raise ValidationError({"dias_semana": "Use números del 1 al 7 separados por coma."})
+        if not dias:
+            raise ValidationError({"dias_semana": "Indique al menos un día."})
+        if self.fecha_inicio and self.fecha_fin and self.fecha_fin < self.fecha_inicio:
+            raise ValidationError({"fecha_fin": "La fecha de fin debe ser posterior a la de inicio."})
+
+    def get_dias_semana(self):
+        dias = sorted({int(d) for d in self.dias_semana.split(",") if d.strip()})
+        if any(d not in self.DIAS_SEMANA for d in dias):
+            raise ValueError(f"Día de la semana inválido: {self.dias_semana}")
+        return dias
+
+    def fechas(self):
+        """Fechas del rango que caen en los días del horario, sin las excepciones."""
+        from datetime import timedelta
+        dias = set(self.get_dias_semana())
+        excluidas = {e.fecha for e in self.excepciones.all()}
+        fecha = self.fecha_inicio
+        while fecha <= self.fecha_fin:
+            if fecha.isoweekday() in dias and fecha not in excluidas:
+                yield fecha
+            fecha += timedelta(days=1)
+
+    def materializar(self):
+        """
+        Crea y activa los SessionDay del horario. Las sesiones nuevas se insertan con un
+        único bulk_create y las existentes inactivas se activan con un único UPDATE.
+        Devuelve (creadas, activadas).
+
+        Dos materializaciones del mismo grupo no se cruzan: la segunda espera a la
+        primera y ya no cuenta como creadas las sesiones que insertó aquella. En
+        Postgres se bloquea la fila del grupo; en SQLite el UPDATE, primera sentencia
+        de la transacción, toma el bloqueo de escritura.
+        """
+        from django.db import connection, transaction
+        fechas = list(self.fechas())
+        if not fechas:
+            return 0, 0
+        with transaction.atomic():
+            if connection.features.has_select_for_update:
+                list(Grupo.objects.select_for_update().filter(pk=self.grupo_id).values_list("pk", flat=True))
+            existentes = SessionDay.objects.filter(grupo_id=self.grupo_id, fecha__in=fechas)
+            activadas = existentes.filter(active=False).update(active=True)
+            ya_creadas = set(existentes.values_list("fecha", flat=True))
+            nuevas = [SessionDay(grupo_id=self.grupo_id, fecha=f, active=True) for f in fechas if f not in ya_creadas]
+            SessionDay.objects.bulk_create(nuevas, ignore_conflicts=True, batch_size=500)
+        return len(nuevas), activadas
+
+
+class ExcepcionHorario(models.Model):
+    """
+    Fecha sin entrenamiento dentro de un horario (feriados, vacaciones, etc.).
+    """
+
+    horario = models.ForeignKey(HorarioEntrenamiento, on_delete=models.CASCADE, related_name="excepciones")
+    fecha = models.DateField("Fecha")
+    motivo = models.CharField("Motivo", max_length=100, blank=True)
+
+    class Meta:
+        verbose_name = "Excepción de horario"
+        verbose_name_plural = "Excepciones de horario"
+        unique_together = ("horario", "fecha")
+        ordering = ["fecha"]
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y} {self.motivo}".strip()
+
+
+class Pago(FieldTrackerMixin, models.Model):
     """
     Registro de pago mensual del club de atletismo.
     """
@@ -206,3 +368,124 @@ class Pago(models.Model):
 
     def __str__(self):
         return f"{self.alumno.get_full_name()} – {self.fecha_pago:%d/%m/%Y}"
+
+
+class RegistroAuditoria(models.Model):
+    """
+    Cambio registrado sobre Asistencia, Pago, SessionDay o Usuario (ver gestion/audit.py).
+    `cambios` guarda {campo: [antes, después]}.
+    """
+
+    ACCIONES = [
+        ("CREAR", "Creación"),
+        ("MODIFICAR", "Modificación"),
+        ("ELIMINAR", "Eliminación"),
+    ]
+
+    fecha = models.DateTimeField("Fecha", default=timezone.now, db_index=True)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Usuario",
+    )
+    accion = models.CharField("Acción", max_length=10, choices=ACCIONES)
+    modelo = models.CharField("Modelo", max_length=50)
+    objeto_id = models.BigIntegerField("ID del objeto")
+    cambios = models.JSONField("Cambios", default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        verbose_name = "Registro de auditoría"
+        verbose_name_plural = "Registros de auditoría"
+        ordering = ["-fecha"]
+        indexes = [
+            models.Index(fields=["modelo", "objeto_id"], name="auditoria_objeto_idx"),
+            models.Index(fields=["actor", "fecha"], name="auditoria_actor_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y %H:%M} {self.get_accion_display()} {self.modelo} #{self.objeto_id}"
+
+
+class ResumenTemporada(models.Model):
+    """
+    Totales por alumno de una temporada (año) archivada. Reemplazan a las filas de
+    Asistencia/Pago movidas al archivo para que los reportes históricos sigan cuadrando.
+    """
+
+    alumno = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="resumenes_temporada"
+    )
+    temporada = models.PositiveSmallIntegerField("Temporada")
+    total_sesiones = models.PositiveIntegerField("Total de sesiones", default=0)
+    asistencias = models.PositiveIntegerField("Asistencias", default=0)
+    fecha_primera = models.DateField("Primera sesión", null=True, blank=True)
+    fecha_ultima = models.DateField("Última sesión", null=True, blank=True)
+    pagos = models.PositiveIntegerField("Pagos", default=0)
+
+    class Meta:
+        verbose_name = "Resumen de temporada"
+        verbose_name_plural = "Resúmenes de temporada"
+        unique_together = ("alumno", "temporada")
+        ordering = ["temporada", "alumno"]
+
+    def __str__(self):
+        return f"{self.temporada} – {self.alumno}: {self.asistencias}/{self.total_sesiones}"
+
+
+class ArchivoTemporada(models.Model):
+    """
+    Archivo JSONL comprimido con las asistencias y pagos de una temporada cerrada.
+    """
+
+    temporada = models.PositiveSmallIntegerField("Temporada", unique=True)
+    archivo = models.CharField("Archivo", max_length=255)
+    sha256 = models.CharField("SHA-256", max_length=64)
+    asistencias = models.PositiveIntegerField("Asistencias archivadas", default=0)
+    pagos = models.PositiveIntegerField("Pagos archivados", default=0)
+    creado_en = models.DateTimeField("Archivado el", default=timezone.now)
+    restaurado_en = models.DateTimeField("Restaurado el", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Archivo de temporada"
+        verbose_name_plural = "Archivos de temporada"
+        ordering = ["-temporada"]
+
+    def __str__(self):
+        return f"Temporada {self.temporada} ({self.asistencias} asistencias, {self.pagos} pagos)"
+
+
+class PerfilRequest(models.Model):
+    """
+    Perfil cProfile de un request pedido por staff (gestion.profiling). El .prof
+    completo queda en PROFILES_DIR; aquí se guardan los datos del request y las
+    funciones más costosas para verlas desde el admin.
+    """
+
+    fecha = models.DateTimeField("Fecha", default=timezone.now, db_index=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Usuario",
+    )
+    metodo = models.CharField("Método", max_length=10)
+    url = models.CharField("URL", max_length=500)
+    vista = models.CharField("Vista", max_length=200, blank=True)
+    estado = models.PositiveSmallIntegerField("Código de estado")
+    duracion_ms = models.FloatField("Duración (ms)")
+    consultas = models.PositiveIntegerField("Consultas SQL", default=0)
+    archivo = models.CharField("Archivo", max_length=255)
+    resumen = models.TextField("Funciones más costosas", blank=True)
+
+    class Meta:
+        verbose_name = "Perfil de request"
+        verbose_name_plural = "Perfiles de request"
+        ordering = ["-fecha"]
+
+    def __str__(self):
+        return f"{self.metodo} {self.url} ({self.duracion_ms:.0f} ms)"
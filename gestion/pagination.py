@@ -0,0 +1,58 @@
+"""
+Paginación por keyset (sin COUNT ni OFFSET).
+
+El cursor es la clave de ordenación de la última fila servida más el número de
+filas ya mostradas (solo para numerar), codificado en base64 para la URL.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+ATLETAS_ORDERING = ("first_name", "last_name", "id")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj, shown, ordering=ATLETAS_ORDERING):
+    payload = [[getattr(obj, f) for f in ordering], shown]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, ordering=ATLETAS_ORDERING):
+    try:
+        values, shown = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if len(values) != len(ordering) or not isinstance(shown, int):
+            raise ValueError
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor(cursor)
+    return values, shown
+
+
+def _after(values, ordering):
+    # (a, b, c) > (x, y, z)  <=>  a > x  OR (a = x AND b > y)  OR (a = x AND b = y AND c > z)
+    condition = Q()
+    for i, field in enumerate(ordering):
+        term = Q(**{f"{field}__gt": values[i]}, **{f: v for f, v in zip(ordering[:i], values[:i])})
+        condition |= term
+    return condition
+
+
+def keyset_page(queryset, cursor=None, size=25, ordering=ATLETAS_ORDERING):
+    """
+    Devuelve (filas, siguiente_cursor, número_de_la_primera_fila). Se pide una fila de
+    más para saber si hay otra página; siguiente_cursor es None en la última.
+    """
+    shown = 0
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values, shown = decode_cursor(cursor, ordering)
+        queryset = queryset.filter(_after(values, ordering))
+    rows = list(queryset[: size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(rows[-1], shown + size, ordering)
+    return rows, next_cursor, shown + 1
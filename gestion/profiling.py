@@ -0,0 +1,211 @@
+"""
+Perfilado bajo demanda de requests individuales.
+
+Un usuario staff pide un request con `?_profile=1` o con la cabecera
+`X-Profile: 1` y `ProfilingMiddleware` lo ejecuta bajo cProfile. El perfil completo
+se guarda como .prof en PROFILES_DIR (se abre con `python -m pstats` o snakeviz) y
+un `PerfilRequest` registra URL, vista, duración, consultas y las funciones más
+costosas, visibles desde el admin.
+
+Para el resto de requests el coste es mirar un parámetro y una cabecera. En las
+respuestas en streaming (exportaciones) el perfil sigue activo mientras se genera
+el cuerpo y se guarda al terminar.
+
+cProfile solo sigue el hilo que lo activa, y una vista async corre en el hilo de
+un event loop (el de asgiref bajo WSGI, el del servidor bajo ASGI). Por eso
+`asyncviews.login_required` la espera con `profile_await`: cada paso de la
+corrutina corre con un perfil propio activo en el hilo que lo ejecuta, y entre
+pasos (mientras espera) el perfil está apagado y no recoge lo que el event loop
+haga para otros requests. Lo mismo se hace con cada trozo de un cuerpo en
+streaming async. Al guardar, los perfiles del request se combinan en uno.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import time
+import types
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from .querycount import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+QUERY_PARAM = "_profile"
+HEADER = "HTTP_X_PROFILE"
+DEFAULT_TOP_FRAMES = 30
+
+# Lista de perfiles del request que se está perfilando; profile_await añade el suyo
+_perfiles = ContextVar("gestion_profiles", default=None)
+
+
+def profiles_dir():
+    return Path(getattr(settings, "PROFILES_DIR", Path(settings.BASE_DIR) / "profiles"))
+
+
+def wants_profile(request):
+    flag = request.GET.get(QUERY_PARAM) or request.META.get(HEADER)
+    if flag not in ("1", "true", "on"):
+        return False
+    # Solo se toca request.user (sesión) si el request lo pidió
+    user = getattr(request, "user", None)
+    return bool(user is not None and user.is_active and user.is_staff)
+
+
+@types.coroutine
+def _drive(awaitable, profile):
+    """Espera `awaitable` con `profile` activo solo mientras corre cada paso."""
+    value, error = None, None
+    while True:
+        profile.enable()
+        try:
+            yielded = awaitable.send(value) if error is None else awaitable.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            profile.disable()
+        try:
+            value, error = (yield yielded), None
+        except BaseException as exc:
+            value, error = None, exc
+
+
+async def profile_await(coro):
+    """Espera la corrutina `coro`; si el request se está perfilando, bajo un perfil propio."""
+    perfiles = _perfiles.get()
+    if perfiles is None:
+        return await coro
+    profile = cProfile.Profile()
+    perfiles.append(profile)
+    return await _drive(coro, profile)
+
+
+def combinar(perfiles):
+    """Un solo pstats.Stats con los perfiles del request (pstats no acepta perfiles vacíos)."""
+    return pstats.Stats(*[profile for profile in perfiles if profile.getstats()])
+
+
+def top_frames(stats, limit=None):
+    """Texto de pstats con las `limit` funciones de mayor tiempo acumulado."""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit or DEFAULT_TOP_FRAMES)
+    # Lo anterior a la tabla es una cabecera vacía de pstats
+    texto = stream.getvalue()
+    return texto[texto.find("   ncalls"):] if "   ncalls" in texto else texto
+
+
+def guardar_perfil(request, response, perfiles, duracion, consultas):
+    from .models import PerfilRequest
+
+    fecha = timezone.now()
+    destino = profiles_dir()
+    destino.mkdir(parents=True, exist_ok=True)
+    match = getattr(request, "resolver_match", None)
+    vista = match.view_name if match else ""
+    nombre = f"{fecha:%Y%m%d-%H%M%S-%f}-{(vista or 'request').replace(':', '-')}.prof"
+    stats = combinar(perfiles)
+    stats.dump_stats(destino / nombre)
+    return PerfilRequest.objects.create(
+        fecha=fecha,
+        usuario=request.user if request.user.is_authenticated else None,
+        metodo=request.method,
+        url=request.get_full_path()[:500],
+        vista=vista[:200],
+        estado=response.status_code,
+        duracion_ms=round(duracion * 1000, 3),
+        consultas=consultas,
+        archivo=nombre,
+        resumen=top_frames(stats, getattr(settings, "PROFILE_TOP_FRAMES", DEFAULT_TOP_FRAMES)),
+    )
+
+
+class ProfilingMiddleware:
+    """Va después de AuthenticationMiddleware: necesita request.user para exigir staff."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not wants_profile(request):
+            return self.get_response(request)
+
+        profile = cProfile.Profile()
+        perfiles = [profile]
+        recorder = QueryRecorder()
+        inicio = time.perf_counter()
+        with recorder:
+            try:
+                profile.enable()
+            except ValueError:
+                # Ya hay otro profiler activo en este hilo
+                logger.warning("No se pudo perfilar %s: profiler ocupado", request.get_full_path())
+                return self.get_response(request)
+            token = _perfiles.set(perfiles)
+            try:
+                response = self.get_response(request)
+            finally:
+                _perfiles.reset(token)
+                profile.disable()
+
+        if getattr(response, "streaming", False) and response.is_async:
+            response.streaming_content = self._aprofile_stream(
+                request, response, response.streaming_content, perfiles, recorder, inicio
+            )
+        elif getattr(response, "streaming", False):
+            response.streaming_content = self._profile_stream(
+                request, response, response.streaming_content, perfiles, recorder, inicio
+            )
+        else:
+            self._guardar(request, response, perfiles, time.perf_counter() - inicio, len(recorder))
+        return response
+
+    def _profile_stream(self, request, response, content, perfiles, recorder, inicio):
+        profile = perfiles[0]
+        iterator = iter(content)
+        try:
+            while True:
+                with recorder:
+                    profile.enable()
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        break
+                    finally:
+                        profile.disable()
+                yield chunk
+        finally:
+            self._guardar(request, response, perfiles, time.perf_counter() - inicio, len(recorder))
+
+    async def _aprofile_stream(self, request, response, content, perfiles, recorder, inicio):
+        profile = cProfile.Profile()
+        perfiles.append(profile)
+        iterator = aiter(content)
+        try:
+            while True:
+                try:
+                    chunk = await _drive(anext(iterator), profile)
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        finally:
+            # Escribe el PerfilRequest: fuera del event loop
+            await sync_to_async(self._guardar)(request, response, perfiles, time.perf_counter() - inicio, len(recorder))
+
+    def _guardar(self, request, response, perfiles, duracion, consultas):
+        try:
+            perfil = guardar_perfil(request, response, perfiles, duracion, consultas)
+        except Exception:
+            # El perfil nunca debe romper el request que se está midiendo
+            logger.exception("No se pudo guardar el perfil de %s", request.get_full_path())
+            return
+        if not getattr(response, "streaming", False):
+            response["X-Profile-Id"] = str(perfil.pk)
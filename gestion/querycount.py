@@ -0,0 +1,209 @@
+"""
+Conteo de consultas por request y detección de N+1.
+
+`QueryRecorder` registra las consultas con `connection.execute_wrapper` (funciona con
+DEBUG apagado). `repeated_shapes()` agrupa las consultas por su forma (SQL sin
+literales): la misma forma muchas veces en un request suele ser un N+1.
+
+Las vistas declaran su presupuesto con `@query_budget(n)`. En DEBUG,
+`QueryInspectorMiddleware` avisa en el log cuando un request lo supera o repite una
+forma; en las pruebas lo exige `QueryBudgetMixin.assertQueryBudget`. En las
+respuestas en streaming (exportaciones) las consultas del cuerpo corren al enviarlo,
+después de la vista: `wrap_streaming()` las sigue registrando hasta el final.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def sql_shape(sql):
+    """SQL sin literales ni listas IN, para agrupar consultas equivalentes."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def query_budget(n):
+    """Declara el máximo de consultas de una vista (independiente del número de filas)."""
+    def decorator(view_func):
+        # functools.wraps copia __dict__, así que el atributo sobrevive a login_required & co.
+        view_func.query_budget = n
+        return view_func
+    return decorator
+
+
+def get_query_budget(view_func):
+    budget = getattr(view_func, "query_budget", None)
+    if budget is None:
+        # Vistas de clase (DRF): el atributo va en la clase
+        budget = getattr(getattr(view_func, "cls", None), "query_budget", None)
+    return budget
+
+
+class QueryRecorder:
+    """Context manager que guarda (sql, segundos) de cada consulta en todas las conexiones."""
+
+    def __init__(self, using=None):
+        self.aliases = [using] if using else list(connections)
+        self.queries = []
+        self._contexts = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - inicio))
+
+    def __enter__(self):
+        for alias in self.aliases:
+            ctx = connections[alias].execute_wrapper(self)
+            ctx.__enter__()
+            self._contexts.append(ctx)
+        return self
+
+    def __exit__(self, *exc):
+        while self._contexts:
+            self._contexts.pop().__exit__(*exc)
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(d for _, d in self.queries)
+
+    def repeated_shapes(self, threshold=None):
+        """[(forma, veces)] de las formas que se repiten al menos `threshold` veces."""
+        threshold = threshold or getattr(settings, "QUERY_N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD)
+        counts = Counter(sql_shape(sql) for sql, _ in self.queries)
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+
+_FIN = object()
+
+
+@contextmanager
+def _wrapping(wrapper):
+    contexts = [connections[alias].execute_wrapper(wrapper) for alias in connections]
+    for ctx in contexts:
+        ctx.__enter__()
+    try:
+        yield
+    finally:
+        for ctx in reversed(contexts):
+            ctx.__exit__(None, None, None)
+
+
+def _record(content, wrapper, on_close):
+    iterator = iter(content)
+    try:
+        while True:
+            with _wrapping(wrapper):
+                chunk = next(iterator, _FIN)
+            if chunk is _FIN:
+                return
+            yield chunk
+    finally:
+        on_close()
+
+
+async def _arecord(content, wrapper, on_close):
+    iterator = aiter(content)
+    try:
+        while True:
+            # execute_wrapper es por conexión y cada hilo tiene las suyas: se registra en
+            # el hilo de sync_to_async, donde corren las consultas del iterador async
+            ctx = _wrapping(wrapper)
+            await sync_to_async(ctx.__enter__)()
+            try:
+                chunk = await anext(iterator, _FIN)
+            finally:
+                await sync_to_async(ctx.__exit__)(None, None, None)
+            if chunk is _FIN:
+                return
+            yield chunk
+    finally:
+        on_close()
+
+
+def wrap_streaming(response, wrapper, on_close):
+    """
+    Pasa también por `wrapper` (un execute_wrapper) las consultas que se hacen al
+    generar el cuerpo de `response`, y llama a `on_close()` cuando termina. El wrapper
+    se registra alrededor de cada trozo y no durante todo el envío: así no se mezcla
+    con los de otros middlewares, que ya salieron.
+    """
+    record = _arecord if response.is_async else _record
+    response.streaming_content = record(response.streaming_content, wrapper, on_close)
+
+
+class QueryInspectorMiddleware:
+    """Solo en DEBUG (o con QUERY_INSPECTOR=True): avisa de N+1 y presupuestos superados."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_INSPECTOR", settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._query_budget = None
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        # En streaming, las consultas hechas hasta enviar las cabeceras
+        response["X-Query-Count"] = str(len(recorder))
+        if getattr(response, "streaming", False):
+            # El presupuesto cubre también el cuerpo: se comprueba al terminar de enviarlo
+            wrap_streaming(response, recorder, lambda: self._report(request, recorder))
+        else:
+            self._report(request, recorder)
+        return response
+
+    def _report(self, request, recorder):
+        budget = request._query_budget
+        if budget is not None and len(recorder) > budget:
+            logger.warning("%s %s: %d consultas (presupuesto %d)", request.method, request.path, len(recorder), budget)
+        for shape, n in recorder.repeated_shapes():
+            logger.warning("%s %s: posible N+1, %d veces: %s", request.method, request.path, n, shape[:300])
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = get_query_budget(view_func)
+
+
+class QueryBudgetMixin:
+    """Para TestCase: pide una URL y exige el presupuesto declarado y que no haya N+1."""
+
+    def assertQueryBudget(self, url, budget=None, method="get", threshold=None, **kwargs):
+        from django.urls import resolve
+        from urllib.parse import urlsplit
+        if budget is None:
+            budget = get_query_budget(resolve(urlsplit(url).path).func)
+            if budget is None:
+                self.fail(f"{url} no declara @query_budget")
+        with QueryRecorder() as recorder:
+            response = getattr(self.client, method)(url, **kwargs)
+            if getattr(response, "streaming", False):
+                b"".join(response)
+        detalle = "\n".join(f"  {sql}" for sql, _ in recorder.queries)
+        self.assertLessEqual(len(recorder), budget, f"{url}: {len(recorder)} consultas, presupuesto {budget}\n{detalle}")
+        repetidas = recorder.repeated_shapes(threshold)
+        self.assertEqual(repetidas, [], f"{url}: consultas repetidas (N+1)")
+        return response
@@ -0,0 +1,281 @@
+"""
+Lecturas en la réplica, con read-your-writes.
+
+Con READ_REPLICA_ALIAS configurado, las lecturas de los modelos de gestion del
+dashboard, las exportaciones (`@replica_view`) y los endpoints de la API con
+`ReplicaReadMixin` van a esa base en los requests GET/HEAD. Todas las escrituras
+van a "default".
+
+Quien acaba de escribir no debe leer una réplica atrasada: `ReplicaMiddleware`
+anota el momento de la última escritura de cada usuario en la caché y en una
+cookie firmada, y durante READ_REPLICA_STICKY_SECONDS sus lecturas van a la base
+principal. Dentro del mismo request, después de una escritura o dentro de una
+transacción, también. La cookie vale en cualquier worker; la caché solo si es
+compartida (CACHE_TABLE), y es lo único que hay para los clientes de la API que no
+guardan cookies. Por eso, con una caché por proceso, los usuarios autenticados sin
+cookie de sesión leen siempre la principal.
+
+Sin réplica real (SQLite), el alias puede apuntar a READ_REPLICA_STANDIN_PATH, una
+copia local que se renueva cada READ_REPLICA_REFRESH_INTERVAL segundos con la API
+de backup (gestion.reporting). En ese caso quien escribió lee la principal hasta
+que haya una copia posterior a su escritura, y una copia de más de
+READ_REPLICA_MAX_LAG segundos no se usa.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import reporting
+from .checks import cache_is_shared
+
+# Nombre del alias en DATABASES (la réplica de Postgres o la copia local)
+REPLICA_ALIAS = "replica"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+STICKY_COOKIE = "gestion_escritura"
+STICKY_SALT = "gestion.replicas"
+ROUTED_APPS = ("gestion",)
+
+_estado = ContextVar("gestion_replica_state", default=None)
+
+
+class _Estado:
+    def __init__(self):
+        self.alias = None
+        self.wrote = False
+
+
+def replica_alias():
+    alias = getattr(settings, "READ_REPLICA_ALIAS", None)
+    return alias if alias in settings.DATABASES else None
+
+
+def standin_path(alias):
+    """Ruta de la copia local si `alias` es el sustituto de SQLite, si no None."""
+    path = getattr(settings, "READ_REPLICA_STANDIN_PATH", None)
+    if path is None or connections[alias].vendor != "sqlite":
+        return None
+    return path if str(connections[alias].settings_dict["NAME"]) == str(path) else None
+
+
+def refresh_standin(alias=None):
+    """Renueva la copia local ahora. Devuelve el momento de la copia."""
+    alias = alias or replica_alias()
+    path = standin_path(alias) if alias else None
+    if path is None:
+        raise reporting.SnapshotError("READ_REPLICA_ALIAS no apunta a la copia local (READ_REPLICA_STANDIN_PATH)")
+    return reporting.take_snapshot(path, alias)
+
+
+def _sticky_key(user_id):
+    return f"gestion:replica:escritura:{user_id}"
+
+
+def _sticky_timeout(alias):
+    timeout = getattr(settings, "READ_REPLICA_STICKY_SECONDS", 5)
+    if standin_path(alias):
+        timeout = max(timeout, getattr(settings, "READ_REPLICA_MAX_LAG", 300))
+    return timeout
+
+
+def mark_write(user_id, response=None):
+    """Anota que el usuario acaba de escribir (en la caché y, con `response`, en una cookie)."""
+    alias = replica_alias()
+    if alias is None:
+        return
+    wrote_at = time.time()
+    timeout = _sticky_timeout(alias)
+    cache.set(_sticky_key(user_id), wrote_at, timeout)
+    if response is not None:
+        response.set_signed_cookie(
+            STICKY_COOKIE, f"{user_id}:{wrote_at}", salt=STICKY_SALT, max_age=timeout,
+            httponly=True, samesite="Lax", secure=settings.SESSION_COOKIE_SECURE,
+        )
+
+
+def _cookie_wrote_at(request, user, timeout):
+    try:
+        value = request.get_signed_cookie(STICKY_COOKIE, default=None, salt=STICKY_SALT, max_age=timeout)
+    except signing.BadSignature:
+        return None
+    if value is None:
+        return None
+    user_id, _, wrote_at = value.partition(":")
+    return float(wrote_at) if user_id == str(user.pk) else None
+
+
+def _is_sticky(request, alias, taken):
+    user = request.user
+    if not user.is_authenticated:
+        return False
+    marcas = [cache.get(_sticky_key(user.pk)), _cookie_wrote_at(request, user, _sticky_timeout(alias))]
+    marcas = [m for m in marcas if m is not None]
+    if not marcas:
+        return False
+    wrote_at = max(marcas)
+    if taken is not None:
+        # Copia local: hasta que haya una copia posterior a la escritura
+        return wrote_at >= taken
+    return time.time() - wrote_at < getattr(settings, "READ_REPLICA_STICKY_SECONDS", 5)
+
+
+def _untracked(request):
+    """Un usuario cuya última escritura podría estar anotada solo en la caché de otro worker."""
+    if cache_is_shared() or settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    return request.user.is_authenticated
+
+
+def _standin_taken_at(alias):
+    """Momento de la copia local si está al día; False si no se puede usar."""
+    path = standin_path(alias)
+    if path is None:
+        return None
+    interval = getattr(settings, "READ_REPLICA_REFRESH_INTERVAL", 60)
+    if interval:
+        reporting.refresh_in_background(path, alias, interval)
+    taken = reporting.snapshot_taken_at(path)
+    if taken is None or time.time() - taken > getattr(settings, "READ_REPLICA_MAX_LAG", 300):
+        return False
+    reporting.reopen_if_replaced(alias, taken)
+    return taken
+
+
+def _replica_for(request):
+    """Alias de la réplica si este request puede leer de ella, o None."""
+    estado = _estado.get()
+    alias = replica_alias()
+    if estado is None or alias is None or request.method not in SAFE_METHODS or estado.wrote:
+        return None
+    taken = _standin_taken_at(alias)
+    # request.user se resuelve aquí, con la sesión leída de la principal
+    if taken is False or _untracked(request) or _is_sticky(request, alias, taken):
+        return None
+    return alias
+
+
+@contextmanager
+def use_replica(request):
+    """Lecturas a la réplica si el request puede usarla. Devuelve el alias (o None)."""
+    alias = _replica_for(request)
+    if alias is None:
+        yield None
+        return
+    estado = _estado.get()
+    estado.alias = alias
+    try:
+        yield alias
+    finally:
+        estado.alias = None
+
+
+def _read_from(response, alias):
+    response["X-Read-From"] = alias or DEFAULT_DB_ALIAS
+    return response
+
+
+def replica_view(view_func):
+    """
+    Ejecuta una vista de solo lectura contra la réplica (si corresponde). Bajo un
+    `reporting_view` que ya lee de la copia para reportes (ReportingRouter va
+    primero) no hace nada: ni renueva la copia local ni añade X-Read-From.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if reporting.in_use():
+                return await view_func(request, *args, **kwargs)
+            # Lee la sesión y la caché y puede cerrar conexiones: fuera del event loop
+            alias = await sync_to_async(_replica_for)(request)
+            estado = _estado.get()
+            if alias is not None:
+                estado.alias = alias
+            try:
+                response = await view_func(request, *args, **kwargs)
+            finally:
+                if alias is not None:
+                    estado.alias = None
+            return _read_from(response, alias)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if reporting.in_use():
+            return view_func(request, *args, **kwargs)
+        with use_replica(request) as alias:
+            response = view_func(request, *args, **kwargs)
+        return _read_from(response, alias)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """Para vistas de DRF: las acciones GET leen de la réplica tras autenticar."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica = use_replica(request)
+        self._replica_alias = self._replica.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica = getattr(self, "_replica", None)
+        if replica is not None:
+            self._replica = None
+            replica.__exit__(None, None, None)
+        response = super().finalize_response(request, response, *args, **kwargs)
+        return _read_from(response, getattr(self, "_replica_alias", None))
+
+
+class ReplicaMiddleware:
+    """Estado por request para el router y registro de las escrituras del usuario."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        estado = _Estado()
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        user = getattr(request, "user", None)
+        if (estado.wrote or request.method not in SAFE_METHODS) and user is not None and user.is_authenticated:
+            mark_write(user.pk, response)
+        return response
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if estado is None or estado.alias is None or estado.wrote or model._meta.app_label not in ROUTED_APPS:
+            return None
+        # Lo que se lee dentro de una transacción debe ver lo que esa transacción escribió
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return estado.alias
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None and model._meta.app_label in ROUTED_APPS:
+            estado.wrote = True
+        # También para instancias leídas de la réplica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        dbs = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica (o su copia local) trae el esquema de la principal; aunque no esté
+        # activa, migrate y makemigrations no deben abrirla (crearían un archivo vacío)
+        if db in (REPLICA_ALIAS, replica_alias()):
+            return False
+        return None
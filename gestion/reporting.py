@@ -0,0 +1,247 @@
+"""
+Copia de la base para reportes.
+
+Las exportaciones y el reporte mensual de pagos leen mucho y, contra el archivo
+vivo, compiten con las escrituras de los entrenadores. `take_snapshot()` copia la
+base con la API de backup de SQLite (una sola lectura consistente; con WAL no
+bloquea a los escritores) a REPORTING_SNAPSHOT_PATH, que es la base del alias
+"reporting". Dentro de `use_reporting()` (o de una vista con `@reporting_view`)
+`ReportingRouter` manda las lecturas a esa copia y la respuesta lleva su fecha y
+edad en las cabeceras X-Report-Snapshot y X-Report-Snapshot-Age; la fecha va
+también en el nombre del archivo descargado (`..._datos-AAAAMMDD-HHMM.csv`).
+
+La copia se renueva con `manage.py snapshot_reportes` (cron) o, con
+REPORTING_SNAPSHOT_INTERVAL, en segundo plano cuando una vista la encuentra vieja.
+Si no hay copia, o tiene más de REPORTING_SNAPSHOT_MAX_AGE segundos, se lee la
+base viva (X-Report-Snapshot: live). `@reporting_view(live_if=...)` lee también la
+base viva cuando el reporte cubre datos que se están cargando (la asistencia de hoy).
+
+Las mismas funciones, con otra ruta y otro alias, mantienen la copia local que
+hace de réplica de lectura en desarrollo (gestion.replicas).
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REPORTING_ALIAS = "reporting"
+
+_active = ContextVar("gestion_reporting_alias", default=None)
+_refresh_locks = {}
+_refresh_locks_lock = threading.Lock()
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_path():
+    return Path(getattr(settings, "REPORTING_SNAPSHOT_PATH", Path(settings.BASE_DIR) / "reporting.sqlite3"))
+
+
+def is_configured():
+    """El alias existe, la base viva es SQLite y el alias apunta al archivo de la copia."""
+    if REPORTING_ALIAS not in settings.DATABASES or connections["default"].vendor != "sqlite":
+        return False
+    # En las pruebas el alias es un espejo de la base de pruebas: no hay copia que usar
+    return str(connections[REPORTING_ALIAS].settings_dict["NAME"]) == str(snapshot_path())
+
+
+def snapshot_taken_at(path=None):
+    """Momento de la lectura copiada (mtime del archivo), o None si no hay copia."""
+    try:
+        return os.path.getmtime(path or snapshot_path())
+    except OSError:
+        return None
+
+
+def snapshot_age(path=None):
+    taken = snapshot_taken_at(path)
+    return None if taken is None else max(0.0, time.time() - taken)
+
+
+def take_snapshot(path=None, alias=REPORTING_ALIAS):
+    """Copia la base viva a `path` (REPORTING_SNAPSHOT_PATH) y devuelve el momento de la copia."""
+    source = connections["default"]
+    if source.vendor != "sqlite":
+        raise SnapshotError("La copia de la base solo está disponible con SQLite")
+    destino = Path(path) if path else snapshot_path()
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    inicio = time.time()
+    src = sqlite3.connect(str(source.settings_dict["NAME"]), uri=True)
+    dst = sqlite3.connect(tmp)
+    try:
+        # Todas las páginas en un paso: por pasos, cada escritura en la base viva reinicia la copia
+        src.backup(dst)
+        # La copia es de solo lectura: sin WAL, un único archivo que se puede reemplazar
+        dst.execute("PRAGMA journal_mode=DELETE")
+    except Exception:
+        dst.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        src.close()
+    dst.close()
+    os.utime(tmp, (inicio, inicio))
+    os.replace(tmp, destino)
+    # La conexión de este hilo seguiría leyendo el archivo anterior
+    if alias in settings.DATABASES:
+        connections[alias].close()
+    return inicio
+
+
+def refresh_in_background(path=None, alias=REPORTING_ALIAS, interval=None):
+    """Renueva la copia en un hilo si tiene más de `interval` (REPORTING_SNAPSHOT_INTERVAL) segundos."""
+    if interval is None:
+        interval = getattr(settings, "REPORTING_SNAPSHOT_INTERVAL", None)
+    age = snapshot_age(path)
+    if not interval or (age is not None and age < interval):
+        return False
+    with _refresh_locks_lock:
+        lock = _refresh_locks.setdefault(alias, threading.Lock())
+    if not lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            take_snapshot(path, alias)
+        except Exception:
+            logger.exception("No se pudo renovar la copia de %s", alias)
+        finally:
+            connections.close_all()
+            lock.release()
+
+    threading.Thread(target=run, name=f"{alias}-snapshot", daemon=True).start()
+    return True
+
+
+def reopen_if_replaced(alias, taken):
+    """Cierra la conexión de `alias` si se abrió antes de la copia `taken`."""
+    connection = connections[alias]
+    # Una conexión persistente abierta antes del último reemplazo lee el archivo viejo
+    if getattr(connection, "_snapshot_taken_at", None) != taken:
+        connection.close()
+        connection._snapshot_taken_at = taken
+
+
+def in_use():
+    """True dentro de una vista que está leyendo de la copia para reportes."""
+    return _active.get() is not None
+
+
+def _usable_snapshot():
+    """Fecha de la copia si está disponible y es reciente, o None."""
+    taken = snapshot_taken_at() if is_configured() else None
+    max_age = getattr(settings, "REPORTING_SNAPSHOT_MAX_AGE", 1800)
+    if taken is None or time.time() - taken > max_age:
+        return None
+    reopen_if_replaced(REPORTING_ALIAS, taken)
+    return taken
+
+
+@contextmanager
+def use_reporting():
+    """Lecturas a la copia si está disponible y es reciente. Devuelve su fecha (o None)."""
+    taken = _usable_snapshot()
+    if taken is None:
+        yield None
+        return
+    token = _active.set(REPORTING_ALIAS)
+    try:
+        yield taken
+    finally:
+        _active.reset(token)
+
+
+def _snapshot_filename(response, taken):
+    # Quien abre el archivo no ve las cabeceras: la fecha de los datos va en el nombre
+    disposition = response.get("Content-Disposition", "")
+    match = re.search(r'filename="([^"]+?)(\.[A-Za-z0-9]+)?"', disposition)
+    if match:
+        sello = timezone.localtime(datetime.fromtimestamp(taken, dt_timezone.utc)).strftime("%Y%m%d-%H%M")
+        nombre = f"{match.group(1)}_datos-{sello}{match.group(2) or ''}"
+        response["Content-Disposition"] = disposition[:match.start()] + f'filename="{nombre}"' + disposition[match.end():]
+
+
+def _snapshot_headers(response, taken):
+    if taken is None:
+        response["X-Report-Snapshot"] = "live"
+    else:
+        response["X-Report-Snapshot"] = datetime.fromtimestamp(taken, dt_timezone.utc).isoformat(timespec="seconds")
+        response["X-Report-Snapshot-Age"] = str(int(time.time() - taken))
+        _snapshot_filename(response, taken)
+    if is_configured():
+        refresh_in_background()
+    return response
+
+
+def reporting_view(view_func=None, *, live_if=None):
+    """
+    Ejecuta la vista contra la copia para reportes y añade su edad a las cabeceras.
+    Con `live_if(request, *args, **kwargs)` verdadero, la vista lee la base viva.
+    """
+    if view_func is None:
+        return lambda func: reporting_view(func, live_if=live_if)
+
+    def snapshot_for(request, args, kwargs):
+        if live_if is not None and live_if(request, *args, **kwargs):
+            return None
+        return _usable_snapshot()
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            # Cerrar la conexión de una copia reemplazada no se puede hacer desde el event loop
+            taken = await sync_to_async(snapshot_for)(request, args, kwargs)
+            token = _active.set(REPORTING_ALIAS) if taken is not None else None
+            try:
+                response = await view_func(request, *args, **kwargs)
+            finally:
+                if token is not None:
+                    _active.reset(token)
+            return _snapshot_headers(response, taken)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        taken = snapshot_for(request, args, kwargs)
+        token = _active.set(REPORTING_ALIAS) if taken is not None else None
+        try:
+            response = view_func(request, *args, **kwargs)
+        finally:
+            if token is not None:
+                _active.reset(token)
+        return _snapshot_headers(response, taken)
+    return wrapper
+
+
+class ReportingRouter:
+    def db_for_read(self, model, **hints):
+        return _active.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La copia trae el esquema de la base viva
+        if db == REPORTING_ALIAS:
+            return False
+        return None
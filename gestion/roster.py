@@ -0,0 +1,33 @@
+from .models import Usuario, Asistencia, SessionDay
+
+
+def eligible_students(grupo, fecha):
+    """
+    Alumnos del grupo que ya estaban registrados y no estaban inactivos en `fecha`,
+    cada uno con el atributo `asistencia` (registro de esa fecha o None).
+    Usa dos consultas sin importar el tamaño del grupo.
+    """
+    estudiantes = (
+        Usuario.objects.filter(rol="ALUMNO", grupo=grupo)
+        .select_related("grupo")
+        .order_by("first_name", "last_name")
+    )
+    asistencias = {
+        a.alumno_id: a
+        for a in Asistencia.objects.filter(fecha=fecha, alumno__rol="ALUMNO", alumno__grupo=grupo)
+    }
+
+    estudiantes_filtered = []
+    for estudiante in estudiantes:
+        # Filtrar usuarios no registrados aún o que ya pasaron su fecha de inactividad.
+        if estudiante.date_joined.date() > fecha:
+            continue
+        if estudiante.inactivo_desde and fecha > estudiante.inactivo_desde:
+            continue
+        setattr(estudiante, "asistencia", asistencias.get(estudiante.pk))
+        estudiantes_filtered.append(estudiante)
+    return estudiantes_filtered
+
+
+def is_session_active(grupo, fecha):
+    return SessionDay.objects.filter(grupo=grupo, fecha=fecha, active=True).exists()
@@ -0,0 +1,111 @@
+"""
+Búsqueda de usuarios por nombre.
+
+En SQLite se usa una tabla FTS5 (`gestion_usuario_fts`, rowid = id del usuario)
+con el tokenizador unicode61 sin diacríticos, de modo que "jose per" encuentra
+a "José Pérez". La tabla se mantiene con señales de Usuario; los bulk_create
+deben llamar a `index_users`. En Postgres se usa unaccent + icontains y en otros
+motores, icontains.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+
+FTS_TABLE = "gestion_usuario_fts"
+MAX_TOKENS = 6
+INDEXED_FIELDS = {"first_name", "last_name", "username"}
+
+
+def fts_enabled():
+    return connection.vendor == "sqlite"
+
+
+def create_index(schema_editor=None):
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(nombre, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def _document(user):
+    return f"{user.first_name} {user.last_name} {user.username}"
+
+
+def index_users(users):
+    """Inserta o actualiza usuarios en el índice (un executemany)."""
+    if not fts_enabled():
+        return
+    rows = [(u.pk, _document(u)) for u in users if u.pk is not None]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, nombre) VALUES (%s, %s)", rows)
+
+
+def rebuild_index():
+    from .models import Usuario
+    if not fts_enabled():
+        return 0
+    create_index()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    count = 0
+    batch = []
+    for user in Usuario.objects.only("pk", "first_name", "last_name", "username").iterator(chunk_size=2000):
+        batch.append(user)
+        if len(batch) >= 2000:
+            index_users(batch)
+            count += len(batch)
+            batch = []
+    index_users(batch)
+    return count + len(batch)
+
+
+def _tokens(query):
+    return re.findall(r"\w+", query or "")[:MAX_TOKENS]
+
+
+def search_users(queryset, query):
+    """Filtra `queryset` por nombre/apellido/usuario; cada palabra funciona como prefijo."""
+    tokens = _tokens(query)
+    if not tokens:
+        return queryset
+    if fts_enabled():
+        match = " AND ".join(f'"{t}"*' for t in tokens)
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        )
+    # En Postgres, unaccent (django.contrib.postgres) para que "jose" encuentre "José"
+    lookup = "unaccent__icontains" if connection.vendor == "postgresql" else "icontains"
+    for t in tokens:
+        queryset = queryset.filter(
+            Q(**{f"first_name__{lookup}": t}) | Q(**{f"last_name__{lookup}": t}) | Q(**{f"username__{lookup}": t})
+        )
+    return queryset
+
+
+def _on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # get_changed_fields aún compara con los valores previos al save (FieldTrackerMixin)
+    if created or INDEXED_FIELDS & set(instance.get_changed_fields()):
+        index_users([instance])
+
+
+def _on_delete(sender, instance, **kwargs):
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [instance.pk])
+
+
+def connect_signals():
+    from .models import Usuario
+    post_save.connect(_on_save, sender=Usuario, dispatch_uid="search_usuario_save")
+    post_delete.connect(_on_delete, sender=Usuario, dispatch_uid="search_usuario_delete")
@@ -0,0 +1,80 @@
+"""
+Perfil de producción para SQLite.
+
+Cada conexión nueva a una base SQLite recibe los PRAGMA de `SQLITE_PRAGMAS`
+(señal `connection_created`). WAL permite que las lecturas (exportaciones) no
+bloqueen a los entrenadores que escriben, y busy_timeout hace que un escritor
+espere al otro en vez de fallar con "database is locked".
+
+Con conexiones persistentes (CONN_MAX_AGE) las conexiones viven mucho, así que
+`PRAGMA optimize` y el checkpoint del WAL se lanzan cada
+SQLITE_OPTIMIZE_INTERVAL segundos al terminar un request, y también con
+`manage.py optimizar_sqlite` (cron).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_last_optimize = {"at": time.monotonic()}
+
+
+def apply_pragmas(cursor, pragmas):
+    """Aplica {pragma: valor}; sirve para conexiones de Django y de sqlite3."""
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+
+
+def on_connection_created(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    # Una entrada de DATABASES puede traer los suyos (la copia de reportes es de solo lectura)
+    pragmas = connection.settings_dict.get("PRAGMAS", getattr(settings, "SQLITE_PRAGMAS", None))
+    if pragmas:
+        # Sobre la conexión sqlite3 directamente: es preparación de la conexión, no
+        # consultas de la vista (no pasan por execute_wrapper ni cuentan en los presupuestos)
+        apply_pragmas(connection.connection, pragmas)
+
+
+def is_read_only(connection):
+    """Conexiones con `query_only` en sus PRAGMAS (la copia de reportes, la réplica local)."""
+    pragmas = connection.settings_dict.get("PRAGMAS") or {}
+    return str(pragmas.get("query_only", "")).upper() in ("ON", "1", "TRUE")
+
+
+def optimize(using="default", checkpoint="PASSIVE"):
+    """PRAGMA optimize y checkpoint del WAL. Devuelve (busy, páginas del WAL, páginas copiadas)."""
+    connection = connections[using]
+    # Dentro de una transacción el checkpoint falla con "database table is locked";
+    # en una base de solo lectura, PRAGMA optimize con "attempt to write a readonly database"
+    if connection.vendor != "sqlite" or connection.in_atomic_block or is_read_only(connection):
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA optimize")
+        cursor.execute(f"PRAGMA wal_checkpoint({checkpoint})")
+        return cursor.fetchone()
+
+
+def on_request_finished(sender, **kwargs):
+    interval = getattr(settings, "SQLITE_OPTIMIZE_INTERVAL", None)
+    if not interval or time.monotonic() - _last_optimize["at"] < interval:
+        return
+    _last_optimize["at"] = time.monotonic()
+    for alias in connections:
+        # Solo conexiones ya abiertas: no se abre una nueva para esto
+        if connections[alias].connection is None:
+            continue
+        try:
+            optimize(alias)
+        except Exception:
+            logger.exception("PRAGMA optimize falló en %s", alias)
+
+
+def connect_signals():
+    connection_created.connect(on_connection_created, dispatch_uid="gestion_sqlite_pragmas")
+    request_finished.connect(on_request_finished, dispatch_uid="gestion_sqlite_optimize")
@@ -0,0 +1,201 @@
+"""
+Generador de un club sintético para pruebas de carga y benchmarks.
+
+`generar_club()` crea grupos, atletas, horarios, días de sesión, asistencias y pagos
+con bulk_create por lotes. Con la misma semilla y los mismos parámetros el resultado
+es idéntico (incluidos los UUID). Todo lo generado lleva el prefijo indicado, lo que
+permite borrarlo con `borrar_club()` sin tocar datos reales.
+"""
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Asistencia, Grupo, HorarioEntrenamiento, Pago, SessionDay, Usuario
+from .search import index_users
+
+BATCH_SIZE = 2000
+NOMBRES = [
+    "Ana", "Andrés", "Camila", "Carlos", "Daniela", "Diego", "Elena", "Gabriel", "Isabel", "José",
+    "Laura", "Luis", "María", "Miguel", "Natalia", "Pablo", "Paula", "Ricardo", "Sofía", "Valentina",
+]
+APELLIDOS = [
+    "Álvarez", "Castillo", "Díaz", "Fernández", "García", "González", "Hernández", "López", "Martínez",
+    "Medina", "Moreno", "Pérez", "Ramírez", "Rodríguez", "Rojas", "Sánchez", "Silva", "Torres", "Vargas",
+]
+TIPOS_PAGO = [("PAGO_MOVIL", 60), ("TRANSFERENCIA", 20), ("EFECTIVO", 10), ("ZELLE", 7), ("BINANCE", 3)]
+
+
+@dataclass
+class ConfigClub:
+    grupos: int = 10
+    atletas_por_grupo: int = 40
+    temporadas: int = 3
+    dias_semana: tuple = (1, 3, 5)
+    prob_asistencia: float = 0.8
+    # Probabilidad de que una ausencia quede registrada como presente=False (si no, no hay fila)
+    prob_ausencia_registrada: float = 0.3
+    prob_pago_mensual: float = 0.9
+    prob_exento: float = 0.05
+    prob_baja_por_temporada: float = 0.08
+    prob_sesion_cancelada: float = 0.03
+    semilla: int = 1
+    prefijo: str = "sim"
+    hoy: date = field(default_factory=date.today)
+
+
+def _batched(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _bulk(model, rows):
+    total = 0
+    for batch in _batched(rows):
+        model.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        total += len(batch)
+    return total
+
+
+def _aware(d):
+    return timezone.make_aware(datetime.combine(d, time(8)))
+
+
+def borrar_club(prefijo="sim"):
+    """Elimina lo generado con `prefijo`. Devuelve cuántos atletas se borraron."""
+    with transaction.atomic():
+        usuarios = Usuario.objects.filter(username__startswith=f"{prefijo}_")
+        n_usuarios = usuarios.count()
+        # Las filas hijas se borran antes con DELETE directos para no cargar cada objeto
+        grupos = Grupo.objects.filter(nombre__startswith=f"{prefijo.upper()} ")
+        for qs in (
+            Asistencia.objects.filter(alumno__in=usuarios),
+            Pago.objects.filter(alumno__in=usuarios),
+            SessionDay.objects.filter(grupo__in=grupos),
+        ):
+            qs._raw_delete(qs.db)
+        usuarios.delete()
+        grupos.delete()
+    return n_usuarios
+
+
+def generar_club(config=None, stdout=None):
+    """Genera el club descrito por `config` y devuelve {modelo: filas creadas}."""
+    config = config or ConfigClub()
+    rng = random.Random(config.semilla)
+    primer_año = config.hoy.year - config.temporadas + 1
+    inicio = date(primer_año, 1, 1)
+    password = make_password("runners", salt=f"{config.prefijo}salt{config.semilla}")
+    counts = {}
+
+    def log(msg):
+        if stdout is not None:
+            stdout.write(msg)
+
+    with transaction.atomic():
+        grupos = [Grupo(nombre=f"{config.prefijo.upper()} Grupo {g + 1:02d}") for g in range(config.grupos)]
+        Grupo.objects.bulk_create(grupos)
+        counts["grupos"] = len(grupos)
+
+        # Atletas: fecha de alta repartida en la primera temporada, bajas ocasionales
+        atletas = []
+        for g, grupo in enumerate(grupos):
+            for i in range(config.atletas_por_grupo):
+                alta = inicio + timedelta(days=rng.randrange(0, 180))
+                baja = None
+                for año in range(primer_año, config.hoy.year + 1):
+                    if rng.random() < config.prob_baja_por_temporada:
+                        baja = date(año, rng.randint(3, 11), rng.randint(1, 28))
+                        break
+                atletas.append(Usuario(
+                    username=f"{config.prefijo}_{g + 1:02d}_{i + 1:04d}",
+                    password=password,
+                    first_name=rng.choice(NOMBRES),
+                    last_name=f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}",
+                    rol="ALUMNO",
+                    grupo=grupo,
+                    uuid=uuid.UUID(int=rng.getrandbits(128), version=4),
+                    date_joined=_aware(alta),
+                    is_active=baja is None or baja > config.hoy,
+                    inactivo_desde=baja if baja and baja <= config.hoy else None,
+                    exento_pago=rng.random() < config.prob_exento,
+                ))
+        counts["usuarios"] = _bulk(Usuario, atletas)
+        # bulk_create no dispara las señales del índice de búsqueda
+        for batch in _batched(atletas):
+            index_users(batch)
+        log(f"{counts['usuarios']} atletas en {len(grupos)} grupos")
+
+        # Horarios y días de sesión
+        dias = ",".join(str(d) for d in config.dias_semana)
+        horarios = [
+            HorarioEntrenamiento(grupo=grupo, dias_semana=dias, fecha_inicio=date(año, 1, 1), fecha_fin=date(año, 12, 31))
+            for grupo in grupos
+            for año in range(primer_año, config.hoy.year + 1)
+        ]
+        HorarioEntrenamiento.objects.bulk_create(horarios)
+        fechas = [
+            inicio + timedelta(days=n)
+            for n in range((config.hoy - inicio).days + 1)
+            if (inicio + timedelta(days=n)).isoweekday() in config.dias_semana
+        ]
+        sesiones = {
+            grupo.pk: [(f, rng.random() >= config.prob_sesion_cancelada) for f in fechas]
+            for grupo in grupos
+        }
+        counts["sesiones"] = _bulk(SessionDay, (
+            SessionDay(grupo_id=grupo_id, fecha=f, active=activa)
+            for grupo_id, lista in sesiones.items()
+            for f, activa in lista
+        ))
+        log(f"{counts['sesiones']} días de sesión")
+
+        def asistencias():
+            for atleta in atletas:
+                propension = min(0.99, max(0.05, rng.gauss(config.prob_asistencia, 0.1)))
+                alta = atleta.date_joined.date()
+                for f, activa in sesiones[atleta.grupo_id]:
+                    if not activa or f < alta or (atleta.inactivo_desde and f > atleta.inactivo_desde):
+                        continue
+                    if rng.random() < propension:
+                        yield Asistencia(alumno_id=atleta.pk, fecha=f, presente=True)
+                    elif rng.random() < config.prob_ausencia_registrada:
+                        yield Asistencia(alumno_id=atleta.pk, fecha=f, presente=False)
+
+        counts["asistencias"] = _bulk(Asistencia, asistencias())
+        log(f"{counts['asistencias']} asistencias")
+
+        def pagos():
+            seq = 0
+            tipos, pesos = zip(*TIPOS_PAGO)
+            bancos = [codigo for codigo, _ in Pago.BANCOS_CHOICES]
+            for atleta in atletas:
+                if atleta.exento_pago:
+                    continue
+                alta = atleta.date_joined.date()
+                fin = atleta.inactivo_desde or config.hoy
+                mes = date(alta.year, alta.month, 1)
+                while mes <= fin:
+                    if rng.random() < config.prob_pago_mensual:
+                        fecha_pago = mes + timedelta(days=rng.randrange(0, 10))
+                        if fecha_pago <= config.hoy:
+                            seq += 1
+                            tipo = rng.choices(tipos, pesos)[0]
+                            yield Pago(
+                                alumno_id=atleta.pk,
+                                fecha_pago=fecha_pago,
+                                numero_referencia=f"{config.prefijo[:4].upper()}{config.semilla % 1000:03d}{seq:09d}",
+                                tipo_transaccion=tipo,
+                                banco_emisor=None if tipo in ("EFECTIVO", "ZELLE", "BINANCE") else rng.choice(bancos),
+                            )
+                    mes = date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+        counts["pagos"] = _bulk(Pago, pagos())
+        log(f"{counts['pagos']} pagos")
+    return counts
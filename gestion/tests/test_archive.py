@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+from datetime import date
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from gestion.archive import archivar_temporada, restaurar_temporada
+from gestion.models import Usuario, Grupo, Asistencia, Pago, ResumenTemporada, ArchivoTemporada
+
+
+class ArchiveTestCase(TestCase):
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        self.settings_override = override_settings(ARCHIVE_DIR=self.archive_dir)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.grupo = Grupo.objects.create(nombre="G9")
+        self.alumno = Usuario.objects.create_user(username="alumno9", password="x", rol="ALUMNO", grupo=self.grupo)
+        Usuario.objects.filter(pk=self.alumno.pk).update(date_joined="2020-01-01T00:00:00Z")
+        Asistencia.objects.create(alumno=self.alumno, fecha=date(2024, 3, 1), presente=True)
+        Asistencia.objects.create(alumno=self.alumno, fecha=date(2024, 3, 4), presente=False)
+        Asistencia.objects.create(alumno=self.alumno, fecha=date.today(), presente=True)
+        Pago.objects.create(alumno=self.alumno, fecha_pago=date(2024, 3, 1), numero_referencia="A1", tipo_transaccion="EFECTIVO")
+
+    def test_archive_and_restore_roundtrip(self):
+        archivo = archivar_temporada(2024)
+        self.assertEqual((archivo.asistencias, archivo.pagos), (2, 1))
+        self.assertFalse(Asistencia.objects.filter(fecha__year=2024).exists())
+        self.assertFalse(Pago.objects.exists())
+        resumen = ResumenTemporada.objects.get(alumno=self.alumno, temporada=2024)
+        self.assertEqual((resumen.total_sesiones, resumen.asistencias, resumen.pagos), (2, 1, 1))
+
+        counts = restaurar_temporada(2024)
+        self.assertEqual(counts, {"gestion.asistencia": 2, "gestion.pago": 1})
+        self.assertEqual(Asistencia.objects.filter(fecha__year=2024).count(), 2)
+        self.assertTrue(Pago.objects.filter(numero_referencia="A1").exists())
+        self.assertFalse(ResumenTemporada.objects.exists())
+        self.assertIsNotNone(ArchivoTemporada.objects.get(temporada=2024).restaurado_en)
+
+    def test_current_season_and_corrupt_archive_are_rejected(self):
+        with self.assertRaises(CommandError):
+            call_command("archivar_temporada", date.today().year)
+        archivar_temporada(2024)
+        with open(f"{self.archive_dir}/temporada_2024.jsonl.gz", "ab") as fh:
+            fh.write(b"x")
+        with self.assertRaises(CommandError):
+            call_command("archivar_temporada", 2024, restaurar=True)
+
+    def test_summary_export_includes_archived_totals(self):
+        archivar_temporada(2024)
+        staff = Usuario.objects.create_user(username="staff9", password="x", is_staff=True)
+        self.client.force_login(staff)
+        resp = self.client.get(reverse("download_asistencias", kwargs={"grupo": self.grupo.pk}))
+        lines = resp.getvalue().decode().strip().splitlines()
+        self.assertEqual(lines[1].split(",")[1:], ["2024-03-01", date.today().isoformat(), "3", "2"])
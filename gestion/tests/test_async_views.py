@@ -0,0 +1,88 @@
+from datetime import date
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from gestion import asyncviews, views
+from gestion.models import Usuario, Grupo, Asistencia, SessionDay
+
+
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        self.fecha = date.today()
+        self.grupo = Grupo.objects.create(nombre="G23")
+        self.staff = Usuario.objects.create_user(username="async_staff", password="x", is_staff=True, rol="ENTRENADOR")
+        self.ana = Usuario.objects.create_user(username="async_ana", password="x", first_name="Ana", rol="ALUMNO", grupo=self.grupo)
+        Usuario.objects.create_user(username="async_beto", password="x", first_name="Beto", rol="ALUMNO", grupo=self.grupo)
+        Asistencia.objects.create(alumno=self.ana, fecha=self.fecha, presente=True)
+        SessionDay.objects.create(grupo=self.grupo, fecha=self.fecha, active=True)
+        self.async_client.force_login(self.staff)
+
+    def test_read_views_are_async(self):
+        for view in (
+            views.index,
+            views.daily_attendance,
+            views.download_attendance_summary,
+            views.download_weekly_attendance_summary,
+            views.download_daily_attendance_summary,
+        ):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+
+    async def test_export_streams_an_async_iterator_under_asgi(self):
+        response = await self.async_client.get(reverse("download_asistencias", kwargs={"grupo": self.grupo.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(response["X-Report-Snapshot"], "live")
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        lineas = body.strip().splitlines()
+        self.assertEqual(lineas[0].split(","), ["Nombres", "fecha_primera", "fecha_ultima", "total_sesiones", "Asistencias"])
+        self.assertEqual(lineas[1].split(",")[1:], [self.fecha.isoformat(), self.fecha.isoformat(), "1", "1"])
+        self.assertIn("Beto", lineas[2])
+
+    def test_export_streams_a_sync_iterator_under_wsgi(self):
+        self.client.force_login(self.staff)
+        url = reverse("download_asistencias_diaria", kwargs={"grupo": self.grupo.pk, "fecha": self.fecha.isoformat()})
+        response = self.client.get(url)
+        self.assertFalse(response.is_async)
+        filas = [linea.split(",") for linea in response.getvalue().decode().strip().splitlines()[1:]]
+        self.assertEqual([(f[0].strip(), f[2]) for f in filas], [("Ana", "Presente"), ("Beto", "Ausente")])
+
+    async def test_weekly_and_daily_exports(self):
+        semana = self.fecha.isocalendar()[1]
+        response = await self.async_client.get(
+            reverse("download_asistencias_semana", kwargs={"grupo": self.grupo.pk, "semana": str(semana)})
+        )
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn("Ana ,Presente,1,1", body.replace(f"{self.fecha:%d-%m-%Y},", ""))
+
+        response = await self.async_client.get(
+            reverse("download_asistencias_semana", kwargs={"grupo": self.grupo.pk, "semana": str(semana)}), {"format": "xlsx"}
+        )
+        self.assertEqual(response["Content-Type"], "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        self.assertTrue(response.content.startswith(b"PK"))
+
+        otra_fecha = date(2020, 1, 6)
+        response = await self.async_client.get(
+            reverse("download_asistencias_diaria", kwargs={"grupo": self.grupo.pk, "fecha": otra_fecha.isoformat()})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_dashboard_and_roster(self):
+        response = await self.async_client.get(reverse("portal_index"))
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(
+            reverse("asistencia_diaria", kwargs={"grupo": self.grupo.pk, "fecha": self.fecha.isoformat()})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Beto")
+
+    async def test_login_required(self):
+        response = await AsyncClient().get(reverse("portal_index"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("next=", response["Location"])
+
+    def test_csv_chunks(self):
+        with mock.patch.object(asyncviews, "STREAM_ROWS", 2):
+            chunks = list(asyncviews._csv_chunks(["a"], range(3), lambda n: [n]))
+        self.assertEqual(chunks, ["a\r\n0\r\n", "1\r\n2\r\n"])
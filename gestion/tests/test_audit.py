@@ -0,0 +1,61 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from gestion.audit import audit_context
+from gestion.models import Usuario, Grupo, Asistencia, SessionDay, RegistroAuditoria
+
+
+class AuditTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = Usuario.objects.create_user(username="staff8", password="staffpass", is_staff=True)
+        self.grupo = Grupo.objects.create(nombre="G8")
+        self.alumno = Usuario.objects.create_user(username="alumno8", password="x", rol="ALUMNO", grupo=self.grupo)
+        RegistroAuditoria.objects.all().delete()
+
+    def test_htmx_toggle_is_audited_with_actor(self):
+        asistencia = Asistencia.objects.create(alumno=self.alumno, fecha=date(2026, 3, 2), presente=True)
+        RegistroAuditoria.objects.all().delete()
+        self.client.force_login(self.staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("htmx_update_asistencia", kwargs={"pk": asistencia.pk}))
+
+        registro = RegistroAuditoria.objects.get()
+        self.assertEqual(registro.actor, self.staff)
+        self.assertEqual(registro.accion, "MODIFICAR")
+        self.assertEqual(registro.modelo, "gestion.asistencia")
+        self.assertEqual(registro.cambios, {"presente": [True, False]})
+
+    def test_buffered_entries_use_single_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with audit_context(actor=self.staff):
+                with self.captureOnCommitCallbacks(execute=True):
+                    for day in range(1, 6):
+                        SessionDay.objects.create(grupo=self.grupo, fecha=date(2026, 3, day), active=True)
+        inserts = [q for q in ctx.captured_queries if "gestion_registroauditoria" in q["sql"]]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(RegistroAuditoria.objects.filter(accion="CREAR", actor=self.staff).count(), 5)
+
+    def test_delete_and_password_are_recorded(self):
+        self.alumno.set_password("nueva")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alumno.save()
+        registro = RegistroAuditoria.objects.get(accion="MODIFICAR")
+        self.assertEqual(registro.cambios["password"], ["***", "***"])
+
+        pk = self.alumno.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alumno.delete()
+        self.assertTrue(RegistroAuditoria.objects.filter(accion="ELIMINAR", modelo="gestion.usuario", objeto_id=pk).exists())
+
+    def test_failed_insert_is_not_swallowed(self):
+        with mock.patch.object(RegistroAuditoria.objects, "bulk_create", side_effect=DatabaseError("locked")):
+            with self.assertRaises(DatabaseError):
+                with audit_context(actor=self.staff):
+                    with self.captureOnCommitCallbacks(execute=True):
+                        SessionDay.objects.create(grupo=self.grupo, fecha=date(2026, 3, 9), active=True)
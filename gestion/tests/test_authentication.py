@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from gestion.api import authentication
+from gestion.models import Usuario
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["jwt_users"].clear()
+        self.staff = Usuario.objects.create_user(username="staff3", password="staffpass", is_staff=True)
+        self.client = APIClient()
+        resp = self.client.post(reverse("token_obtain_pair"), {"username": "staff3", "password": "staffpass"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data.get('access')}")
+
+    def test_second_request_skips_user_lookup(self):
+        resp = self.client.get("/api/grupos/")
+        self.assertEqual(resp.status_code, 200)
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/grupos/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(any("gestion_usuario" in q["sql"] for q in ctx.captured_queries))
+
+    def test_deactivation_invalidates_cached_user(self):
+        self.assertEqual(self.client.get("/api/grupos/").status_code, 200)
+
+        self.staff.is_active = False
+        self.staff.save()
+        self.assertEqual(self.client.get("/api/grupos/").status_code, 401)
+
+    def test_unrelated_change_keeps_cached_user(self):
+        self.assertEqual(self.client.get("/api/grupos/").status_code, 200)
+
+        self.staff.first_name = "Nuevo"
+        self.staff.save()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/grupos/")
+        self.assertFalse(any("gestion_usuario" in q["sql"] for q in ctx.captured_queries))
+
+    def test_bulk_update_invalidates_cached_user(self):
+        self.assertEqual(self.client.get("/api/grupos/").status_code, 200)
+
+        Usuario.objects.filter(pk=self.staff.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/api/grupos/").status_code, 401)
+
+    def test_versions_in_a_shared_memory_cache(self):
+        with mock.patch.object(authentication, "cache_is_shared", return_value=True):
+            self.assertEqual(self.client.get("/api/grupos/").status_code, 200)
+            self.staff.is_active = False
+            self.staff.save()
+            # La invalidación queda donde la ven todos los workers
+            self.assertEqual(cache.get(authentication._version_key(self.staff.pk)), 1)
+            self.assertEqual(self.client.get("/api/grupos/").status_code, 401)
+
+    def test_versions_stay_in_process_with_a_database_cache(self):
+        db_cache = {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "gestion_cache"}
+        with override_settings(CACHES={**settings.CACHES, "default": db_cache}):
+            self.assertIs(authentication._versions(), caches["jwt_users"])
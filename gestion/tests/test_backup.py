@@ -0,0 +1,96 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from gestion.backup import BackupError, backup_models, crear_respaldo, restaurar_respaldo
+from gestion.models import Usuario, Grupo, Asistencia, Pago
+
+
+class BackupTestCase(TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp()) / "respaldo"
+        self.addCleanup(shutil.rmtree, self.dir.parent)
+        self.grupo = Grupo.objects.create(nombre="G7")
+        self.alumno = Usuario.objects.create_user(username="alumno7", password="x", rol="ALUMNO", grupo=self.grupo, first_name="Ana")
+        Asistencia.objects.create(alumno=self.alumno, fecha=date(2025, 5, 5), presente=True)
+        Pago.objects.create(alumno=self.alumno, fecha_pago=date(2025, 5, 5), numero_referencia="R7", tipo_transaccion="EFECTIVO")
+
+    def test_models_in_dependency_order(self):
+        orden = [m._meta.label_lower for m in backup_models()]
+        self.assertLess(orden.index("gestion.grupo"), orden.index("gestion.usuario"))
+        self.assertLess(orden.index("gestion.usuario"), orden.index("gestion.asistencia"))
+        self.assertLess(orden.index("auth.group"), orden.index("gestion.usuario_groups"))
+        self.assertIn("auth.group_permissions", orden)
+
+    def test_backup_writes_manifest_and_one_file_per_model(self):
+        manifest = crear_respaldo(self.dir)
+        entradas = {e["modelo"]: e for e in manifest["modelos"]}
+        self.assertEqual(entradas["gestion.asistencia"]["filas"], 1)
+        self.assertEqual(json.loads((self.dir / "manifest.json").read_text())["migracion"], manifest["migracion"])
+        with gzip.open(self.dir / entradas["gestion.pago"]["archivo"], "rt") as fh:
+            row = json.loads(fh.readline())
+        self.assertEqual((row["numero_referencia"], row["alumno_id"]), ("R7", self.alumno.pk))
+
+    def test_restore_roundtrip_with_replace(self):
+        crear_respaldo(self.dir)
+        Asistencia.objects.all().delete()
+        Pago.objects.create(alumno=self.alumno, fecha_pago=date(2025, 6, 1), numero_referencia="NUEVO", tipo_transaccion="EFECTIVO")
+
+        with self.assertRaises(BackupError):
+            restaurar_respaldo(self.dir)
+
+        counts = restaurar_respaldo(self.dir, reemplazar=True)
+        self.assertEqual((counts["gestion.asistencia"], counts["gestion.pago"]), (1, 1))
+        self.assertEqual(list(Pago.objects.values_list("numero_referencia", flat=True)), ["R7"])
+        alumno = Usuario.objects.get(username="alumno7")
+        self.assertEqual((alumno.pk, alumno.grupo_id), (self.alumno.pk, self.grupo.pk))
+        self.assertTrue(alumno.check_password("x"))
+        # Las secuencias siguen desde el máximo restaurado
+        otro = Grupo.objects.create(nombre="Otro")
+        self.assertGreater(otro.pk, self.grupo.pk)
+
+    def test_restore_rejects_corrupted_file(self):
+        manifest = crear_respaldo(self.dir)
+        archivo = self.dir / manifest["modelos"][0]["archivo"]
+        archivo.write_bytes(archivo.read_bytes() + b"x")
+        with self.assertRaises(CommandError):
+            call_command("restore", str(self.dir), "--verificar")
+        with self.assertRaises(BackupError):
+            restaurar_respaldo(self.dir, reemplazar=True)
+        self.assertTrue(Pago.objects.filter(numero_referencia="R7").exists())
+
+    def test_backup_command_refuses_existing_backup(self):
+        call_command("backup", output=str(self.dir), stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("backup", output=str(self.dir))
+
+    def test_restore_into_empty_database(self):
+        ver = Permission.objects.get(codename="view_pago")
+        cambiar = Permission.objects.get(codename="change_asistencia")
+        entrenadores = Group.objects.create(name="Entrenadores")
+        entrenadores.permissions.add(ver)
+        self.alumno.groups.add(entrenadores)
+        self.alumno.user_permissions.add(cambiar)
+        crear_respaldo(self.dir)
+
+        # Una base nueva: sin datos, y migrate crea los permisos con otros ids
+        for model in reversed(backup_models()):
+            qs = model._base_manager.all()
+            qs._raw_delete(qs.db)
+        for permiso in (ver, cambiar):
+            Permission.objects.filter(pk=permiso.pk).update(id=permiso.pk + 10000)
+
+        restaurar_respaldo(self.dir)
+        alumno = Usuario.objects.get(username="alumno7")
+        self.assertEqual(list(alumno.groups.values_list("name", flat=True)), ["Entrenadores"])
+        self.assertEqual(list(alumno.user_permissions.values_list("pk", flat=True)), [cambiar.pk + 10000])
+        self.assertEqual(list(Group.objects.get(name="Entrenadores").permissions.values_list("pk", flat=True)), [ver.pk + 10000])
+        self.assertEqual(Asistencia.objects.get().alumno, alumno)
@@ -0,0 +1,32 @@
+from django.db import connections
+from django.test import TestCase
+from gestion import benchmarks, reporting
+
+
+class BenchmarkSuiteTestCase(TestCase):
+    def test_run_and_compare(self):
+        config = benchmarks.dataset_config(grupos=1, atletas_por_grupo=3, temporadas=1)
+        usuario, counts = benchmarks.preparar_datos(config)
+        resultado = benchmarks.run_benchmarks(usuario, repeticiones=1, solo=["daily_attendance", "api_pagos_list"], config=config, counts=counts)
+        self.assertEqual(set(resultado["results"]), {"daily_attendance", "api_pagos_list"})
+        r = resultado["results"]["daily_attendance"]
+        self.assertGreater(r["queries"], 0)
+        self.assertGreater(r["peak_kib"], 0)
+        self.assertEqual(resultado["meta"]["dataset"]["filas"], counts)
+
+        peor = {"results": {"daily_attendance": {**r, "wall_ms": {**r["wall_ms"], "median": r["wall_ms"]["median"] * 2}, "queries": r["queries"] + 1}}}
+        _, regresiones = benchmarks.compare(resultado, peor)
+        self.assertEqual(len(regresiones), 2)
+        _, regresiones = benchmarks.compare(resultado, resultado)
+        self.assertEqual(regresiones, [])
+
+    def test_aliases_read_the_seeded_database(self):
+        # Fuera de las pruebas "reporting" apunta al archivo real de la copia
+        conn = connections["reporting"]
+        self.addCleanup(setattr, conn, "settings_dict", conn.settings_dict)
+        conn.settings_dict = {**conn.settings_dict, "NAME": str(reporting.snapshot_path())}
+        self.assertTrue(reporting.is_configured())
+        with benchmarks.aliases_como_espejo():
+            self.assertFalse(reporting.is_configured())
+            self.assertEqual(conn.settings_dict["NAME"], connections["default"].settings_dict["NAME"])
+        self.assertTrue(reporting.is_configured())
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from gestion.checks import cache_is_shared, check_shared_cache
+
+
+class SharedCacheCheckTestCase(SimpleTestCase):
+    def test_locmem_is_per_process(self):
+        self.assertFalse(cache_is_shared())
+        self.assertEqual([w.id for w in check_shared_cache(None)], ["gestion.W001"])
+
+    @override_settings(CACHES={**settings.CACHES, "default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "gestion_cache"}})
+    def test_database_cache_is_shared(self):
+        self.assertTrue(cache_is_shared())
+        self.assertEqual(check_shared_cache(None), [])
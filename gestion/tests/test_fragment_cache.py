@@ -0,0 +1,56 @@
+from datetime import date
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from gestion.models import Usuario, Grupo, Asistencia, SessionDay
+
+FRAGMENT_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-default"},
+    "fragments": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-fragments"},
+    "jwt_users": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-jwt-users"},
+}
+
+
+@override_settings(CACHES=FRAGMENT_CACHES)
+class FragmentCacheTestCase(TestCase):
+    def setUp(self):
+        caches["fragments"].clear()
+        self.grupo = Grupo.objects.create(nombre="Juveniles")
+        self.alumnos = [
+            Usuario.objects.create_user(username=f"fc{i}", password="x", first_name=f"Nombre{i}", last_name="Apellido",
+                                        rol="ALUMNO", grupo=self.grupo)
+            for i in range(3)
+        ]
+        self.staff = Usuario.objects.create_user(username="staff13", password="x", is_staff=True, rol="ENTRENADOR")
+        self.client.force_login(self.staff)
+
+    def _fragment_keys(self):
+        return set(caches["fragments"]._cache)
+
+    def test_edit_invalidates_only_that_row(self):
+        self.client.get(reverse("atletas_list"))
+        keys = self._fragment_keys()
+        self.assertEqual(len(keys), 3)
+
+        self.client.get(reverse("atletas_list"))
+        self.assertEqual(self._fragment_keys(), keys)
+
+        alumno = self.alumnos[1]
+        alumno.first_name = "Cambiado"
+        alumno.save()
+        resp = self.client.get(reverse("atletas_list"))
+        self.assertContains(resp, "Cambiado Apellido")
+        self.assertNotContains(resp, "Nombre1 Apellido")
+        self.assertEqual(len(self._fragment_keys() - keys), 1)
+
+    def test_student_row_reflects_toggle(self):
+        fecha = date.today()
+        SessionDay.objects.create(grupo=self.grupo, fecha=fecha, active=True)
+        asistencia = Asistencia.objects.create(alumno=self.alumnos[0], fecha=fecha, presente=False)
+        url = reverse("asistencia_diaria", kwargs={"grupo": self.grupo.pk, "fecha": fecha.strftime("%Y-%m-%d")})
+        self.client.get(url)
+        resp = self.client.post(reverse("htmx_update_asistencia", kwargs={"pk": asistencia.pk}))
+        self.assertContains(resp, "Marcar Ausente")
+        resp = self.client.get(url)
+        self.assertContains(resp, "Presente</span>")
@@ -0,0 +1,51 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from gestion.models import Usuario, Grupo, SessionDay, HorarioEntrenamiento, ExcepcionHorario
+
+
+class HorarioEntrenamientoTestCase(TestCase):
+    def setUp(self):
+        self.staff = Usuario.objects.create_user(username="staff6", password="staffpass", is_staff=True)
+        self.grupo = Grupo.objects.create(nombre="G7")
+        # Lunes y miércoles de las dos primeras semanas de marzo 2026 (2 de marzo es lunes)
+        self.horario = HorarioEntrenamiento.objects.create(
+            grupo=self.grupo, dias_semana="1,3", fecha_inicio=date(2026, 3, 1), fecha_fin=date(2026, 3, 14)
+        )
+        ExcepcionHorario.objects.create(horario=self.horario, fecha=date(2026, 3, 4), motivo="Feriado")
+
+    def test_materializar_creates_and_activates(self):
+        SessionDay.objects.create(grupo=self.grupo, fecha=date(2026, 3, 2), active=False)
+        creadas, activadas = self.horario.materializar()
+        self.assertEqual((creadas, activadas), (2, 1))
+        fechas = list(SessionDay.objects.filter(grupo=self.grupo, active=True).order_by("fecha").values_list("fecha", flat=True))
+        self.assertEqual(fechas, [date(2026, 3, 2), date(2026, 3, 9), date(2026, 3, 11)])
+
+        # Idempotente
+        self.assertEqual(self.horario.materializar(), (0, 0))
+
+    def test_api_materializar_requires_staff(self):
+        alumno = Usuario.objects.create_user(username="alumno6", password="x", rol="ALUMNO")
+        client = APIClient()
+        client.force_authenticate(alumno)
+        url = f"/api/horarios/{self.horario.pk}/materializar/"
+        self.assertEqual(client.post(url).status_code, 403)
+
+        client.force_authenticate(self.staff)
+        resp = client.post(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, {"creadas": 3, "activadas": 0})
+
+    def test_api_rejects_invalid_dias(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        resp = client.post("/api/horarios/", {"grupo": self.grupo.pk, "dias_semana": "1,9",
+                                              "fecha_inicio": "2026-03-01", "fecha_fin": "2026-03-31"}, format="json")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_command(self):
+        call_command("materializar_horarios", grupo=self.grupo.pk, stdout=StringIO())
+        self.assertEqual(SessionDay.objects.filter(grupo=self.grupo, active=True).count(), 3)
@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from gestion import importer
+from gestion.importer import allocate_usernames, hash_passwords
+from gestion.models import Usuario, Grupo
+
+
+class AthleteImportTestCase(TestCase):
+    def setUp(self):
+        self.staff = Usuario.objects.create_user(username="staff10", password="x", is_staff=True)
+        self.grupo = Grupo.objects.create(nombre="Juveniles")
+        Usuario.objects.create_user(username="jperez", password="x")
+        self.client.force_login(self.staff)
+
+    def test_allocate_usernames_single_query(self):
+        with self.assertNumQueries(1):
+            usernames = allocate_usernames(["jperez", "jperez", "mlopez"])
+        self.assertEqual(usernames, ["jperez2", "jperez3", "mlopez"])
+
+    @override_settings(IMPORT_HASH_WORKERS=2)
+    def test_hash_passwords_in_pool(self):
+        from django.contrib.auth.hashers import check_password
+        passwords = [f"clave{i}" for i in range(20)]
+        hashes = hash_passwords(passwords)
+        self.assertTrue(check_password("clave7", hashes[7]))
+
+    @override_settings(IMPORT_HASH_WORKERS=2)
+    def test_hash_passwords_without_process_pool(self):
+        from django.contrib.auth.hashers import check_password
+        passwords = [f"clave{i}" for i in range(20)]
+        with mock.patch.object(importer, "ProcessPoolExecutor", side_effect=OSError("no /dev/shm")):
+            with self.assertLogs("gestion.importer", level="WARNING"):
+                hashes = hash_passwords(passwords)
+        self.assertTrue(check_password("clave7", hashes[7]))
+
+    def test_import_csv_returns_credentials(self):
+        csv_data = "nombre,apellido,grupo\nJuan,Pérez,juveniles\nMaría,López,%d\n" % self.grupo.pk
+        archivo = SimpleUploadedFile("atletas.csv", csv_data.encode("utf-8"), content_type="text/csv")
+        resp = self.client.post(reverse("atletas_import"), {"archivo": archivo})
+        self.assertEqual(resp.status_code, 200)
+        lines = resp.content.decode().strip().splitlines()
+        self.assertEqual(len(lines), 3)
+        nombre, apellido, grupo, username, password = lines[1].split(",")
+        self.assertEqual(username, "jperez2")
+        self.assertTrue(Usuario.objects.get(username=username).check_password(password))
+        self.assertEqual(Usuario.objects.get(username="mlopez").grupo, self.grupo)
+
+    def test_import_with_unknown_group_creates_nothing(self):
+        csv_data = "nombre,apellido,grupo\nJuan,Pérez,juveniles\nAna,Ruiz,Inexistente\n"
+        archivo = SimpleUploadedFile("atletas.csv", csv_data.encode("utf-8"), content_type="text/csv")
+        resp = self.client.post(reverse("atletas_import"), {"archivo": archivo})
+        self.assertRedirects(resp, reverse("atletas_list"), fetch_redirect_response=False)
+        self.assertFalse(Usuario.objects.filter(first_name="Juan").exists())
+
+    def test_single_athlete_form_uses_allocated_username(self):
+        resp = self.client.post(reverse("atletas_list"), {"first_name": "José", "last_name": "Pérez", "grupo": self.grupo.pk})
+        self.assertEqual(resp.status_code, 302)
+        self.assertTrue(Usuario.objects.filter(username="jperez2", rol="ALUMNO", is_active=True).exists())
@@ -0,0 +1,62 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from gestion import metrics
+from gestion.models import Usuario, Grupo
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        metrics.REGISTRY.reset()
+        self.addCleanup(metrics.REGISTRY.reset)
+        self.staff = Usuario.objects.create_user(username="metrics_staff", password="x", is_staff=True, rol="ENTRENADOR")
+        self.grupo = Grupo.objects.create(nombre="G16")
+        Usuario.objects.create_user(username="metrics_alumno", password="x", first_name="Ana", rol="ALUMNO", grupo=self.grupo)
+        self.client.force_login(self.staff)
+
+    def scrape(self, **kwargs):
+        response = self.client.get(reverse("metrics"), **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_latency_queries_and_exports(self):
+        self.client.get(reverse("atletas_list"))
+        self.client.get(reverse("atletas_list"))
+        # La exportación se mide cuando termina de enviarse el cuerpo
+        self.client.get(reverse("download_asistencias", kwargs={"grupo": self.grupo.pk})).getvalue()
+        body = self.scrape()
+        self.assertIn('gestion_requests_total{method="GET",status="200",view="atletas_list"} 2', body)
+        self.assertIn('gestion_request_duration_seconds_count{method="GET",view="atletas_list"} 2', body)
+        self.assertIn('gestion_request_duration_seconds_bucket{method="GET",view="atletas_list",le="+Inf"} 2', body)
+        self.assertIn('gestion_request_queries_count{view="atletas_list"} 2', body)
+        self.assertIn('gestion_export_bytes_count{content_type="text/csv",view="download_asistencias"} 1', body)
+        self.assertIn("# TYPE gestion_export_duration_seconds histogram", body)
+
+    def test_aggregates_worker_files(self):
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        otro = metrics.Registry()
+        otro.inc("gestion_requests_total", {"view": "atletas_list", "method": "GET", "status": "200"}, 5)
+        otro.observe("gestion_request_duration_seconds", {"view": "atletas_list", "method": "GET"}, 20)
+        Path(metrics_dir, "99999.json").write_text(json.dumps(otro.snapshot()))
+
+        with override_settings(METRICS_DIR=metrics_dir):
+            self.client.get(reverse("atletas_list"))
+            body = self.scrape()
+        self.assertIn('gestion_requests_total{method="GET",status="200",view="atletas_list"} 6', body)
+        self.assertIn('gestion_request_duration_seconds_bucket{method="GET",view="atletas_list",le="10"} 1', body)
+        self.assertIn('gestion_request_duration_seconds_bucket{method="GET",view="atletas_list",le="+Inf"} 2', body)
+
+    def test_staff_or_token_only(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.client.force_login(Usuario.objects.get(username="metrics_alumno"))
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.client.logout()
+        with override_settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer nope").status_code, 403)
+            self.scrape(HTTP_AUTHORIZATION="Bearer s3cret")
@@ -0,0 +1,42 @@
+from django.test import TestCase
+from django.urls import reverse
+from gestion.models import Usuario, Grupo
+from gestion.pagination import keyset_page
+
+
+class AtletasKeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        grupo = Grupo.objects.create(nombre="Juveniles")
+        # Nombres repetidos para ejercitar el desempate por apellido e id
+        for i in range(7):
+            Usuario.objects.create_user(username=f"at{i}", password="x", first_name="Ana" if i < 4 else "Beto",
+                                        last_name="Ruiz" if i % 2 else "Díaz", rol="ALUMNO", grupo=grupo)
+        self.staff = Usuario.objects.create_user(username="staff12", password="x", is_staff=True, rol="ENTRENADOR")
+        self.client.force_login(self.staff)
+
+    def test_pages_cover_all_rows_once_in_order(self):
+        qs = Usuario.objects.filter(rol="ALUMNO")
+        expected = list(qs.order_by("first_name", "last_name", "id"))
+        seen, cursor = [], None
+        while True:
+            rows, cursor, start = keyset_page(qs, cursor, size=3)
+            self.assertEqual(start, len(seen) + 1)
+            seen.extend(rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_scroll_request_returns_rows_only_without_count(self):
+        _, cursor, _ = keyset_page(Usuario.objects.filter(rol="ALUMNO"), size=3)
+        # sesión + usuario + filas (con grupo en el mismo JOIN); sin COUNT(*)
+        with self.assertNumQueries(3) as ctx:
+            resp = self.client.get(reverse("atletas_list"), {"after": cursor}, HTTP_HX_REQUEST="true")
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+        content = resp.content.decode()
+        self.assertTrue(content.lstrip().startswith("<tr"))
+        self.assertNotIn("<table", content)
+        self.assertEqual(content.count('id="atleta-row-'), 4)
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(reverse("atletas_list"), {"after": "no-es-un-cursor"}, HTTP_HX_REQUEST="true")
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,84 @@
+import pstats
+import shutil
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from gestion.models import Usuario, Grupo, PerfilRequest
+
+
+class ProfilingTestCase(TestCase):
+    def setUp(self):
+        self.profiles_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiles_dir)
+        self.settings_override = override_settings(PROFILES_DIR=self.profiles_dir)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.admin = Usuario.objects.create_superuser(username="perfil_admin", password="x", email="p@example.com", rol="ADMINISTRADOR")
+        grupo = self.grupo = Grupo.objects.create(nombre="G15")
+        Usuario.objects.create_user(username="perfil_alumno", password="x", first_name="Ana", rol="ALUMNO", grupo=grupo)
+
+    def test_staff_query_flag_saves_profile(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("atletas_list") + "?_profile=1")
+        self.assertEqual(response.status_code, 200)
+        perfil = PerfilRequest.objects.get()
+        self.assertEqual(response["X-Profile-Id"], str(perfil.pk))
+        self.assertEqual((perfil.metodo, perfil.vista, perfil.estado), ("GET", "atletas_list", 200))
+        self.assertGreater(perfil.consultas, 0)
+        self.assertIn("ncalls", perfil.resumen)
+        self.assertTrue((Path(self.profiles_dir) / perfil.archivo).is_file())
+
+    def _funciones(self, perfil):
+        stats = pstats.Stats(str(Path(self.profiles_dir) / perfil.archivo))
+        return {funcion for _, _, funcion in stats.stats}
+
+    def test_async_view_functions_are_profiled(self):
+        self.client.force_login(self.admin)
+        url = reverse("asistencia_diaria", kwargs={"grupo": self.grupo.pk, "fecha": date.today().isoformat()})
+        self.client.get(url + "?_profile=1")
+        funciones = self._funciones(PerfilRequest.objects.get())
+        # La corrutina corre en el hilo del event loop; lo que pasa a sync_to_async, en este
+        self.assertIn("daily_attendance", funciones)
+        self.assertIn("eligible_students", funciones)
+
+    async def test_async_streaming_body_is_profiled(self):
+        await sync_to_async(self.async_client.force_login)(self.admin)
+        response = await self.async_client.get(reverse("download_asistencias", kwargs={"grupo": self.grupo.pk}) + "?_profile=1")
+        self.assertTrue(response.is_async)
+        b"".join([chunk async for chunk in response.streaming_content])
+        funciones = self._funciones(await PerfilRequest.objects.aget())
+        self.assertIn("download_attendance_summary", funciones)
+        self.assertIn("_acsv_chunks", funciones)
+
+    def test_header_trigger(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse("atletas_list"), HTTP_X_PROFILE="1")
+        self.assertEqual(PerfilRequest.objects.count(), 1)
+
+    def test_not_profiled_without_flag_or_for_non_staff(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse("atletas_list"))
+        self.client.force_login(Usuario.objects.get(username="perfil_alumno"))
+        response = self.client.get(reverse("portal_index") + "?_profile=1")
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(PerfilRequest.objects.exists())
+
+    def test_admin_shows_and_downloads_profile(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse("atletas_list") + "?_profile=1")
+        perfil = PerfilRequest.objects.get()
+
+        response = self.client.get(reverse("admin:gestion_perfilrequest_change", args=[perfil.pk]))
+        self.assertContains(response, "ncalls")
+        response = self.client.get(reverse("admin:gestion_perfilrequest_download", args=[perfil.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content))
+
+        self.client.post(reverse("admin:gestion_perfilrequest_delete", args=[perfil.pk]), {"post": "yes"})
+        self.assertFalse(PerfilRequest.objects.exists())
+        self.assertFalse((Path(self.profiles_dir) / perfil.archivo).exists())
@@ -0,0 +1,110 @@
+from datetime import date
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import reverse
+from gestion import benchmarks
+from gestion.models import Asistencia, Grupo, Pago, Usuario
+from gestion.querycount import QueryBudgetMixin, QueryInspectorMiddleware, QueryRecorder, sql_shape
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Suficientes filas por grupo para que un N+1 supere el umbral
+        cls.config = benchmarks.dataset_config(grupos=2, atletas_por_grupo=8, temporadas=1)
+        cls.admin, _ = benchmarks.preparar_datos(cls.config)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_views_and_api_lists_within_budget(self):
+        for caso in benchmarks.casos():
+            with self.subTest(caso.nombre):
+                self.assertQueryBudget(caso.url)
+
+    def test_htmx_attendance_toggle_within_budget(self):
+        asistencia = Asistencia.objects.first()
+        self.assertQueryBudget(reverse("htmx_update_asistencia", kwargs={"pk": asistencia.pk}), method="post")
+
+    def test_admin_changelists_without_n_plus_one(self):
+        for model in (Pago, Asistencia, Usuario):
+            with self.subTest(model._meta.model_name):
+                url = reverse(f"admin:gestion_{model._meta.model_name}_changelist")
+                # Presupuesto fijo: sesión, usuario, conteos y una página con sus FK en el mismo JOIN
+                self.assertQueryBudget(url, budget=8)
+
+    def test_admin_delete_confirmation_without_n_plus_one(self):
+        # La confirmación de borrado lista str(pago), que usa el alumno
+        ids = list(Pago.objects.values_list("pk", flat=True)[:10])
+        self.assertQueryBudget(
+            reverse("admin:gestion_pago_changelist"), budget=12, method="post",
+            data={"action": "delete_selected", "_selected_action": ids},
+        )
+
+
+class QueryShapeTestCase(TestCase):
+    def test_shapes_ignore_literals(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM "t" WHERE "id" = 12 AND "n" = \'ana\''),
+            sql_shape('SELECT * FROM "t" WHERE "id" = 7 AND "n" = \'luis\''),
+        )
+        self.assertEqual(sql_shape('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'), "SELECT ? FROM t WHERE id IN (...)")
+
+    def test_repeated_queries_are_flagged(self):
+        usuarios = [Usuario.objects.create_user(username=f"qb{i}", password="x") for i in range(6)]
+        with QueryRecorder() as recorder:
+            for u in usuarios:
+                Usuario.objects.get(pk=u.pk)
+        self.assertEqual(len(recorder), 6)
+        self.assertEqual(recorder.repeated_shapes(threshold=5)[0][1], 6)
+
+    @override_settings(QUERY_INSPECTOR=True)
+    def test_middleware_logs_budget_overrun_in_debug(self):
+        from gestion import views
+        staff = Usuario.objects.create_user(username="qbstaff", password="x", is_staff=True, rol="ENTRENADOR")
+        client = Client()
+        client.force_login(staff)
+        with patch.object(views.atletas_row, "query_budget", 1), self.assertLogs("gestion.querycount", level="WARNING") as logs:
+            response = client.get(reverse("atletas_row", kwargs={"pk": staff.pk}))
+        self.assertIn("X-Query-Count", response)
+        self.assertIn("presupuesto 1", logs.output[0])
+
+
+@override_settings(QUERY_INSPECTOR=True)
+class StreamedBodyQueriesTestCase(TestCase):
+    """Las consultas de una exportación en streaming corren al enviar el cuerpo y también cuentan."""
+
+    def setUp(self):
+        self.grupo = Grupo.objects.create(nombre="G24")
+        self.staff = Usuario.objects.create_user(username="qbstream", password="x", is_staff=True, rol="ENTRENADOR")
+        alumno = Usuario.objects.create_user(username="qbalumno", password="x", rol="ALUMNO", grupo=self.grupo)
+        Asistencia.objects.create(alumno=alumno, fecha=date(2025, 3, 3), presente=True)
+        self.url = reverse("download_asistencias", kwargs={"grupo": self.grupo.pk})
+
+    def assertExportQueryRecorded(self, report):
+        recorder = report.call_args.args[2]
+        # La consulta principal de la exportación (alumnos con sus totales) se hace al iterar
+        self.assertTrue(any("COUNT(" in sql and "gestion_usuario" in sql for sql, _ in recorder.queries))
+
+    def test_sync_body(self):
+        client = Client()
+        client.force_login(self.staff)
+        with patch.object(QueryInspectorMiddleware, "_report", autospec=True) as report:
+            response = client.get(self.url)
+            report.assert_not_called()
+            response.getvalue()
+        report.assert_called_once()
+        self.assertExportQueryRecorded(report)
+
+    async def test_async_body(self):
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.staff)
+        with patch.object(QueryInspectorMiddleware, "_report", autospec=True) as report:
+            response = await client.get(self.url)
+            self.assertTrue(response.is_async)
+            report.assert_not_called()
+            b"".join([chunk async for chunk in response.streaming_content])
+        report.assert_called_once()
+        self.assertExportQueryRecorded(report)
@@ -0,0 +1,172 @@
+import shutil
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from gestion import replicas
+from gestion.models import Usuario, Grupo, Asistencia
+
+
+@override_settings(READ_REPLICA_ALIAS="replica", READ_REPLICA_STANDIN_PATH=None)
+class ReplicaRoutingTestCase(TransactionTestCase):
+    # "replica" es un espejo de la base de pruebas: se comprueba a qué alias va cada lectura
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        # La LocMemCache de las pruebas hace de caché compartida
+        shared = mock.patch("gestion.replicas.cache_is_shared", return_value=True)
+        shared.start()
+        self.addCleanup(shared.stop)
+        self.grupo = Grupo.objects.create(nombre="G21")
+        self.ana = Usuario.objects.create_user(username="rep_ana", password="x", rol="ENTRENADOR", grupo=self.grupo)
+        self.beto = Usuario.objects.create_user(username="rep_beto", password="x", rol="ENTRENADOR", grupo=self.grupo)
+        self.alumno = Usuario.objects.create_user(username="rep_alumno", password="x", rol="ALUMNO", grupo=self.grupo)
+        self.client = APIClient()
+
+    def test_router(self):
+        router = replicas.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Usuario))
+        estado = replicas._Estado()
+        token = replicas._estado.set(estado)
+        try:
+            estado.alias = "replica"
+            self.assertEqual(router.db_for_read(Usuario), "replica")
+            self.assertIsNone(router.db_for_read(Session))
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(Usuario))
+            self.assertEqual(router.db_for_write(Usuario), "default")
+            self.assertTrue(estado.wrote)
+            self.assertIsNone(router.db_for_read(Usuario))
+        finally:
+            replicas._estado.reset(token)
+        self.assertFalse(router.allow_migrate("replica", "gestion"))
+        self.assertIsNone(router.allow_migrate("default", "gestion"))
+
+    def test_api_reads_go_to_replica_until_own_write(self):
+        url = reverse("asistencia-list")
+
+        self.client.force_authenticate(self.ana)
+        self.assertEqual(self.client.get(url)["X-Read-From"], "replica")
+        response = self.client.post(url, {"alumno": self.alumno.pk, "fecha": "2025-04-01", "presente": True}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["X-Read-From"], "default")
+        # Quien escribió lee la principal durante READ_REPLICA_STICKY_SECONDS
+        self.assertEqual(self.client.get(url)["X-Read-From"], "default")
+
+        self.client.force_authenticate(self.beto)
+        self.assertEqual(self.client.get(url)["X-Read-From"], "replica")
+
+        with override_settings(READ_REPLICA_STICKY_SECONDS=0):
+            self.client.force_authenticate(self.ana)
+            self.assertEqual(self.client.get(url)["X-Read-From"], "replica")
+
+    def test_no_replica_configured(self):
+        self.client.force_authenticate(self.ana)
+        with override_settings(READ_REPLICA_ALIAS=None):
+            self.assertEqual(self.client.get(reverse("asistencia-list"))["X-Read-From"], "default")
+
+
+@override_settings(READ_REPLICA_ALIAS="replica", READ_REPLICA_STANDIN_PATH=None)
+class ReplicaStickyCookieTestCase(TransactionTestCase):
+    """Caché por proceso: el read-your-writes depende de la cookie firmada."""
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.grupo = Grupo.objects.create(nombre="G23")
+        self.ana = Usuario.objects.create_user(username="rep_ana", password="x", rol="ENTRENADOR", grupo=self.grupo)
+        self.alumno = Usuario.objects.create_user(username="rep_alumno", password="x", rol="ALUMNO", grupo=self.grupo)
+        self.url = reverse("asistencia-list")
+
+    def test_cookie_keeps_writer_on_primary_in_another_worker(self):
+        client = APIClient()
+        client.force_login(self.ana)
+        self.assertEqual(client.get(self.url)["X-Read-From"], "replica")
+        response = client.post(self.url, {"alumno": self.alumno.pk, "fecha": "2025-04-01", "presente": True}, format="json")
+        self.assertIn(replicas.STICKY_COOKIE, response.cookies)
+        # Otro worker: su caché no sabe de la escritura
+        cache.clear()
+        self.assertEqual(client.get(self.url)["X-Read-From"], "default")
+
+        # La cookie de otro usuario no cuenta
+        otro = APIClient()
+        otro.force_login(self.alumno)
+        otro.cookies[replicas.STICKY_COOKIE] = client.cookies[replicas.STICKY_COOKIE].value
+        self.assertEqual(otro.get(self.url)["X-Read-From"], "replica")
+
+    def test_clients_without_cookies_read_primary(self):
+        client = APIClient()
+        client.force_authenticate(self.ana)
+        self.assertEqual(client.get(self.url)["X-Read-From"], "default")
+        with mock.patch("gestion.replicas.cache_is_shared", return_value=True):
+            self.assertEqual(client.get(self.url)["X-Read-From"], "replica")
+
+
+class ReplicaStandinTestCase(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        shared = mock.patch("gestion.replicas.cache_is_shared", return_value=True)
+        shared.start()
+        self.addCleanup(shared.stop)
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.path = Path(tmp) / "replica.sqlite3"
+        self.settings_override = override_settings(
+            READ_REPLICA_ALIAS="replica", READ_REPLICA_STANDIN_PATH=self.path, READ_REPLICA_REFRESH_INTERVAL=None,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        conn = connections["replica"]
+        self.addCleanup(conn.settings_dict.__setitem__, "NAME", conn.settings_dict["NAME"])
+        self.addCleanup(conn.close)
+        conn.close()
+        conn.settings_dict["NAME"] = str(self.path)
+
+        self.grupo = Grupo.objects.create(nombre="G22")
+        self.ana = Usuario.objects.create_user(username="rep_ana", password="x", rol="ENTRENADOR", grupo=self.grupo)
+        self.alumno = Usuario.objects.create_user(username="rep_alumno", password="x", rol="ALUMNO", grupo=self.grupo)
+        self.client = APIClient()
+        self.client.force_authenticate(self.ana)
+
+    def test_standin_copy_and_read_your_writes(self):
+        url = reverse("asistencia-list")
+        # Sin copia se lee la principal
+        self.assertEqual(self.client.get(url)["X-Read-From"], "default")
+
+        replicas.refresh_standin()
+        Asistencia.objects.create(alumno=self.alumno, fecha=date(2025, 4, 2), presente=True)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Read-From"], "replica")
+        self.assertEqual(response.json()["count"], 0)
+
+        # La escritura propia se ve aunque la copia sea anterior
+        self.client.post(url, {"alumno": self.alumno.pk, "fecha": "2025-04-03", "presente": True}, format="json")
+        response = self.client.get(url)
+        self.assertEqual((response["X-Read-From"], response.json()["count"]), ("default", 2))
+
+        # Con una copia posterior a la escritura se vuelve a la réplica
+        replicas.refresh_standin()
+        response = self.client.get(url)
+        self.assertEqual((response["X-Read-From"], response.json()["count"]), ("replica", 2))
+
+    def test_lagging_standin_is_not_used(self):
+        replicas.refresh_standin()
+        with override_settings(READ_REPLICA_MAX_LAG=-1):
+            self.assertEqual(self.client.get(reverse("asistencia-list"))["X-Read-From"], "default")
+
+    def test_dashboard_reads_from_standin(self):
+        replicas.refresh_standin()
+        self.client.force_login(self.ana)
+        response = self.client.get(reverse("portal_index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Read-From"], "replica")
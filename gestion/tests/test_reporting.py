@@ -0,0 +1,111 @@
+import shutil
+import sqlite3
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from gestion import replicas, reporting
+from gestion.models import Usuario, Grupo, Asistencia, Pago, SessionDay
+
+
+class ReportingSnapshotTestCase(TransactionTestCase):
+    databases = {"default", "reporting", "replica"}
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.path = Path(tmp) / "reporting.sqlite3"
+        self.settings_override = override_settings(REPORTING_SNAPSHOT_PATH=self.path, REPORTING_SNAPSHOT_INTERVAL=None)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        # El alias "reporting" es un espejo de la base de pruebas: se apunta a la copia
+        conn = connections[reporting.REPORTING_ALIAS]
+        self.addCleanup(conn.settings_dict.__setitem__, "NAME", conn.settings_dict["NAME"])
+        self.addCleanup(conn.close)
+        conn.close()
+        conn.settings_dict["NAME"] = str(self.path)
+
+        self.grupo = Grupo.objects.create(nombre="G19")
+        self.ana = Usuario.objects.create_user(username="rep_ana", password="x", first_name="Ana", rol="ALUMNO", grupo=self.grupo)
+        Asistencia.objects.create(alumno=self.ana, fecha=date(2025, 3, 3), presente=True)
+        Pago.objects.create(alumno=self.ana, fecha_pago=date(2025, 3, 1), numero_referencia="R1", tipo_transaccion="EFECTIVO")
+        self.admin = Usuario.objects.create_superuser(username="rep_admin", password="x", email="r@example.com", rol="ADMINISTRADOR")
+        self.client.force_login(self.admin)
+
+    def test_exports_read_the_snapshot(self):
+        url = reverse("download_asistencias", kwargs={"grupo": self.grupo.pk})
+        self.assertEqual(self.client.get(url)["X-Report-Snapshot"], "live")
+
+        reporting.take_snapshot()
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM gestion_asistencia").fetchone()[0], 1)
+        # Escrituras posteriores a la copia no aparecen en el reporte hasta la siguiente
+        Usuario.objects.create_user(username="rep_beto", password="x", first_name="Beto", rol="ALUMNO", grupo=self.grupo)
+        response = self.client.get(url)
+        self.assertNotEqual(response["X-Report-Snapshot"], "live")
+        self.assertIn("X-Report-Snapshot-Age", response)
+        self.assertRegex(response["Content-Disposition"], rf'filename="asistencias_grupo_{self.grupo.pk}_datos-\d{{8}}-\d{{4}}\.csv"')
+        contenido = response.getvalue().decode()
+        self.assertIn("Ana", contenido)
+        self.assertNotIn("Beto", contenido)
+
+        reporting.take_snapshot()
+        self.assertIn("Beto", self.client.get(url).getvalue().decode())
+
+    @override_settings(READ_REPLICA_ALIAS="replica", READ_REPLICA_STANDIN_PATH=None)
+    def test_snapshot_exports_skip_the_replica(self):
+        url = reverse("download_asistencias", kwargs={"grupo": self.grupo.pk})
+        self.assertEqual(self.client.get(url)["X-Read-From"], "replica")
+
+        reporting.take_snapshot()
+        with mock.patch.object(replicas, "_replica_for", wraps=replicas._replica_for) as replica_for:
+            response = self.client.get(url)
+        self.assertNotEqual(response["X-Report-Snapshot"], "live")
+        self.assertNotIn("X-Read-From", response)
+        replica_for.assert_not_called()
+
+    def test_admin_monthly_report_uses_snapshot(self):
+        reporting.take_snapshot()
+        Pago.objects.create(alumno=self.ana, fecha_pago=date(2025, 3, 2), numero_referencia="R2", tipo_transaccion="EFECTIVO")
+        response = self.client.get(reverse("admin:pagos_download_monthly_report"), {"month": 3, "year": 2025})
+        self.assertIn("X-Report-Snapshot-Age", response)
+        self.assertIn("R1", response.content.decode())
+        self.assertNotIn("R2", response.content.decode())
+
+    def test_todays_exports_read_live(self):
+        hoy = date.today()
+        SessionDay.objects.create(grupo=self.grupo, fecha=hoy, active=True)
+        reporting.take_snapshot()
+        Asistencia.objects.create(alumno=self.ana, fecha=hoy, presente=True)
+
+        response = self.client.get(reverse("download_asistencias_diaria", kwargs={"grupo": self.grupo.pk, "fecha": hoy.isoformat()}))
+        self.assertEqual(response["X-Report-Snapshot"], "live")
+        self.assertIn("Presente", response.getvalue().decode())
+        response = self.client.get(reverse("download_asistencias_semana", kwargs={"grupo": self.grupo.pk, "semana": str(hoy.isocalendar()[1])}))
+        self.assertEqual(response["X-Report-Snapshot"], "live")
+        self.assertIn("Presente", response.getvalue().decode())
+        # Un día pasado sí usa la copia
+        SessionDay.objects.create(grupo=self.grupo, fecha=date(2025, 3, 3), active=True)
+        reporting.take_snapshot()
+        response = self.client.get(reverse("download_asistencias_diaria", kwargs={"grupo": self.grupo.pk, "fecha": "2025-03-03"}))
+        self.assertNotEqual(response["X-Report-Snapshot"], "live")
+
+    def test_stale_snapshot_falls_back_to_live(self):
+        reporting.take_snapshot()
+        Usuario.objects.create_user(username="rep_beto", password="x", first_name="Beto", rol="ALUMNO", grupo=self.grupo)
+        with override_settings(REPORTING_SNAPSHOT_MAX_AGE=-1):
+            response = self.client.get(reverse("download_asistencias", kwargs={"grupo": self.grupo.pk}))
+        self.assertEqual(response["X-Report-Snapshot"], "live")
+        self.assertIn("Beto", response.getvalue().decode())
+
+
+class ReportingRouterTestCase(TestCase):
+    def test_reporting_alias_is_never_migrated(self):
+        router = reporting.ReportingRouter()
+        self.assertFalse(router.allow_migrate("reporting", "gestion"))
+        self.assertIsNone(router.allow_migrate("default", "gestion"))
+        self.assertIsNone(router.db_for_read(Usuario))
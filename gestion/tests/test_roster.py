@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+from django.test import Client, TestCase
+from rest_framework.test import APIClient
+from gestion.models import Usuario, Grupo, Asistencia, SessionDay
+
+
+class GrupoRosterTestCase(TestCase):
+    def setUp(self):
+        self.staff = Usuario.objects.create_user(username="staff5", password="staffpass", is_staff=True)
+        self.grupo = Grupo.objects.create(nombre="G5")
+        self.otro_grupo = Grupo.objects.create(nombre="G6")
+        self.fecha = date.today()
+        self.ana = Usuario.objects.create_user(username="ana", first_name="Ana", rol="ALUMNO", grupo=self.grupo)
+        self.beto = Usuario.objects.create_user(username="beto", first_name="Beto", rol="ALUMNO", grupo=self.grupo)
+        # Inactivo desde ayer: no debe aparecer
+        Usuario.objects.create_user(username="caro", first_name="Caro", rol="ALUMNO", grupo=self.grupo,
+                                    inactivo_desde=self.fecha - timedelta(days=1))
+        Usuario.objects.create_user(username="dani", first_name="Dani", rol="ALUMNO", grupo=self.otro_grupo)
+        Asistencia.objects.create(alumno=self.ana, fecha=self.fecha, presente=True)
+        SessionDay.objects.create(grupo=self.grupo, fecha=self.fecha, active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_roster_for_date(self):
+        url = f"/api/grupos/{self.grupo.pk}/roster/?fecha={self.fecha.isoformat()}"
+        # grupo + alumnos + asistencias + session day
+        with self.assertNumQueries(4):
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.data["session_active"])
+        estudiantes = resp.data["estudiantes"]
+        self.assertEqual([e["username"] for e in estudiantes], ["ana", "beto"])
+        self.assertTrue(estudiantes[0]["asistencia"]["presente"])
+        self.assertIsNone(estudiantes[1]["asistencia"])
+
+    def test_roster_invalid_fecha(self):
+        resp = self.client.get(f"/api/grupos/{self.grupo.pk}/roster/?fecha=ayer")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_daily_attendance_view_uses_same_roster(self):
+        client = Client()
+        client.force_login(self.staff)
+        resp = client.get(f"/gestion/asistencias/{self.grupo.pk}/{self.fecha.isoformat()}/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([e.username for e in resp.context["estudiantes"]], ["ana", "beto"])
+        self.assertTrue(resp.context["session_active"])
@@ -0,0 +1,33 @@
+from unittest import mock
+
+from django.test import TestCase
+from drf_spectacular.generators import SchemaGenerator
+from gestion.api.schema import clear_schema_cache
+
+
+class SchemaCacheTestCase(TestCase):
+    def setUp(self):
+        clear_schema_cache()
+
+    def test_schema_generated_once_and_served_with_etag(self):
+        with mock.patch.object(SchemaGenerator, "get_schema", autospec=True, side_effect=SchemaGenerator.get_schema) as get_schema:
+            resp = self.client.get("/api/schema/")
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn("max-age=", resp["Cache-Control"])
+            etag = resp["ETag"]
+
+            resp = self.client.get("/api/schema/")
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp["ETag"], etag)
+            self.assertEqual(get_schema.call_count, 1)
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get("/api/schema/")["ETag"]
+        resp = self.client.get("/api/schema/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_json_format_has_its_own_etag(self):
+        yaml_etag = self.client.get("/api/schema/")["ETag"]
+        resp = self.client.get("/api/schema/?format=json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], yaml_etag)
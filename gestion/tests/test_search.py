@@ -0,0 +1,56 @@
+from django.test import TestCase
+from django.urls import reverse
+from gestion.importer import import_athletes
+from gestion.models import Usuario, Grupo
+from gestion.search import search_users
+
+
+class UserSearchTestCase(TestCase):
+    def setUp(self):
+        self.grupo = Grupo.objects.create(nombre="Juveniles")
+        self.jose = Usuario.objects.create_user(username="jperez", password="x", first_name="José", last_name="Pérez", rol="ALUMNO", grupo=self.grupo)
+        self.maria = Usuario.objects.create_user(username="mlopez", password="x", first_name="María", last_name="López", rol="ALUMNO", grupo=self.grupo)
+        self.staff = Usuario.objects.create_user(username="staff11", password="x", is_staff=True)
+
+    def _search(self, q):
+        return set(search_users(Usuario.objects.all(), q).values_list("username", flat=True))
+
+    def test_prefix_and_accent_insensitive(self):
+        self.assertEqual(self._search("jose per"), {"jperez"})
+        self.assertEqual(self._search("LOP"), {"mlopez"})
+        self.assertEqual(self._search("zzz"), set())
+
+    def test_index_follows_updates_and_deletes(self):
+        self.maria.last_name = "Gómez"
+        self.maria.save()
+        self.assertEqual(self._search("lopez"), set())
+        self.assertEqual(self._search("gomez"), {"mlopez"})
+        self.jose.delete()
+        self.assertEqual(self._search("jose"), set())
+
+    def test_bulk_import_is_indexed(self):
+        import_athletes([{"first_name": "Ana", "last_name": "Ruiz", "grupo": "juveniles"}])
+        self.assertEqual(self._search("ana ruiz"), {"aruiz"})
+
+    def test_api_q_filter(self):
+        self.client.force_login(self.staff)
+        resp = self.client.get("/api/users/", {"q": "maria"})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        results = data["results"] if isinstance(data, dict) else data
+        self.assertEqual([u["username"] for u in results], ["mlopez"])
+
+    def test_atletas_live_search_returns_table_fragment(self):
+        self.client.force_login(self.staff)
+        resp = self.client.get(reverse("atletas_list"), {"q": "pere"}, HTTP_HX_REQUEST="true", HTTP_HX_TARGET="atletas-tabla")
+        self.assertEqual(resp.status_code, 200)
+        content = resp.content.decode()
+        self.assertNotIn("<html", content)
+        self.assertIn("Pérez", content)
+        self.assertNotIn("López", content)
+
+    def test_admin_search(self):
+        admin = Usuario.objects.create_superuser(username="root", password="x", email="r@example.com")
+        self.client.force_login(admin)
+        resp = self.client.get(reverse("admin:gestion_usuario_changelist"), {"q": "maría"})
+        self.assertEqual(list(resp.context["cl"].result_list), [self.maria])
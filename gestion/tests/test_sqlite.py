@@ -0,0 +1,64 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from gestion import benchmarks, sqlite
+
+
+@skipUnless(connection.vendor == "sqlite", "Perfil de SQLite")
+class SqliteProfileTestCase(TestCase):
+    def test_pragmas_applied_to_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS["busy_timeout"])
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+    def test_wal_on_file_database(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(Path(tmp) / "x.sqlite3")
+            sqlite.apply_pragmas(conn, settings.SQLITE_PRAGMAS)
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            conn.close()
+
+    def test_concurrency_benchmark(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = str(Path(tmp) / "base.sqlite3")
+            benchmarks.sembrar_sqlite(base, filas=500)
+            r = benchmarks.sqlite_concurrency(base, settings.SQLITE_PRAGMAS, lectores=1, escritores=2, segundos=0.2)
+            self.assertGreater(r["escrituras_s"], 0)
+            self.assertGreater(r["lecturas_s"], 0)
+            r = benchmarks.sqlite_concurrency(base, settings.SQLITE_PRAGMAS, lectores=1, escritores=2, segundos=0.2, agrupar_ms=2)
+            self.assertGreater(r["escrituras_s"], 0)
+            self.assertEqual(r["errores_locked"], 0)
+            self.assertEqual(sorted(p.name for p in Path(tmp).iterdir()), ["base.sqlite3"])
+
+
+@skipUnless(connection.vendor == "sqlite", "Perfil de SQLite")
+class SqliteOptimizeTestCase(TransactionTestCase):
+    # Sin la transacción de TestCase: el checkpoint no puede correr dentro de una
+    def test_periodic_optimize(self):
+        self.assertEqual(len(sqlite.optimize()), 3)
+        sqlite._last_optimize["at"] = 0
+        with override_settings(SQLITE_OPTIMIZE_INTERVAL=60):
+            self.client.get("/")
+        self.assertGreater(sqlite._last_optimize["at"], 0)
+
+    def test_read_only_aliases_are_skipped(self):
+        # Como "reporting" y "replica": query_only en sus PRAGMAS
+        conn = connections["default"]
+        conn.settings_dict["PRAGMAS"] = {"query_only": "ON"}
+        self.addCleanup(conn.settings_dict.pop, "PRAGMAS")
+        with conn.cursor() as cursor:
+            cursor.execute("PRAGMA query_only=ON")
+        self.addCleanup(lambda: conn.cursor().execute("PRAGMA query_only=OFF"))
+        self.assertIsNone(sqlite.optimize())
+        sqlite._last_optimize["at"] = 0
+        with override_settings(SQLITE_OPTIMIZE_INTERVAL=60), self.assertNoLogs("gestion.sqlite", level="ERROR"):
+            sqlite.on_request_finished(None)
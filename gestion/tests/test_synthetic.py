@@ -0,0 +1,33 @@
+from datetime import date
+
+from django.test import TestCase
+from gestion.models import Asistencia, Pago, SessionDay, Usuario
+from gestion.synthetic import ConfigClub, borrar_club, generar_club
+
+
+class SyntheticClubTestCase(TestCase):
+    config = ConfigClub(grupos=2, atletas_por_grupo=5, temporadas=1, semilla=7, hoy=date(2025, 3, 31))
+
+    def _snapshot(self):
+        return (
+            list(Usuario.objects.filter(username__startswith="sim_").order_by("username").values_list("username", "first_name", "uuid", "inactivo_desde")),
+            list(Asistencia.objects.order_by("alumno__username", "fecha").values_list("alumno__username", "fecha", "presente")),
+            list(Pago.objects.order_by("numero_referencia").values_list("numero_referencia", "alumno__username", "fecha_pago")),
+        )
+
+    def test_generation_is_deterministic_and_consistent(self):
+        counts = generar_club(self.config)
+        self.assertEqual(counts["usuarios"], 10)
+        self.assertEqual(counts["asistencias"], Asistencia.objects.count())
+        self.assertGreater(counts["asistencias"], 0)
+        # Sin asistencias antes del alta ni en sesiones canceladas
+        self.assertFalse(Asistencia.objects.filter(fecha__gt=self.config.hoy).exists())
+        for a in Asistencia.objects.select_related("alumno"):
+            self.assertGreaterEqual(a.fecha, a.alumno.date_joined.date())
+            self.assertTrue(SessionDay.objects.filter(grupo=a.alumno.grupo, fecha=a.fecha, active=True).exists())
+
+        primera = self._snapshot()
+        self.assertEqual(borrar_club("sim"), 10)
+        self.assertEqual(Asistencia.objects.count(), 0)
+        generar_club(self.config)
+        self.assertEqual(self._snapshot(), primera)
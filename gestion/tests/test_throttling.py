@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from gestion import throttling
+from gestion.models import Usuario, Grupo, Asistencia
+from django.utils import timezone
+
+
+class ThrottlingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = Usuario.objects.create_user(username="staff4", password="staffpass", is_staff=True)
+        self.grupo = Grupo.objects.create(nombre="G4")
+        self.alumno = Usuario.objects.create_user(username="alumno4", password="alumnopass", rol="ALUMNO", grupo=self.grupo)
+
+    @override_settings(THROTTLE_BUCKETS={"token": {"ip": ("1/min", 2)}})
+    def test_token_endpoint_returns_429_with_retry_after(self):
+        client = APIClient()
+        url = reverse("token_obtain_pair")
+        for _ in range(2):
+            resp = client.post(url, {"username": "staff4", "password": "staffpass"}, format="json")
+            self.assertEqual(resp.status_code, 200)
+        resp = client.post(url, {"username": "staff4", "password": "staffpass"}, format="json")
+        self.assertEqual(resp.status_code, 429)
+        self.assertIn("Retry-After", resp)
+
+    @override_settings(THROTTLE_BUCKETS={"api": {"user": ("1/min", 1)}})
+    def test_api_bucket_is_per_user(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        self.assertEqual(client.get("/api/grupos/").status_code, 200)
+        self.assertEqual(client.get("/api/grupos/").status_code, 429)
+
+        other = APIClient()
+        other.force_authenticate(self.alumno)
+        self.assertEqual(other.get("/api/grupos/").status_code, 200)
+
+    @override_settings(THROTTLE_BUCKETS={"htmx": {"user": ("1/min", 1)}})
+    def test_htmx_write_view_is_throttled(self):
+        self.client.force_login(self.staff)
+        asistencia = Asistencia.objects.create(alumno=self.alumno, fecha=timezone.now().date())
+        url = reverse("htmx_update_asistencia", kwargs={"pk": asistencia.pk})
+        self.assertEqual(self.client.post(url).status_code, 200)
+        resp = self.client.post(url)
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["Retry-After"], "60")
+
+    def test_rejected_request_debits_no_bucket(self):
+        user = throttling.TokenBucket("throttle:test:user:u1", "1/min", 2)
+        ip = throttling.TokenBucket("throttle:test:ip:1.2.3.4", "1/min", 1)
+        self.assertIsNone(throttling.consume([user, ip]))
+        self.assertIsNotNone(throttling.consume([user, ip]))
+        # El rechazo por IP no gastó la segunda ficha del usuario
+        self.assertIsNone(throttling.consume([user]))
+        self.assertIsNotNone(throttling.consume([user]))
+
+    # Sin límite de espera: el resultado no depende de cuánto tarde cada hilo
+    @mock.patch.object(throttling, "LOCK_WAIT", 30)
+    def test_concurrent_requests_do_not_lose_debits(self):
+        bucket = throttling.TokenBucket("throttle:test:user:u2", "1/min", 20)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: throttling.consume([bucket]), range(40)))
+        self.assertEqual(sum(r is None for r in results), 20)
+
+    def test_busy_lock_throttles_without_debiting(self):
+        bucket = throttling.TokenBucket("throttle:test:user:u3", "1/min", 2)
+        cache.add(f"{bucket.key}:lock", 1, 60)
+        self.assertEqual(throttling.consume([bucket]), throttling.LOCK_TIMEOUT)
+        cache.delete(f"{bucket.key}:lock")
+        self.assertIsNone(throttling.consume([bucket]))
+        self.assertIsNone(throttling.consume([bucket]))
+        self.assertIsNotNone(throttling.consume([bucket]))
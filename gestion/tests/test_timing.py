@@ -0,0 +1,75 @@
+import re
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from gestion import timing
+from gestion.models import Usuario, Grupo
+
+
+class ServerTimingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        timing.reset()
+        self.staff = Usuario.objects.create_user(username="staff14", password="x", is_staff=True, rol="ENTRENADOR")
+        self.grupo = Grupo.objects.create(nombre="G")
+        Usuario.objects.create_user(username="st1", password="x", first_name="Ana", rol="ALUMNO", grupo=self.grupo)
+        self.client.force_login(self.staff)
+
+    def tearDown(self):
+        timing.reset()
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("atletas_list"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_header_when_enabled(self):
+        timing.set_enabled(True)
+        response = self.client.get(reverse("atletas_list"))
+        header = response["Server-Timing"]
+        for metric in ("db;dur=", "tpl;dur=", "app;dur=", "total;dur="):
+            self.assertIn(metric, header)
+        self.assertRegex(header, r'desc="\d+ queries"')
+
+    def test_template_time_comes_from_the_backend(self):
+        timing.set_enabled(True)
+        header = self.client.get(reverse("atletas_list"))["Server-Timing"]
+        self.assertGreater(float(re.search(r"tpl;dur=([\d.]+)", header).group(1)), 0)
+
+    @override_settings(SERVER_TIMING_SLOW_MS=0)
+    def test_streamed_export_sql_is_measured(self):
+        timing.set_enabled(True)
+        with self.assertNoLogs("gestion.timing", level="WARNING"):
+            response = self.client.get(reverse("download_asistencias", kwargs={"grupo": self.grupo.pk}))
+        antes = int(re.search(r'desc="(\d+) queries"', response["Server-Timing"]).group(1))
+        with self.assertLogs("gestion.timing", level="WARNING") as logs:
+            b"".join(response.streaming_content)
+        # La consulta de las filas del CSV corre al generar el cuerpo
+        self.assertIn(f"in {antes + 1} queries", logs.output[0])
+
+    def test_header_only_for_staff(self):
+        timing.set_enabled(True)
+        self.client.force_login(Usuario.objects.get(username="st1"))
+        self.assertNotIn("Server-Timing", self.client.get(reverse("portal_index")))
+        self.client.logout()
+        self.assertNotIn("Server-Timing", self.client.get(reverse("account_login")))
+
+    @override_settings(SERVER_TIMING_SLOW_MS=0)
+    def test_slow_requests_are_logged_with_sql(self):
+        timing.set_enabled(True)
+        with self.assertLogs("gestion.timing", level="WARNING") as logs:
+            self.client.get(reverse("atletas_list"))
+        self.assertIn("Slow request GET", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    def test_staff_toggle(self):
+        response = self.client.post(reverse("server_timing_toggle"), {"enabled": "1"})
+        self.assertEqual(response.json(), {"enabled": True})
+        self.assertIn("Server-Timing", self.client.get(reverse("atletas_list")))
+        self.client.post(reverse("server_timing_toggle"), {"enabled": "0"})
+        self.assertNotIn("Server-Timing", self.client.get(reverse("atletas_list")))
+
+        alumno = Usuario.objects.get(username="st1")
+        self.client.force_login(alumno)
+        response = self.client.post(reverse("server_timing_toggle"), {"enabled": "1"})
+        self.assertEqual(response.status_code, 302)
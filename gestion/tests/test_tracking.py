@@ -0,0 +1,40 @@
+from django.test import TestCase
+from django.utils import timezone
+from gestion.models import Usuario
+
+
+class FieldTrackerTestCase(TestCase):
+    def setUp(self):
+        Usuario.objects.create_user(username="alumno7", password="x", rol="ALUMNO")
+
+    def test_changed_fields_without_query(self):
+        u = Usuario.objects.get(username="alumno7")
+        self.assertEqual(u.get_changed_fields(), {})
+        u.is_active = False
+        with self.assertNumQueries(0):
+            self.assertEqual(u.get_changed_fields(), {"is_active": (True, False)})
+
+    def test_deactivation_sets_inactivo_desde_with_single_update(self):
+        u = Usuario.objects.get(username="alumno7")
+        u.is_active = False
+        with self.assertNumQueries(1):
+            u.save()
+        self.assertEqual(Usuario.objects.get(pk=u.pk).inactivo_desde, timezone.now().date())
+        # The snapshot is refreshed after saving
+        self.assertEqual(u.get_changed_fields(), {})
+
+        u.is_active = True
+        u.save(update_fields=["is_active"])
+        self.assertIsNone(Usuario.objects.get(pk=u.pk).inactivo_desde)
+
+    def test_last_login_update_does_not_select(self):
+        u = Usuario.objects.get(username="alumno7")
+        u.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            u.save(update_fields=["last_login"])
+
+    def test_instance_without_snapshot_falls_back_to_query(self):
+        pk = Usuario.objects.get(username="alumno7").pk
+        u = Usuario(pk=pk, username="alumno7", is_active=False)
+        u._state.adding = False
+        self.assertIn("is_active", u.get_changed_fields())
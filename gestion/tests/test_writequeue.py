@@ -0,0 +1,94 @@
+import threading
+from datetime import date
+from unittest import mock
+
+from django.db import DatabaseError, IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from gestion import audit, writequeue
+from gestion.audit import audit_context
+from gestion.models import Usuario, Grupo, Asistencia, RegistroAuditoria
+
+
+class WriteCoalescerTestCase(TransactionTestCase):
+    def setUp(self):
+        grupo = Grupo.objects.create(nombre="G17")
+        self.alumnos = [
+            Usuario.objects.create_user(username=f"wq{i}", password="x", rol="ALUMNO", grupo=grupo) for i in range(6)
+        ]
+        self.coach = Usuario.objects.create_user(username="wq_coach", password="x", rol="ENTRENADOR")
+
+    def _concurrently(self, coalescer, fns):
+        resultados = [None] * len(fns)
+        barrera = threading.Barrier(len(fns))
+
+        def worker(i, fn):
+            barrera.wait()
+            try:
+                with audit_context(actor=self.coach):
+                    resultados[i] = coalescer.submit(fn)
+            except Exception as exc:
+                resultados[i] = exc
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=worker, args=(i, fn)) for i, fn in enumerate(fns)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        return resultados
+
+    def test_concurrent_writes_share_one_transaction(self):
+        # El lote se cierra al llegar a 6, no por la ventana
+        coalescer = writequeue.WriteCoalescer(window_ms=60_000, max_batch=6)
+        fecha = date(2025, 3, 3)
+        resultados = self._concurrently(coalescer, [
+            lambda a=a: Asistencia.objects.create(alumno=a, fecha=fecha, presente=True) for a in self.alumnos
+        ])
+        self.assertTrue(all(isinstance(r, Asistencia) and r.pk for r in resultados))
+        self.assertEqual(Asistencia.objects.filter(fecha=fecha).count(), 6)
+        self.assertEqual(coalescer.stats, {"lotes": 1, "escrituras": 6})
+        # La auditoría se atribuye al request de cada escritura
+        self.assertEqual(RegistroAuditoria.objects.filter(modelo="gestion.asistencia", actor=self.coach).count(), 6)
+
+    def test_failure_only_affects_its_request(self):
+        coalescer = writequeue.WriteCoalescer(window_ms=60_000, max_batch=2)
+        fecha = date(2025, 3, 5)
+        Asistencia.objects.create(alumno=self.alumnos[0], fecha=fecha, presente=True)
+        resultados = self._concurrently(coalescer, [
+            lambda: Asistencia.objects.create(alumno=self.alumnos[0], fecha=fecha, presente=True),
+            lambda: Asistencia.objects.create(alumno=self.alumnos[1], fecha=fecha, presente=True),
+        ])
+        self.assertEqual(sum(isinstance(r, IntegrityError) for r in resultados), 1)
+        self.assertEqual(sum(isinstance(r, Asistencia) for r in resultados), 1)
+        self.assertEqual(Asistencia.objects.filter(fecha=fecha).count(), 2)
+        # Solo la escritura confirmada queda auditada
+        self.assertEqual(RegistroAuditoria.objects.filter(modelo="gestion.asistencia", actor=self.coach).count(), 1)
+
+    def test_audit_failure_rolls_back_the_batch(self):
+        coalescer = writequeue.WriteCoalescer(window_ms=60_000, max_batch=1)
+        fecha = date(2025, 3, 7)
+        with mock.patch.object(audit, "flush", side_effect=DatabaseError("locked")):
+            with self.assertRaises(DatabaseError):
+                coalescer.submit(lambda: Asistencia.objects.create(alumno=self.alumnos[0], fecha=fecha, presente=True))
+        self.assertFalse(Asistencia.objects.filter(fecha=fecha).exists())
+
+
+@override_settings(ATTENDANCE_WRITE_COALESCING=True)
+class WriteQueueViewsTestCase(TestCase):
+    def setUp(self):
+        grupo = Grupo.objects.create(nombre="G18")
+        self.alumno = Usuario.objects.create_user(username="wq_alumno", password="x", rol="ALUMNO", grupo=grupo)
+        self.client.force_login(Usuario.objects.create_user(username="wq_staff", password="x", is_staff=True, rol="ENTRENADOR"))
+
+    def test_views_write_inline_inside_a_transaction(self):
+        # TestCase abre una transacción: submit() no puede confirmar por separado
+        response = self.client.post(reverse("htmx_create_asistencia", args=[self.alumno.pk]), {"fecha": "2025-03-03"})
+        self.assertEqual(response.status_code, 200)
+        asistencia = Asistencia.objects.get(alumno=self.alumno)
+        self.client.post(reverse("htmx_update_asistencia", args=[asistencia.pk]))
+        asistencia.refresh_from_db()
+        self.assertFalse(asistencia.presente)
+        self.client.post(reverse("htmx_delete_asistencia", args=[asistencia.pk]))
+        self.assertFalse(Asistencia.objects.exists())
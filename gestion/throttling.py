@@ -0,0 +1,157 @@
+"""Token-bucket throttling backed by Django's cache.
+
+Buckets are configured per scope in ``settings.THROTTLE_BUCKETS``; each scope
+has a per-user bucket (anonymous requests fall back to the client IP) and a
+per-IP bucket, both given as ``(rate, burst)`` where ``rate`` is the refill
+speed (``"120/min"``) and ``burst`` the bucket size.
+
+DRF views pick the scope from ``throttle_scope`` (default ``"api"``); plain
+Django views use the ``throttle`` decorator.
+
+A request takes one token from each of its buckets, or from none when any of
+them is empty. The read-modify-write runs under short per-bucket locks taken with
+``cache.add``, so concurrent requests do not overwrite each other's debits. A
+request that cannot take a lock within ``LOCK_WAIT`` is throttled rather than
+going on without it. The limits are best-effort, not a strict guarantee: a lock
+expires after ``LOCK_TIMEOUT``, so a holder stalled longer than that can overlap
+with the next one. With ``CACHE_TABLE`` each check costs a few small writes to
+the cache table (lock, buckets, unlock).
+
+The limits only hold across workers with a shared default cache
+(``CACHE_TABLE``); with the per-process LocMemCache each worker allows the full
+rate (see ``gestion.checks``).
+"""
+import math
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_SCOPE = "api"
+# Seconds a bucket lock is held at most (if its holder dies) and how long to wait for it
+LOCK_TIMEOUT = 1
+LOCK_WAIT = 0.1
+
+_PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+
+def parse_rate(rate):
+    """Parse ``"<num>/<period>"`` into tokens per second."""
+    num, period = rate.split("/")
+    return int(num) / _PERIODS[period]
+
+
+class TokenBucket:
+    def __init__(self, key, rate, burst):
+        self.key = key
+        self.refill = parse_rate(rate)
+        self.burst = burst
+
+    def tokens(self, state, now):
+        """Tokens available at ``now`` given the stored ``(tokens, last)`` state."""
+        tokens, last = state or (self.burst, now)
+        return min(self.burst, tokens + (now - last) * self.refill)
+
+    def state(self, tokens, now):
+        # A full bucket carries no state, so the entry can expire once it would have refilled
+        return (tokens, now), math.ceil(self.burst / self.refill) + 1
+
+
+@contextmanager
+def _locked(keys):
+    """Hold the locks of ``keys``; yields False, holding none, if one stays taken for LOCK_WAIT."""
+    locks = []
+    try:
+        for key in sorted(keys):
+            lock = f"{key}:lock"
+            deadline = time.monotonic() + LOCK_WAIT
+            while not cache.add(lock, 1, LOCK_TIMEOUT):
+                if time.monotonic() >= deadline:
+                    yield False
+                    return
+                time.sleep(0.002)
+            locks.append(lock)
+        yield True
+    finally:
+        if locks:
+            cache.delete_many(locks)
+
+
+def consume(buckets):
+    """Take one token from every bucket, or none if any is empty. Returns the wait in seconds, or None."""
+    if not buckets:
+        return None
+    with _locked([b.key for b in buckets]) as locked:
+        if not locked:
+            # Fail closed: without the lock the same tokens could be spent twice
+            return LOCK_TIMEOUT
+        now = time.time()
+        stored = cache.get_many([b.key for b in buckets])
+        levels = [(b, b.tokens(stored.get(b.key), now)) for b in buckets]
+        waits = [(1 - tokens) / b.refill for b, tokens in levels if tokens < 1]
+        if waits:
+            return max(waits)
+        for bucket, tokens in levels:
+            value, timeout = bucket.state(tokens - 1, now)
+            cache.set(bucket.key, value, timeout)
+    return None
+
+
+def get_bucket(scope, kind, ident):
+    config = getattr(settings, "THROTTLE_BUCKETS", {}).get(scope, {}).get(kind)
+    if not config:
+        return None
+    rate, burst = config
+    return TokenBucket(f"throttle:{scope}:{kind}:{ident}", rate, burst)
+
+
+def get_client_ip(request):
+    # BaseThrottle.get_ident honours REST_FRAMEWORK["NUM_PROXIES"] and works on plain HttpRequests
+    return BaseThrottle().get_ident(request)
+
+
+def _user_ident(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"u{user.pk}"
+    return f"ip{get_client_ip(request)}"
+
+
+def check_buckets(request, scope):
+    """Consume from the user and IP buckets of ``scope``. Returns the wait in seconds, or None."""
+    buckets = [get_bucket(scope, "user", _user_ident(request)), get_bucket(scope, "ip", get_client_ip(request))]
+    return consume([b for b in buckets if b is not None])
+
+
+class BucketThrottle(BaseThrottle):
+    """DRF throttle applying the user and IP buckets of the view's ``throttle_scope``."""
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None) or DEFAULT_SCOPE
+        self._wait = check_buckets(request, scope)
+        return self._wait is None
+
+    def wait(self):
+        return self._wait
+
+
+def throttle(scope):
+    """Decorator for function views: returns 429 with Retry-After when a bucket is empty."""
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            wait = check_buckets(request, scope)
+            if wait is not None:
+                response = HttpResponse("Demasiadas solicitudes, intenta de nuevo en unos segundos.", status=429)
+                response["Retry-After"] = str(math.ceil(wait))
+                return response
+            return view_func(request, *args, **kwargs)
+
+        return _wrapped
+
+    return decorator
@@ -0,0 +1,141 @@
+"""Per-request timing exposed as a ``Server-Timing`` header.
+
+When enabled, ``ServerTimingMiddleware`` measures DB time and query count (via
+``gestion.querycount.QueryRecorder``), template render time and total time, and
+adds them to the response::
+
+    Server-Timing: db;dur=12.3;desc="8 queries", tpl;dur=20.1, app;dur=5.0, total;dur=37.4
+
+The header, with its per-phase SQL and template timings, is only sent to staff
+users; requests slower than ``SERVER_TIMING_SLOW_MS`` are logged with their
+slowest SQL whoever made them.
+
+Template time is measured by ``TimedDjangoTemplates``, the template backend set in
+``TEMPLATES``. For streaming responses (exports) the header goes out before the
+body and only covers the time until then; the queries made while the body is
+generated are recorded too (``querycount.wrap_streaming``) and the slow-request
+check runs once it has been sent.
+
+The default comes from ``SERVER_TIMING_ENABLED`` and can be switched at runtime
+with ``set_enabled()`` (staff view ``server_timing_toggle``). The flag lives in the
+default cache and each process re-reads it at most every
+``SERVER_TIMING_REFRESH`` seconds, so a disabled middleware costs one clock read
+per request. Only a shared default cache (``CACHE_TABLE``) carries the switch to
+every worker; with the per-process LocMemCache it affects the worker that handled
+the POST and no other.
+"""
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.backends.django import DjangoTemplates, Template as DjangoBackendTemplate
+
+from .querycount import QueryRecorder, wrap_streaming
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "server_timing:enabled"
+SLOWEST_QUERIES = 3
+
+_current = ContextVar("gestion_server_timing", default=None)
+_flag = {"enabled": False, "checked": None}
+
+
+def is_enabled():
+    now = time.monotonic()
+    refresh = getattr(settings, "SERVER_TIMING_REFRESH", 5)
+    if _flag["checked"] is None or now - _flag["checked"] >= refresh:
+        value = cache.get(CACHE_KEY)
+        _flag["enabled"] = getattr(settings, "SERVER_TIMING_ENABLED", False) if value is None else value
+        _flag["checked"] = now
+    return _flag["enabled"]
+
+
+def set_enabled(value):
+    cache.set(CACHE_KEY, bool(value), None)
+    _flag["checked"] = None
+
+
+def reset():
+    """Drop the runtime override and go back to the setting."""
+    cache.delete(CACHE_KEY)
+    _flag["checked"] = None
+
+
+class TimedTemplate(DjangoBackendTemplate):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        # Includes and renders nested in another measured render are already inside its time
+        if timings is None or timings["depth"]:
+            return super().render(context, request)
+        recorder = timings["recorder"]
+        db_antes = recorder.total_time
+        inicio = time.perf_counter()
+        timings["depth"] += 1
+        try:
+            return super().render(context, request)
+        finally:
+            timings["depth"] -= 1
+            # Queries evaluated lazily from the template count as db, not tpl
+            timings["tpl"] += (time.perf_counter() - inicio) - (recorder.total_time - db_antes)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates whose templates time top-level renders (render(), TemplateResponse)."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_enabled():
+            return self.get_response(request)
+
+        inicio = time.perf_counter()
+        with QueryRecorder() as recorder:
+            timings = {"tpl": 0.0, "depth": 0, "recorder": recorder}
+            token = _current.set(timings)
+            try:
+                response = self.get_response(request)
+            finally:
+                _current.reset(token)
+        total = time.perf_counter() - inicio
+        db = recorder.total_time
+        tpl = timings["tpl"]
+        app = max(0.0, total - db - tpl)
+        # Los tiempos por fase y el SQL son solo para staff (request.user suele estar ya resuelto)
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={db * 1000:.1f};desc="{len(recorder)} queries"',
+                f"tpl;dur={tpl * 1000:.1f}",
+                f"app;dur={app * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ])
+
+        if getattr(response, "streaming", False):
+            # The export SQL runs while the body is sent
+            wrap_streaming(response, recorder, lambda: self._log_if_slow(request, recorder, tpl, inicio))
+        else:
+            self._log_if_slow(request, recorder, tpl, inicio)
+        return response
+
+    def _log_if_slow(self, request, recorder, tpl, inicio):
+        total = time.perf_counter() - inicio
+        db = recorder.total_time
+        if total * 1000 >= getattr(settings, "SERVER_TIMING_SLOW_MS", 1000):
+            slowest = sorted(recorder.queries, key=lambda q: q[1], reverse=True)[:SLOWEST_QUERIES]
+            logger.warning(
+                "Slow request %s %s: %.0f ms (db %.0f ms in %d queries, templates %.0f ms). Slowest SQL:\n%s",
+                request.method, request.get_full_path(), total * 1000, db * 1000, len(recorder), tpl * 1000,
+                "\n".join(f"  {d * 1000:.1f} ms  {sql[:500]}" for sql, d in slowest) or "  (none)",
+            )
@@ -0,0 +1,66 @@
+from django.db import models
+
+
+class FieldTrackerMixin(models.Model):
+    """
+    Guarda una copia de los valores de los campos tal como se cargaron de la base de datos
+    (o como quedaron tras el último save) para saber qué cambió sin volver a consultar la fila.
+
+    `tracked_fields` limita los campos observados; vacío significa todos los campos concretos.
+    """
+
+    tracked_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._take_snapshot(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._take_snapshot(kwargs.get("update_fields"))
+
+    def _tracked_attnames(self):
+        names = set(self.tracked_fields)
+        return [
+            f.attname for f in self._meta.concrete_fields
+            if not names or f.name in names or f.attname in names
+        ]
+
+    def _take_snapshot(self, fields=None):
+        if fields is None or not hasattr(self, "_loaded_values"):
+            self._loaded_values = {}
+        wanted = None if fields is None else {self._meta.get_field(f).attname for f in fields}
+        for attname in self._tracked_attnames():
+            # Deferred fields are not in __dict__ and are snapshotted when loaded
+            if attname in self.__dict__ and (wanted is None or attname in wanted):
+                self._loaded_values[attname] = self.__dict__[attname]
+
+    def load_snapshot_from_db(self):
+        """Fallback for instances built by hand with an existing pk (one query)."""
+        attnames = self._tracked_attnames()
+        row = type(self)._base_manager.using(self._state.db or "default").filter(pk=self.pk).values(*attnames).first()
+        self._loaded_values = row or {}
+
+    def get_changed_fields(self):
+        """Return ``{attname: (old, new)}`` for tracked fields that differ from the snapshot."""
+        if self._state.adding:
+            return {}
+        if not hasattr(self, "_loaded_values"):
+            self.load_snapshot_from_db()
+        return {
+            attname: (old, self.__dict__[attname])
+            for attname, old in self._loaded_values.items()
+            if attname in self.__dict__ and self.__dict__[attname] != old
+        }
+
+    def has_changed(self, field):
+        return self._meta.get_field(field).attname in self.get_changed_fields()
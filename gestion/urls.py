@@ -17,7 +17,10 @@ urlpatterns = [
     path("asistencia/htmx/deactivate_session_day/", views.deactivate_session_day, name="deactivate_session_day"),
     path("pagos/", views.registrar_pago, name="registrar_pago"),
     path("pagos/atletas/", views.atletas, name="atletas_list"),
+    path("pagos/atletas/importar/", views.atletas_import, name="atletas_import"),
     path("pagos/atletas/edit/<int:pk>/", views.atletas_edit, name="atletas_edit"),
     path("pagos/atletas/row/<int:pk>/", views.atletas_row, name="atletas_row"),
     path("pagos/atletas/delete/<int:pk>/", views.atletas_delete, name="atletas_delete"),
+    path("instrumentacion/server-timing/", views.server_timing_toggle, name="server_timing_toggle"),
+    path("instrumentacion/metrics/", views.metrics, name="metrics"),
 ]
@@ -5,12 +5,9 @@ from datetime import datetime, date
 from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.http import HttpResponse, JsonResponse
-from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.auth.decorators import user_passes_test
 from django.views.decorators.http import require_POST
 from django.contrib import messages
-import random
-import string
-import csv
 from django.utils.encoding import smart_str
 from io import BytesIO
 from openpyxl import Workbook
@@ -18,19 +15,39 @@ from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.table import Table, TableStyleInfo
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.styles import PatternFill
-from .models import SessionDay
+from .models import SessionDay, ResumenTemporada
+from django.db.models import Count, Max, Min, Q, Sum
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import router
+from .asyncviews import login_required, streaming_csv
+from .throttling import throttle
+from .querycount import query_budget
+from .replicas import replica_view
+from .reporting import reporting_view
+from . import writequeue
+from .roster import eligible_students, is_session_active
+from .search import search_users
+from .pagination import InvalidCursor, keyset_page
+from .importer import (
+    AthleteImportError, allocate_usernames, credentials_csv, import_athletes, random_string, read_rows, username_base,
+)
 from typing import cast
 import re
 import json
 
 # Create your views here.
 
+ATLETAS_PAGE_SIZE = 25
+
 
 def get_current_week():
     return datetime.now().isocalendar()
 
+@query_budget(6)
 @login_required
-def index(request):
+@replica_view
+async def index(request):
     # Build display name from first and last name (fall back to full_name or username)
     fname = (request.user.first_name or "").strip()
     lname = (request.user.last_name or "").strip()
@@ -47,7 +64,8 @@ def index(request):
         ("ADMINISTRADOR", "Administradores"),
     ]
     users_labels = [label for _, label in roles]
-    users_counts = [Usuario.objects.filter(rol=role).count() for role, _ in roles]
+    por_rol = {rol: n async for rol, n in Usuario.objects.values_list("rol").annotate(n=Count("id")).order_by()}
+    users_counts = [por_rol.get(role, 0) for role, _ in roles]
 
     # Sessions per day for current ISO week (Mon..Sun)
     weeknum = get_current_week()[1]
@@ -56,7 +74,11 @@ def index(request):
         days = [date.fromisocalendar(current_year, weeknum, d) for d in range(1, 8)]
     except Exception:
         days = []
-    sessions_counts = [SessionDay.objects.filter(fecha=d, active=True).count() for d in days]
+    por_dia = {
+        fecha: n
+        async for fecha, n in SessionDay.objects.filter(fecha__in=days, active=True).values_list("fecha").annotate(n=Count("id")).order_by()
+    }
+    sessions_counts = [por_dia.get(d, 0) for d in days]
 
     context = {
         "user_display_name": display_name,
@@ -74,13 +96,13 @@ def index(request):
         today = date.today()
 
     # total alumnos (active/alumno role) excluding those exento de pago
-    total_alumnos = Usuario.objects.filter(rol="ALUMNO", exento_pago=False).count()
+    total_alumnos = await Usuario.objects.filter(rol="ALUMNO", exento_pago=False).acount()
 
     # pagos registrados en el mes actual
     pagos_mes_qs = Pago.objects.filter(fecha_pago__year=today.year, fecha_pago__month=today.month)
     # unique alumnos (non-exempt) that have at least one pago this month
     alumnos_pagaron_ids = pagos_mes_qs.values_list('alumno', flat=True).distinct()
-    alumnos_pagaron_count = Usuario.objects.filter(pk__in=alumnos_pagaron_ids, rol="ALUMNO", exento_pago=False).count()
+    alumnos_pagaron_count = await Usuario.objects.filter(pk__in=alumnos_pagaron_ids, rol="ALUMNO", exento_pago=False).acount()
     alumnos_no_pagaron_count = max(0, total_alumnos - alumnos_pagaron_count)
 
     # percentages
@@ -107,7 +129,8 @@ def index(request):
     except Exception:
         current_month_name = ""
     context["current_month_name"] = current_month_name
-    return render(request, "index.html", context)
+    # Los context processors pueden consultar la base (permisos, mensajes)
+    return await sync_to_async(render)(request, "index.html", context)
 
 
 @login_required
@@ -142,58 +165,46 @@ def weekly_table(request, grupo, semana):
     )
 
 
+@query_budget(3)
 @login_required
 def view_groups(request):
     grupos = Grupo.objects.all()
     return render(request, "asistencias/grupos_table.html", {"grupos": grupos})
 
 
+@query_budget(5)
 @login_required
-def daily_attendance(request, grupo, fecha=None):
+async def daily_attendance(request, grupo, fecha=None):
     # print(grupo)
     if not fecha:
         fecha = date.today()
     else:
         fecha = datetime.strptime(fecha, "%Y-%m-%d").date()
 
-    estudiantes = Usuario.objects.filter(rol="ALUMNO", grupo=grupo).order_by("first_name", "last_name")
-    asistencia = Asistencia.objects.filter(fecha=fecha)
-
-    estudiantes_filtered = []
-    for estudiante in estudiantes:
-        # Filtrar usuarios no registrados aún o que ya pasaron su fecha de inactividad.
-        if estudiante.date_joined.date() > fecha:
-            continue
-        if estudiante.inactivo_desde and fecha > estudiante.inactivo_desde:
-            continue
-        try:
-            asistencia_record = asistencia.get(alumno=estudiante)
-            setattr(estudiante, "asistencia", asistencia_record)
-            # print("asistencia: ", asistencia_record)
-        except Asistencia.DoesNotExist:
-            setattr(estudiante, "asistencia", None)
-        estudiantes_filtered.append(estudiante)
+    estudiantes_filtered = await sync_to_async(eligible_students)(grupo, fecha)
 
     context = {"estudiantes": estudiantes_filtered, "fecha": fecha}
     # Incluir 'grupo' en el contexto para permitir acciones relacionadas al grupo (por ejemplo descarga diaria)
     context["grupo"] = grupo
     # Indicar si la sesión de este grupo/fecha está activa
     try:
-        session_active = SessionDay.objects.filter(grupo__pk=grupo, fecha=fecha, active=True).exists()
+        session_active = await sync_to_async(is_session_active)(grupo, fecha)
     except Exception:
         session_active = False
     context["session_active"] = session_active
 
-    return render(request, "asistencias/daily_table.html", context)
+    return await sync_to_async(render)(request, "asistencias/daily_table.html", context)
 
 
+@query_budget(8)
 @login_required
+@throttle("htmx")
 @require_http_methods(["POST"])
 def htmx_create_asistencia(request, pk):
     fecha = request.POST.get("fecha")
     alumno = Usuario.objects.get(id=pk)
-    # Crea asistencia con presente=True
-    asistencia = Asistencia.objects.create(alumno=alumno, fecha=fecha, presente=True)
+    # Crea asistencia con presente=True (agrupada con otras escrituras, ver gestion/writequeue.py)
+    asistencia = writequeue.submit(Asistencia.objects.create, alumno=alumno, fecha=fecha, presente=True)
     # Render and return the updated student row
     estudiante = alumno
     setattr(estudiante, "asistencia", asistencia)
@@ -201,14 +212,16 @@ def htmx_create_asistencia(request, pk):
     return HttpResponse(html)
 
 
+@query_budget(8)
 @login_required
+@throttle("htmx")
 @require_http_methods(["POST"])
 def htmx_update_asistencia(request, pk):
     try:
         asistencia_record = Asistencia.objects.get(pk=pk)
         # Alterna el estado de 'presente'
         asistencia_record.presente = not asistencia_record.presente
-        asistencia_record.save()
+        writequeue.submit(asistencia_record.save)
         estudiante = asistencia_record.alumno
         setattr(estudiante, "asistencia", asistencia_record)
         fecha = asistencia_record.fecha
@@ -218,14 +231,16 @@ def htmx_update_asistencia(request, pk):
         return JsonResponse({"status": "error", "message": "Asistencia not found"}, status=404)
 
 
+@query_budget(8)
 @login_required
+@throttle("htmx")
 @require_http_methods(["POST"])
 def htmx_delete_asistencia(request, pk):
     try:
         asistencia_record = Asistencia.objects.get(pk=pk)
         estudiante = asistencia_record.alumno
         fecha = asistencia_record.fecha
-        asistencia_record.delete()
+        writequeue.submit(asistencia_record.delete)
         # Return a row representing the student without asistencia (so the row can be replaced)
         setattr(estudiante, "asistencia", None)
         html = render(request, "asistencias/_student_row.html", {"student": estudiante, "fecha": fecha, "session_active": True})
@@ -235,7 +250,9 @@ def htmx_delete_asistencia(request, pk):
 
 
 
+@query_budget(9)
 @login_required
+@throttle("htmx")
 @require_POST
 def activate_session_day(request):
     """HTMX endpoint to activate the session for a given group and date.
@@ -260,20 +277,7 @@ def activate_session_day(request):
     session.save()
     # Render and return the updated fragment so HTMX can swap it in-place
     # Rebuild the estudiantes/context for the fragment
-    estudiantes = Usuario.objects.filter(rol="ALUMNO", grupo=grupo).order_by("first_name", "last_name")
-    asistencia_qs = Asistencia.objects.filter(fecha=fecha_obj)
-    estudiantes_filtered = []
-    for estudiante in estudiantes:
-        if estudiante.date_joined.date() > fecha_obj:
-            continue
-        if estudiante.inactivo_desde and fecha_obj > estudiante.inactivo_desde:
-            continue
-        try:
-            asistencia_record = asistencia_qs.get(alumno=estudiante)
-            setattr(estudiante, "asistencia", asistencia_record)
-        except Asistencia.DoesNotExist:
-            setattr(estudiante, "asistencia", None)
-        estudiantes_filtered.append(estudiante)
+    estudiantes_filtered = eligible_students(grupo, fecha_obj)
 
     context = {
         "estudiantes": estudiantes_filtered,
@@ -285,7 +289,9 @@ def activate_session_day(request):
     return HttpResponse(html)
 
 
+@query_budget(9)
 @login_required
+@throttle("htmx")
 @require_POST
 def deactivate_session_day(request):
     """HTMX endpoint to deactivate the session for a given group and date.
@@ -315,20 +321,7 @@ def deactivate_session_day(request):
         pass
 
     # Rebuild context and return fragment
-    estudiantes = Usuario.objects.filter(rol="ALUMNO", grupo=grupo).order_by("first_name", "last_name")
-    asistencia_qs = Asistencia.objects.filter(fecha=fecha_obj)
-    estudiantes_filtered = []
-    for estudiante in estudiantes:
-        if estudiante.date_joined.date() > fecha_obj:
-            continue
-        if estudiante.inactivo_desde and fecha_obj > estudiante.inactivo_desde:
-            continue
-        try:
-            asistencia_record = asistencia_qs.get(alumno=estudiante)
-            setattr(estudiante, "asistencia", asistencia_record)
-        except Asistencia.DoesNotExist:
-            setattr(estudiante, "asistencia", None)
-        estudiantes_filtered.append(estudiante)
+    estudiantes_filtered = eligible_students(grupo, fecha_obj)
 
     context = {
         "estudiantes": estudiantes_filtered,
@@ -344,6 +337,7 @@ def _user_is_staff(user):
     return bool(user and user.is_active and user.is_staff)
 
 
+@query_budget(4)
 @login_required
 @user_passes_test(_user_is_staff)
 def atletas_row(request, pk):
@@ -355,8 +349,10 @@ def atletas_row(request, pk):
     return render(request, "_atleta_row.html", {"a": a, "request": request})
 
 
+@query_budget(8)
 @login_required
 @user_passes_test(_user_is_staff)
+@throttle("htmx")
 def atletas_edit(request, pk):
     """Return an edit form fragment for an atleta (GET) and handle POST to save minimal fields."""
     try:
@@ -422,10 +418,10 @@ def registrar_pago(request):
     return render(request, "pagos/registrar_pago.html", {"form": form})
 
 
+@query_budget(8)
 @login_required
 def atletas(request):
     """List all athletes (Usuarios with rol='ALUMNO')."""
-    from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
     # Handle creation of a new athlete via POST (staff only)
     if request.method == "POST":
         if not (request.user.is_staff and request.user.is_active):
@@ -442,108 +438,218 @@ def atletas(request):
             messages.error(request, "Grupo no encontrado.")
             return redirect("atletas_list")
 
-        # Generate a random username and password
-        def _random_string(n=8):
-            chars = string.ascii_lowercase + string.digits
-            return ''.join(random.choice(chars) for _ in range(n))
-
-        # Ensure username uniqueness
-        username_base = (first_name[0] + last_name).lower()
-        username_base = re.sub(r"[^a-z0-9]", "", username_base)
-        username = username_base or _random_string(6)
-        attempt = 0
-        while Usuario.objects.filter(username=username).exists() and attempt < 10:
-            username = f"{username_base}{_random_string(3)}"
-            attempt += 1
-        if Usuario.objects.filter(username=username).exists():
-            username = f"{username_base}{_random_string(6)}"
-
-        password = _random_string(10)
-
-        # Create the user (inactive=False by default) and set role ALUMNO
+        # Generate a unique username (one query over existing prefixes) and a random password
+        username = allocate_usernames([username_base(first_name, last_name)])[0]
+        password = random_string(10)
+
+        # Create the user (active by default) and set role ALUMNO
         try:
-            usuario = Usuario.objects.create_user(username=username, password=password,
-                                                  first_name=first_name, last_name=last_name,
-                                                  rol="ALUMNO", grupo=grupo)
-            # Optionally set is_active=True if you want them to be able to login
-            usuario.is_active = True
-            usuario.save()
+            Usuario.objects.create_user(username=username, password=password,
+                                        first_name=first_name, last_name=last_name,
+                                        rol="ALUMNO", grupo=grupo, is_active=True)
             messages.success(request, f"Atleta creado. Usuario: {username} — Clave: {password}")
         except Exception as e:
             messages.error(request, f"Error creando atleta: {e}")
             messages.error(request, "Ocurrió un error al crear el atleta.")
         return redirect("atletas_list")
 
-    alumnos_qs = Usuario.objects.filter(rol="ALUMNO").order_by("first_name", "last_name")
-    page = request.GET.get('page', 1)
-    paginator = Paginator(alumnos_qs, 25)
+    q = request.GET.get("q", "").strip()
+    # Keyset pagination on (first_name, last_name, id): no COUNT(*) and no OFFSET
+    alumnos_qs = search_users(Usuario.objects.filter(rol="ALUMNO").select_related("grupo"), q)
     try:
-        alumnos = paginator.page(page)
-    except PageNotAnInteger:
-        alumnos = paginator.page(1)
-    except EmptyPage:
-        alumnos = paginator.page(paginator.num_pages)
+        alumnos, next_cursor, start_index = keyset_page(alumnos_qs, request.GET.get("after"), size=ATLETAS_PAGE_SIZE)
+    except InvalidCursor:
+        return HttpResponse("Cursor inválido", status=400)
+
+    context = {"alumnos": alumnos, "next_cursor": next_cursor, "start_index": start_index, "q": q}
+    if request.htmx:
+        # Infinite scroll: only the next rows (and the new sentinel row)
+        if request.GET.get("after"):
+            return render(request, "_atletas_filas.html", context)
+        # Live search: only the table is swapped
+        if request.htmx.target == "atletas-tabla":
+            return render(request, "_atletas_tabla.html", context)
 
     # provide grupos for the add form
-    grupos = Grupo.objects.all()
+    context["grupos"] = Grupo.objects.all()
+    return render(request, "atletas.html", context)
+
+
+@login_required
+@user_passes_test(_user_is_staff)
+@require_POST
+def atletas_import(request):
+    """Create athletes in bulk from an uploaded CSV/XLSX and return their credentials as CSV."""
+    archivo = request.FILES.get("archivo")
+    if not archivo:
+        messages.error(request, "Seleccione un archivo CSV o XLSX.")
+        return redirect("atletas_list")
+    try:
+        created = import_athletes(read_rows(archivo))
+    except AthleteImportError as e:
+        messages.error(request, f"No se importó ningún atleta. {e}")
+        return redirect("atletas_list")
+    except Exception as e:
+        import logging
+
+        logging.exception("Error importing athletes")
+        messages.error(request, f"Error importando atletas: {e}")
+        return redirect("atletas_list")
+
+    response = HttpResponse(credentials_csv(created), content_type="text/csv")
+    filename = f"credenciales_atletas_{date.today():%Y%m%d}.csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _xlsx_response(header, rows_data, table_name, filename):
+    """XLSX con el encabezado como tabla, anchos ajustados y 'Ausente' en rojo (en memoria: openpyxl no escribe por partes)."""
+    wb = Workbook()
+    ws = cast(Worksheet, wb.active)
+
+    # Escribir encabezado y filas (solo una vez)
+    ws.append(header)
+    for r in rows_data:
+        ws.append(r)
+
+    # Ajustar ancho de columnas según el contenido
+    nrows = len(rows_data) + 1
+    ncols = len(header)
+    for col_idx in range(1, ncols + 1):
+        # Calcular ancho en base a las filas (rows_data) y asegurarse de que el header también se considera
+        header_len = len(str(header[col_idx - 1]))
+        max_row_len = 0
+        for r in rows_data:
+            try:
+                val = r[col_idx - 1]
+            except Exception:
+                val = ""
+            l = len(str(val))
+            if l > max_row_len:
+                max_row_len = l
+        max_length = max(header_len, max_row_len)
+        # Añadir padding extra para que no quede demasiado pegado
+        adjusted_width = max_length + 4
+        ws.column_dimensions[get_column_letter(col_idx)].width = adjusted_width
+
+    # Resaltar celdas con 'Ausente' en rojo
+    red_fill = PatternFill(start_color="FFFFCCCC", end_color="FFFFCCCC", fill_type="solid")
+    for row in ws.iter_rows(min_row=2, max_row=nrows, min_col=2, max_col=ncols):
+        for cell in row:
+            try:
+                if str(cell.value).strip().lower() == "ausente":
+                    cell.fill = red_fill
+            except Exception:
+                pass
+
+    # Crear tabla Excel con estilo
+    last_col = get_column_letter(ncols)
+    table_range = f"A1:{last_col}{nrows}"
+    # Sanitize table name: only word chars and underscores
+    table_name = re.sub(r"\W+", "_", table_name)
+    tab = Table(displayName=table_name, ref=table_range)
+    style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False,
+                           showLastColumn=False, showRowStripes=True, showColumnStripes=False)
+    tab.tableStyleInfo = style
+    ws.add_table(tab)
 
-    return render(request, "atletas.html", {"alumnos": alumnos, "paginator": paginator, "grupos": grupos})
+    stream = BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+    xlsx_response = HttpResponse(stream.getvalue(), content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    xlsx_response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return xlsx_response
 
 
+# Las exportaciones son async: bajo ASGI el CSV sale en streaming desde el event
+# loop (ver gestion/asyncviews.py). El cuerpo se genera después de salir de
+# @reporting_view/@replica_view, así que cada vista fija con .using() la base que
+# eligió el router mientras los decoradores estaban activos. Su @query_budget cubre
+# también las consultas del cuerpo (gestion.querycount.wrap_streaming).
+
+
+# La asistencia de hoy se está cargando: los reportes que la incluyen leen la base
+# viva y no la copia para reportes, que no la tendría
+def _es_hoy_o_despues(request, grupo, fecha):
+    return fecha >= date.today().isoformat()
+
+
+def _semana_actual_o_posterior(request, grupo, semana):
+    # Una semana inválida no llega a leer nada (400)
+    return not semana.isdigit() or int(semana) >= date.today().isocalendar()[1]
+
+
+@query_budget(4)
 @login_required
-def download_attendance_summary(request, grupo):
+@reporting_view
+@replica_view
+async def download_attendance_summary(request, grupo):
     """
     Genera y devuelve un CSV resumido de asistencias para todos los alumnos de un grupo.
     Columnas: nombre, fecha_primera, fecha_ultima, total_sesiones, asistencias
     """
-    # Obtener estudiantes del grupo
-    estudiantes = Usuario.objects.filter(rol="ALUMNO", grupo=grupo).order_by("first_name", "last_name")
-
-    # Construir datos de resumen
-    rows = []
-    for estudiante in estudiantes:
-        asistencias = Asistencia.objects.filter(alumno=estudiante).order_by("fecha")
-        total_sesiones = asistencias.count()
-        asistencias_presentes = asistencias.filter(presente=True).count()
-        first = asistencias.first()
-        last = asistencias.last()
-        fecha_primera = first.fecha if first else ""
-        fecha_ultima = last.fecha if last else ""
-        rows.append({
-            "nombre": estudiante.nombre_completo() if hasattr(estudiante, 'nombre_completo') else f"{estudiante.first_name} {estudiante.last_name}",
-            "fecha_primera": fecha_primera,
-            "fecha_ultima": fecha_ultima,
-            "total_sesiones": total_sesiones,
-            "asistencias": asistencias_presentes,
-        })
-
-    # Crear respuesta CSV
-    response = HttpResponse(content_type="text/csv")
-    filename = f"asistencias_grupo_{grupo}.csv"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    db = router.db_for_read(Usuario)
+    # Obtener estudiantes del grupo con los totales de asistencia calculados en la misma consulta
+    estudiantes = (
+        Usuario.objects.using(db).filter(rol="ALUMNO", grupo=grupo)
+        .annotate(
+            total_sesiones=Count("asistencias"),
+            asistencias_presentes=Count("asistencias", filter=Q(asistencias__presente=True)),
+            fecha_primera=Min("asistencias__fecha"),
+            fecha_ultima=Max("asistencias__fecha"),
+        )
+        .order_by("first_name", "last_name")
+    )
+    # Totales de temporadas archivadas (ver gestion/archive.py)
+    archivados = {
+        r["alumno"]: r
+        async for r in ResumenTemporada.objects.using(db).filter(alumno__rol="ALUMNO", alumno__grupo=grupo)
+        .values("alumno")
+        .annotate(
+            total=Sum("total_sesiones"),
+            presentes=Sum("asistencias"),
+            primera=Min("fecha_primera"),
+            ultima=Max("fecha_ultima"),
+        )
+    }
 
-    writer = csv.writer(response)
-    writer.writerow([
+    def fila(estudiante):
+        total_sesiones = estudiante.total_sesiones
+        asistencias_presentes = estudiante.asistencias_presentes
+        fechas_primera = [estudiante.fecha_primera]
+        fechas_ultima = [estudiante.fecha_ultima]
+        archivado = archivados.get(estudiante.pk)
+        if archivado:
+            total_sesiones += archivado["total"] or 0
+            asistencias_presentes += archivado["presentes"] or 0
+            fechas_primera.append(archivado["primera"])
+            fechas_ultima.append(archivado["ultima"])
+        fechas_primera = [f for f in fechas_primera if f]
+        fechas_ultima = [f for f in fechas_ultima if f]
+        nombre = estudiante.nombre_completo() if hasattr(estudiante, 'nombre_completo') else f"{estudiante.first_name} {estudiante.last_name}"
+        return [
+            smart_str(nombre),
+            min(fechas_primera) if fechas_primera else "",
+            max(fechas_ultima) if fechas_ultima else "",
+            total_sesiones,
+            asistencias_presentes,
+        ]
+
+    header = [
         "Nombres",
         "fecha_primera",
         "fecha_ultima",
         "total_sesiones",
         "Asistencias",
-    ])
-    for r in rows:
-        writer.writerow([
-            smart_str(r["nombre"]),
-            r["fecha_primera"],
-            r["fecha_ultima"],
-            r["total_sesiones"],
-            r["asistencias"],
-        ])
-
-    return response
+    ]
+    return streaming_csv(request, f"asistencias_grupo_{grupo}.csv", header, estudiantes, fila)
 
 
+@query_budget(5)
 @login_required
-def download_weekly_attendance_summary(request, grupo, semana):
+@reporting_view(live_if=_semana_actual_o_posterior)
+@replica_view
+async def download_weekly_attendance_summary(request, grupo, semana):
     """
     Genera un CSV resumido de asistencias para un grupo en una semana ISO dada.
     Columnas: nombre, semana, fecha_inicio, fecha_fin, total_sesiones, asistencias
@@ -560,131 +666,61 @@ def download_weekly_attendance_summary(request, grupo, semana):
     except Exception:
         return HttpResponse("Semana inválida", status=400)
 
+    db = router.db_for_read(Usuario)
     # Filtrar solo los días que estén activos en SessionDay para este grupo
-    active_days_qs = SessionDay.objects.filter(grupo__pk=grupo, fecha__gte=start_date, fecha__lte=end_date, active=True)
-    active_days = sorted([sd.fecha for sd in active_days_qs])
+    active_days_qs = SessionDay.objects.using(db).filter(grupo__pk=grupo, fecha__gte=start_date, fecha__lte=end_date, active=True)
+    active_days = sorted([fecha async for fecha in active_days_qs.values_list("fecha", flat=True)])
     # Si no hay días activos en la semana, devolver un CSV/XLSX vacío con solo encabezado
     days = active_days
 
-    estudiantes = Usuario.objects.filter(rol="ALUMNO", grupo=grupo).order_by("first_name", "last_name")
+    estudiantes = Usuario.objects.using(db).filter(rol="ALUMNO", grupo=grupo).order_by("first_name", "last_name")
 
     # Prefetch asistencias para la semana en un solo query y construir un mapa (alumno, fecha) -> presente
-    asistencias_qs = Asistencia.objects.filter(alumno__in=estudiantes, fecha__gte=start_date, fecha__lte=end_date)
-    asist_map = {(a.alumno.pk, a.fecha): a.presente for a in asistencias_qs}
+    asistencias_qs = Asistencia.objects.using(db).filter(alumno__in=estudiantes, fecha__gte=start_date, fecha__lte=end_date)
+    # (aiterator() con values_list() falla en Django 4.2: ejecuta la consulta en el event loop)
+    asist_map = {
+        (alumno_id, fecha): presente
+        async for alumno_id, fecha, presente in asistencias_qs.values_list("alumno_id", "fecha", "presente")
+    }
 
     # Encabezado: nombre, <dia1>, <dia2>, ..., total_sesiones, asistencias
     # Usar formato dd-mm-yyyy
     day_headers = [d.strftime("%d-%m-%Y") for d in days]
     header = ["Nombres"] + day_headers + ["total_sesiones", "Asistencias"]
 
+    def fila(estudiante):
+        presentes_count = 0
+        total_records = 0
+        name = estudiante.nombre_completo() if hasattr(estudiante, 'nombre_completo') else f"{estudiante.first_name} {estudiante.last_name}"
+        day_values = []
+        for d in days:
+            presente = asist_map.get((estudiante.pk, d), False)
+            if (estudiante.pk, d) in asist_map:
+                total_records += 1
+            if presente:
+                presentes_count += 1
+                day_values.append("Presente")
+            else:
+                day_values.append("Ausente")
+        return [smart_str(name)] + day_values + [total_records, presentes_count]
+
     fmt = request.GET.get("format", "").lower()
     if fmt == "xlsx":
-        # Generar XLSX
-        wb = Workbook()
-        ws = cast(Worksheet, wb.active)
-
-        # Construir filas en memoria primero
-        rows_data = []
-        for estudiante in estudiantes:
-            presentes_count = 0
-            total_records = 0
-            name = estudiante.nombre_completo() if hasattr(estudiante, 'nombre_completo') else f"{estudiante.first_name} {estudiante.last_name}"
-            day_values = []
-            for d in days:
-                presente = asist_map.get((estudiante.pk, d), False)
-                if (estudiante.pk, d) in asist_map:
-                    total_records += 1
-                if presente:
-                    presentes_count += 1
-                    day_values.append("Presente")
-                else:
-                    day_values.append("Ausente")
-            row_values = [smart_str(name)] + day_values + [total_records, presentes_count]
-            rows_data.append(row_values)
-
-        # Escribir encabezado y filas (solo una vez)
-        ws.append(header)
-        for r in rows_data:
-            ws.append(r)
-
-        # Ajustar ancho de columnas según el contenido
-        nrows = len(rows_data) + 1
-        ncols = len(header)
-        for col_idx in range(1, ncols + 1):
-            # Calcular ancho en base a las filas (rows_data) y asegurarse de que el header también se considera
-            header_len = len(str(header[col_idx - 1]))
-            max_row_len = 0
-            for r in rows_data:
-                try:
-                    val = r[col_idx - 1]
-                except Exception:
-                    val = ""
-                l = len(str(val))
-                if l > max_row_len:
-                    max_row_len = l
-            max_length = max(header_len, max_row_len)
-            # Añadir padding extra para que no quede demasiado pegado
-            adjusted_width = max_length + 4
-            ws.column_dimensions[get_column_letter(col_idx)].width = adjusted_width
-
-        # Resaltar celdas con 'Ausente' en rojo
-        red_fill = PatternFill(start_color="FFFFCCCC", end_color="FFFFCCCC", fill_type="solid")
-        for row in ws.iter_rows(min_row=2, max_row=nrows, min_col=2, max_col=ncols):
-            for cell in row:
-                try:
-                    if str(cell.value).strip().lower() == "ausente":
-                        cell.fill = red_fill
-                except Exception:
-                    pass
-
-        # Crear tabla Excel con estilo
-        last_col = get_column_letter(ncols)
-        table_range = f"A1:{last_col}{nrows}"
-        # Sanitize table name: only word chars and underscores
-        table_name = f"T_AsistenciasSemana_{week}_{grupo}"
-        table_name = re.sub(r"\W+", "_", table_name)
-        tab = Table(displayName=table_name, ref=table_range)
-        style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False,
-                               showLastColumn=False, showRowStripes=True, showColumnStripes=False)
-        tab.tableStyleInfo = style
-        ws.add_table(tab)
-
-        stream = BytesIO()
-        wb.save(stream)
-        stream.seek(0)
-        xlsx_filename = f"asistencias_grupo_{grupo}_semana_{week}.xlsx"
-        xlsx_response = HttpResponse(stream.getvalue(), content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        xlsx_response["Content-Disposition"] = f'attachment; filename="{xlsx_filename}"'
-        return xlsx_response
-    else:
-        # Generar CSV por defecto
-        response = HttpResponse(content_type="text/csv")
-        filename = f"asistencias_grupo_{grupo}_semana_{week}.csv"
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        writer = csv.writer(response)
-        writer.writerow(header)
-
-        for estudiante in estudiantes:
-            presentes_count = 0
-            total_records = 0
-            name = estudiante.nombre_completo() if hasattr(estudiante, 'nombre_completo') else f"{estudiante.first_name} {estudiante.last_name}"
-            day_values = []
-            for d in days:
-                presente = asist_map.get((estudiante.pk, d), False)
-                if (estudiante.pk, d) in asist_map:
-                    total_records += 1
-                if presente:
-                    presentes_count += 1
-                    day_values.append("Presente")
-                else:
-                    day_values.append("Ausente")
-            writer.writerow([smart_str(name)] + day_values + [total_records, presentes_count])
-
-        return response
+        # Generar XLSX (fuera del event loop: openpyxl es CPU y memoria)
+        rows_data = [fila(e) async for e in estudiantes.aiterator(chunk_size=settings.EXPORT_CHUNK_SIZE)]
+        return await sync_to_async(_xlsx_response)(
+            header, rows_data, f"T_AsistenciasSemana_{week}_{grupo}", f"asistencias_grupo_{grupo}_semana_{week}.xlsx"
+        )
+    # Generar CSV por defecto
+    filename = f"asistencias_grupo_{grupo}_semana_{week}.csv"
+    return streaming_csv(request, filename, header, estudiantes, fila)
 
 
+@query_budget(5)
 @login_required
-def download_daily_attendance_summary(request, grupo, fecha):
+@reporting_view(live_if=_es_hoy_o_despues)
+@replica_view
+async def download_daily_attendance_summary(request, grupo, fecha):
     """
     Genera un CSV con el resumen de asistencias para una fecha específica y grupo.
     Columnas: nombre, fecha, presente, nota
@@ -695,9 +731,10 @@ def download_daily_attendance_summary(request, grupo, fecha):
     except Exception:
         return HttpResponse("Fecha inválida", status=400)
 
+    db = router.db_for_read(Usuario)
     # Verificar si la sesión para este grupo y fecha está activa
     try:
-        session_active = SessionDay.objects.filter(grupo__pk=grupo, fecha=fecha_obj, active=True).exists()
+        session_active = await SessionDay.objects.using(db).filter(grupo__pk=grupo, fecha=fecha_obj, active=True).aexists()
     except Exception:
         session_active = False
     if not session_active:
@@ -706,122 +743,67 @@ def download_daily_attendance_summary(request, grupo, fecha):
             status=404,
         )
 
-    estudiantes = Usuario.objects.filter(rol="ALUMNO", grupo=grupo).order_by("first_name", "last_name")
-    rows = []
-    for estudiante in estudiantes:
-        try:
-            asistencia = Asistencia.objects.get(alumno=estudiante, fecha=fecha_obj)
-            presente = asistencia.presente
-            nota = asistencia.nota
-        except Asistencia.DoesNotExist:
-            presente = False
-            nota = ""
-        rows.append(
-            {
-                "nombre": estudiante.nombre_completo()
-                if hasattr(estudiante, "nombre_completo")
-                else f"{estudiante.first_name} {estudiante.last_name}",
-                "fecha": fecha_obj,
-                "presente": presente,
-            }
+    estudiantes = Usuario.objects.using(db).filter(rol="ALUMNO", grupo=grupo).order_by("first_name", "last_name")
+    # Asistencias del día en una sola consulta
+    presentes = {
+        alumno_id: presente
+        async for alumno_id, presente in Asistencia.objects.using(db)
+        .filter(alumno__rol="ALUMNO", alumno__grupo=grupo, fecha=fecha_obj)
+        .values_list("alumno_id", "presente")
+    }
+    fecha_str = fecha_obj.strftime("%d-%m-%Y")
+
+    def fila(estudiante):
+        # 'Presente'/'Ausente'
+        presente = presentes.get(estudiante.pk, False)
+        nombre = (
+            estudiante.nombre_completo()
+            if hasattr(estudiante, "nombre_completo")
+            else f"{estudiante.first_name} {estudiante.last_name}"
         )
+        return [smart_str(nombre), fecha_str, "Presente" if presente else "Ausente"]
 
+    header = ["Nombres", "Fecha", "Asistencias"]
     fmt = request.GET.get("format", "").lower()
     if fmt == "xlsx":
         # Generar XLSX con encabezado como tabla y ajuste de anchos
-        wb = Workbook()
-        ws = cast(Worksheet, wb.active)
-
-        header = ["Nombres", "Fecha", "Asistencias"]
-
-        # Construir filas en memoria
-        rows_data = []
-        for r in rows:
-            presente_str = "Presente" if r["presente"] else "Ausente"
-            fecha_str = (
-                r["fecha"].strftime("%d-%m-%Y")
-                if hasattr(r["fecha"], "strftime")
-                else str(r["fecha"])
-            )
-            rows_data.append([smart_str(r["nombre"]), fecha_str, presente_str])
-
-        # Escribir encabezado y filas (solo una vez)
-        ws.append(header)
-        for row_item in rows_data:
-            ws.append(row_item)
-
-        # Ajustar ancho de columnas según el contenido
-        nrows = len(rows_data) + 1
-        ncols = len(header)
-        for col_idx in range(1, ncols + 1):
-            header_len = len(str(header[col_idx - 1]))
-            max_row_len = 0
-            for row_item in rows_data:
-                try:
-                    val = row_item[col_idx - 1]
-                except Exception:
-                    val = ""
-                l = len(str(val))
-                if l > max_row_len:
-                    max_row_len = l
-            max_length = max(header_len, max_row_len)
-            adjusted_width = max_length + 4
-            ws.column_dimensions[get_column_letter(col_idx)].width = adjusted_width
-
-        # Resaltar celdas con 'Ausente' en rojo
-        red_fill = PatternFill(start_color="FFFFCCCC", end_color="FFFFCCCC", fill_type="solid")
-        for row_cells in ws.iter_rows(min_row=2, max_row=nrows, min_col=2, max_col=1 + ncols):
-            for cell in row_cells:
-                try:
-                    if str(cell.value).strip().lower() == "ausente":
-                        cell.fill = red_fill
-                except Exception:
-                    pass
-
-        # Crear tabla Excel con estilo
-        last_col = get_column_letter(ncols)
-        table_range = f"A1:{last_col}{nrows}"
-        # Sanitize table name and include group + date (YYYYMMDD) to keep it unique and valid
-        try:
-            date_part = fecha_obj.strftime("%Y%m%d")
-        except Exception:
-            date_part = str(fecha).replace("-", "_")
-        table_name = f"T_AsistenciasDiaria_{grupo}_{date_part}"
-        table_name = re.sub(r"\W+", "_", table_name)
-        tab = Table(displayName=table_name, ref=table_range)
-        style = TableStyleInfo(
-            name="TableStyleMedium9",
-            showFirstColumn=False,
-            showLastColumn=False,
-            showRowStripes=True,
-            showColumnStripes=False,
+        rows_data = [fila(e) async for e in estudiantes.aiterator(chunk_size=settings.EXPORT_CHUNK_SIZE)]
+        # Include group + date (YYYYMMDD) in the table name to keep it unique and valid
+        return await sync_to_async(_xlsx_response)(
+            header, rows_data, f"T_AsistenciasDiaria_{grupo}_{fecha_obj:%Y%m%d}", f"asistencias_grupo_{grupo}_{fecha}.xlsx"
         )
-        tab.tableStyleInfo = style
-        ws.add_table(tab)
-
-        stream = BytesIO()
-        wb.save(stream)
-        stream.seek(0)
-        xlsx_filename = f"asistencias_grupo_{grupo}_{fecha}.xlsx"
-        xlsx_response = HttpResponse(
-            stream.getvalue(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-        xlsx_response["Content-Disposition"] = f'attachment; filename="{xlsx_filename}"'
-        return xlsx_response
-    else:
-        # Generar CSV por defecto con 'Presente'/'Ausente'
-        response = HttpResponse(content_type="text/csv")
-        filename = f"asistencias_grupo_{grupo}_{fecha}.csv"
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        writer = csv.writer(response)
-        writer.writerow(["Nombres", "Fecha", "Asistencias"])
-        for r in rows:
-            presente_str = "Presente" if r["presente"] else "Ausente"
-            fecha_str = (
-                r["fecha"].strftime("%d-%m-%Y")
-                if hasattr(r["fecha"], "strftime")
-                else str(r["fecha"])
-            )
-            writer.writerow([smart_str(r["nombre"]), fecha_str, presente_str])
-        return response
+    return streaming_csv(request, f"asistencias_grupo_{grupo}_{fecha}.csv", header, estudiantes, fila)
+
+
+@login_required
+@user_passes_test(_user_is_staff)
+@require_http_methods(["GET", "POST"])
+def server_timing_toggle(request):
+    """GET: current Server-Timing state. POST enabled=1|0 switches it at runtime; enabled=default drops the override."""
+    from . import timing
+    if request.method == "POST":
+        value = request.POST.get("enabled", "").lower()
+        if value in ("1", "true", "on"):
+            timing.set_enabled(True)
+        elif value in ("0", "false", "off"):
+            timing.set_enabled(False)
+        elif value == "default":
+            timing.reset()
+        else:
+            return JsonResponse({"error": "enabled debe ser 1, 0 o default"}, status=400)
+    return JsonResponse({"enabled": timing.is_enabled()})
+
+
+def metrics(request):
+    """Métricas en formato Prometheus. Staff con sesión, o un scraper con `Authorization: Bearer <METRICS_TOKEN>`."""
+    import hmac
+    from django.conf import settings
+    from django.http import HttpResponseForbidden
+    from . import metrics as registry
+
+    token = getattr(settings, "METRICS_TOKEN", None)
+    auth = request.META.get("HTTP_AUTHORIZATION", "")
+    por_token = bool(token) and hmac.compare_digest(auth.encode(), f"Bearer {token}".encode())
+    if not (por_token or _user_is_staff(request.user)):
+        return HttpResponseForbidden("Solo staff")
+    return HttpResponse(registry.collect(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,126 @@
+"""
+Agrupación de escrituras de asistencia en una sola transacción (group commit).
+
+Al empezar una sesión varios entrenadores marcan asistencias a la vez y en SQLite
+cada escritura toma el bloqueo de escritura por separado. Con
+ATTENDANCE_WRITE_COALESCING, `submit(fn)` no escribe enseguida: el primer request
+que llega hace de líder, espera ATTENDANCE_COALESCE_WINDOW_MS (o a que el lote
+llegue a ATTENDANCE_COALESCE_MAX_BATCH), ejecuta las escrituras de todos los
+requests del lote en una transacción y, tras el commit, cada request recibe su
+resultado o su excepción. Cada escritura va en su propio savepoint, así que un
+error solo afecta a su request.
+
+Las funciones corren en el hilo del líder dentro del contexto (contextvars) de su
+request, para que la auditoría las atribuya a quien corresponde. Sus entradas de
+auditoría se guardan con un único INSERT dentro de la misma transacción del lote,
+por la conexión del líder: se confirman o se descartan con las escrituras. Si la
+opción está apagada o el request ya está dentro de una transacción, `submit`
+ejecuta la función directamente.
+"""
+import contextvars
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import transaction
+
+from . import audit
+
+DEFAULT_WINDOW_MS = 5
+DEFAULT_MAX_BATCH = 50
+
+
+class _Lote:
+    def __init__(self):
+        self.items = []
+        self.lleno = threading.Event()
+
+
+class WriteCoalescer:
+    def __init__(self, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH, atomic=None):
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        # Fábrica de transacciones; anidada hace un savepoint (transaction.atomic por defecto)
+        self.atomic = atomic or transaction.atomic
+        self._lock = threading.Lock()
+        self._lote = None
+        self.stats = {"lotes": 0, "escrituras": 0}
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        item = (future, contextvars.copy_context(), fn, args, kwargs)
+        with self._lock:
+            lote = self._lote
+            lider = lote is None
+            if lider:
+                lote = self._lote = _Lote()
+            lote.items.append(item)
+            if len(lote.items) >= self.max_batch:
+                lote.lleno.set()
+        if lider:
+            lote.lleno.wait(self.window_ms / 1000)
+            with self._lock:
+                # A partir de aquí los nuevos requests abren otro lote
+                self._lote = None
+            self._run(lote.items)
+        return future.result()
+
+    def _run(self, items):
+        resultados = []
+        try:
+            with self.atomic():
+                auditoria = []
+                for future, ctx, fn, args, kwargs in items:
+                    entradas = []
+                    try:
+                        with self.atomic():
+                            resultado = ctx.run(_ejecutar, entradas, fn, args, kwargs)
+                    except Exception as exc:
+                        resultados.append((future, None, exc))
+                    else:
+                        resultados.append((future, resultado, None))
+                        auditoria.extend(entradas)
+                audit.flush(auditoria)
+        except BaseException as exc:
+            # Falló el commit (o algo fuera de los savepoints): nada quedó escrito
+            for future, *_ in items:
+                if not future.done():
+                    future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+        self.stats["lotes"] += 1
+        self.stats["escrituras"] += len(items)
+        # Solo después del commit: cada request ve su escritura ya confirmada
+        for future, resultado, exc in resultados:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(resultado)
+
+
+def _ejecutar(entradas, fn, args, kwargs):
+    with audit.collect_into(entradas):
+        return fn(*args, **kwargs)
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def get_coalescer():
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = WriteCoalescer(
+                getattr(settings, "ATTENDANCE_COALESCE_WINDOW_MS", DEFAULT_WINDOW_MS),
+                getattr(settings, "ATTENDANCE_COALESCE_MAX_BATCH", DEFAULT_MAX_BATCH),
+            )
+        return _coalescer
+
+
+def submit(fn, *args, **kwargs):
+    """Ejecuta `fn` (una escritura) en el próximo lote, o directamente si no se agrupa."""
+    if not getattr(settings, "ATTENDANCE_WRITE_COALESCING", False) or transaction.get_connection().in_atomic_block:
+        return fn(*args, **kwargs)
+    return get_coalescer().submit(fn, *args, **kwargs)